@@ -2,12 +2,27 @@ import streamlit as st
 import pandas as pd
 import sqlite3
 from datetime import date, datetime, timedelta
-import random
-import os
-import plotly.express as px
-import plotly.graph_objects as go
 from contextlib import contextmanager
 import logging
+from task_queue import get_task_queue, reload_task_queue
+from reminders import get_reminder_service
+from lazy_imports import lazy_import
+from theme import apply_theme
+from profiler import begin_rerun, profiled, render_profiler_panel, rerun_page
+from sql_trace import render_sql_trace_panel, traced_connect
+from cache_telemetry import cache_resource, clear_caches, render_cache_panel
+from metrics import start_metrics
+from dashboard_data import load_dashboard_data, prewarm_dashboard_data
+from backups import render_backup_controls, start_backup_schedule
+from restore import render_restore_controls
+from quotes import QuoteStore, quote_files_version
+from db_schema import DATABASES, ensure_schema
+from archive import render_archive_controls, start_archive_schedule
+from unified_views import MOCK_DB_FILE
+from legacy_import import ensure_legacy_import
+
+px = lazy_import("plotly.express") # Loaded on the first chart, not on every cold start
+go = lazy_import("plotly.graph_objects")
 
 # --- Setup Logging for the dashboard ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -16,7 +31,6 @@ dashboard_logger = logging.getLogger(__name__)
 # --- Configuration & Constants ---
 DPP_DB_FILE = "study_data.db" # Database for DPP logs (from dpp_logger.py)
 PLANNER_DB_FILE = "study_data.db" # Database for Study Planner tasks (from study_planner.py)
-QUOTE_FILE = "quotes.txt"
 
 # --- Streamlit Page Configuration (MUST BE THE VERY FIRST STREAMLIT COMMAND) ---
 # Explicitly set theme to dark and remove default menu/footer for a cleaner look
@@ -33,324 +47,19 @@ st.set_page_config(
     }
 )
 
-# --- Custom CSS for a Futuristic, Dark, and Neon Aesthetic (ONLY DARK MODE) ---
-st.markdown(
-    """
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;700&display=swap');
-    @import url('https://fonts.googleapis.com/css2?family=Share+Tech+Mono&display=swap');
-
-    /* Ensure html and body take full height and prevent scrollbars */
-    html, body {
-        height: 100%;
-        margin: 0;
-        padding: 0;
-        overflow-x: hidden; /* Prevent horizontal scrollbar */
-    }
-
-    /* CSS Variables for a consistent Neon Dark Theme */
-    :root {
-        --neon-blue: #00F0FF;          /* Primary neon highlight */
-        --neon-purple: #9D00FF;        /* Secondary neon highlight */
-        --neon-green: #39FF14;         /* Tertiary neon for success/alerts */
-        --neon-orange: #FF9900;        /* Warning/pending status neon */
-        --neon-yellow: #FFD700;        /* Accent glow */
-
-        --dark-bg-deep: #05050A;       /* Very dark background for the page */
-        --dark-bg-gradient-start: #1A0033; /* Dark purple for gradient */
-        --dark-bg-gradient-end: #000A1A;   /* Dark blue for gradient */
-        --card-bg: #1B1B25;            /* Background for cards and components */
-        --sidebar-bg: #101015;         /* Slightly different dark for sidebar */
-
-        --text-primary: #E0E0FF;       /* Light, slightly blue-ish text */
-        --text-secondary: #A0A0B0;     /* Greyish text for descriptions */
-        --border-color: #303040;       /* Subtle dark border */
-        --divider-color: #202028;      /* Even darker for dividers */
-    }
-
-    /* Apply dark background to the entire page */
-    body {
-        background: linear-gradient(135deg, var(--dark-bg-gradient-start), var(--dark-bg-deep), var(--dark-bg-gradient-end));
-        background-attachment: fixed; /* Ensures gradient covers full background without scrolling */
-        color: var(--text-primary);
-        font-family: 'Share Tech Mono', monospace; /* Monospaced for futuristic feel */
-        line-height: 1.6;
-    }
-
-    /* Ensure Streamlit app container is transparent to show body background */
-    .stApp {
-        background-color: transparent;
-    }
-
-    /* Headers with Orbitron font and neon glow */
-    h1, h2, h3, h4, h5, h6 {
-        font-family: 'Orbitron', sans-serif;
-        color: var(--neon-blue);
-        text-shadow: 0 0 8px var(--neon-blue), 0 0 15px rgba(0, 240, 255, 0.4); /* Stronger neon glow */
-        margin-top: 1.5em;
-        margin-bottom: 0.8em;
-        letter-spacing: 0.05em; /* Add slight spacing */
-    }
-    h1 { font-size: 2.8em; }
-    h2 { font-size: 2.2em; }
-    h3 { font-size: 1.8em; }
-
-    /* Streamlit components styling */
-    .stSidebar {
-        background-color: var(--sidebar-bg);
-        border-right: 1px solid var(--border-color);
-        padding-top: 2rem;
-        box-shadow: 2px 0 15px rgba(0, 240, 255, 0.3); /* Stronger glow */
-    }
-
-    .stButton>button {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep); /* Dark text on bright button */
-        border-radius: 8px;
-        padding: 0.8em 1.5em; /* Larger padding */
-        font-size: 1.05em;
-        font-weight: 700;
-        transition: all 0.3s ease-in-out;
-        border: none;
-        box-shadow: 0 0 10px var(--neon-blue), 0 0 20px rgba(0, 240, 255, 0.6); /* Pronounced glow */
-        text-transform: uppercase;
-        font-family: 'Orbitron', sans-serif;
-    }
-    .stButton>button:hover {
-        background-color: var(--neon-purple); /* Change color on hover */
-        box-shadow: 0 0 15px var(--neon-purple), 0 0 25px rgba(157, 0, 255, 0.7); /* Change glow color */
-        transform: translateY(-4px) scale(1.03); /* More pronounced lift and scale */
-    }
-    .stButton>button[kind="secondary"] {
-        background-color: var(--card-bg);
-        color: var(--neon-blue);
-        border: 1px solid var(--neon-blue);
-        box-shadow: 0 0 7px rgba(0, 240, 255, 0.2);
-    }
-    .stButton>button[kind="secondary"]:hover {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        transform: none; /* No lift for secondary hover */
-        box-shadow: 0 0 10px var(--neon-blue), 0 0 20px rgba(0, 240, 255, 0.6);
-    }
-
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 15px; /* Increased gap */
-        justify-content: center;
-        border-bottom: 2px solid var(--divider-color); /* Subtle divider */
-    }
-
-    .stTabs [data-baseweb="tab"] {
-        height: 60px; /* Taller tabs */
-        background-color: var(--card-bg);
-        border-radius: 10px 10px 0 0;
-        padding: 15px 30px;
-        transition: all 0.3s ease-in-out;
-        font-weight: 700;
-        color: var(--text-secondary);
-        border: 1px solid var(--border-color);
-        border-bottom: none;
-        text-transform: uppercase;
-        font-family: 'Orbitron', sans-serif;
-        box-shadow: 0 -3px 10px rgba(0, 240, 255, 0.1); /* Subtle top glow */
-    }
-    .stTabs [data-baseweb="tab"]:hover {
-        background-color: #2A2A3A;
-        color: var(--neon-blue);
-        box-shadow: 0 -3px 12px var(--neon-blue), 0 -3px 25px rgba(0, 240, 255, 0.5);
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        border-bottom: 5px solid var(--neon-blue);
-        border-top: 2px solid var(--neon-blue);
-        box-shadow: 0 0 20px var(--neon-blue), 0 0 35px rgba(0, 240, 255, 0.8);
-        transform: translateY(-3px); /* More pronounced lift */
-    }
-
-    .stMetric {
-        background-color: var(--card-bg);
-        padding: 2rem; /* More padding */
-        border-radius: 18px; /* More rounded */
-        border: 1px solid var(--border-color);
-        box-shadow: 0 0 12px rgba(157, 0, 255, 0.2); /* Purple glow for metrics */
-        margin-bottom: 2rem;
-        transition: transform 0.4s ease-in-out, box-shadow 0.4s ease-in-out;
-        text-align: center;
-    }
-    .stMetric:hover {
-        transform: translateY(-10px); /* Greater lift */
-        box-shadow: 0 0 20px var(--neon-purple), 0 0 30px rgba(157, 0, 255, 0.6);
-    }
-    .stMetric>div>div:first-child { /* Metric label */
-        color: var(--text-secondary);
-        font-size: 1.15em;
-        font-family: 'Share Tech Mono', monospace;
-        margin-bottom: 0.5em;
-    }
-    .stMetric>div>div:nth-child(2) { /* Metric value */
-        color: var(--neon-yellow); /* Gold/Yellow for main value */
-        font-size: 3em; /* Much larger value */
-        font-family: 'Orbitron', sans-serif;
-        text-shadow: 0 0 8px var(--neon-yellow), 0 0 15px rgba(255, 215, 0, 0.6);
-        line-height: 1; /* Adjust line height */
-    }
-    .stMetric>div>div:last-child { /* Metric delta */
-        color: var(--neon-green); /* Green for positive deltas */
-        font-size: 1em;
-        font-weight: bold;
-    }
-
-
-    .stAlert {
-        border-radius: 12px;
-        font-size: 1em;
-        margin-bottom: 1.8rem;
-        background-color: var(--card-bg);
-        border: 1px solid;
-        color: var(--text-primary);
-        box-shadow: 0 0 10px rgba(0, 240, 255, 0.15);
-        padding: 1rem 1.5rem;
-    }
-    .stAlert.st-emotion-cache-1f81n9p { /* Streamlit success alert */
-        background-color: #0A251E; /* Dark emerald */
-        color: var(--neon-green);
-        border-color: var(--neon-green);
-        box-shadow: 0 0 12px rgba(57, 255, 20, 0.4);
-    }
-    .stAlert.st-emotion-cache-1f81n9p p { color: var(--neon-green); } /* Text within success alert */
-
-    .stAlert.st-emotion-cache-1j0080z { /* Streamlit error alert */
-        background-color: #330000; /* Dark red */
-        color: #FF4B4B;
-        border-color: #FF4B4B;
-        box-shadow: 0 0 12px rgba(255, 75, 75, 0.4);
-    }
-    .stAlert.st-emotion-cache-1j0080z p { color: #FF4B4B; } /* Text within error alert */
-
-    .stAlert.st-emotion-cache-1e74g6b { /* Streamlit warning alert */
-        background-color: #332000; /* Dark orange */
-        color: var(--neon-orange);
-        border-color: var(--neon-orange);
-        box-shadow: 0 0 12px rgba(255, 153, 0, 0.4);
-    }
-    .stAlert.st-emotion-cache-1e74g6b p { color: var(--neon-orange); } /* Text within warning alert */
-
-    /* Input widgets styling */
-    .stTextInput>div>div>input, .stSelectbox>div>div>div>div, .stTextArea>div>div, .stNumberInput>div>div>input {
-        background-color: #2A2A3A; /* Darker input background */
-        border: 1px solid var(--border-color);
-        border-radius: 8px;
-        color: var(--text-primary);
-        padding: 0.7em 1em;
-        font-size: 0.95em;
-        box-shadow: inset 0 0 5px rgba(0, 240, 255, 0.1); /* Inner glow */
-        transition: all 0.2s ease;
-    }
-    .stTextInput>div>div>input:focus, .stSelectbox>div>div>div>div:focus, .stTextArea>div>div:focus-within, .stNumberInput>div>div>input:focus {
-        border-color: var(--neon-blue);
-        box-shadow: inset 0 0 8px var(--neon-blue), 0 0 5px var(--neon-blue); /* Stronger focus glow */
-        outline: none;
-    }
+# --- Render Profiling ---
+rerun_section = begin_rerun("app") # Stopped at the end of the script; see profiler.py
+start_metrics() # Prometheus exporter (see metrics.py); also marks this session as active
 
-    /* Slider styling */
-    .stSlider>div>div>div:nth-child(1) { /* Track background */
-        background: var(--border-color);
-    }
-    .stSlider>div>div>div:nth-child(2) { /* Filled track */
-        background: var(--neon-blue);
-    }
-    .stSlider [data-testid="stThumbValue"] { /* Value label above thumb */
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        border-radius: 5px;
-        padding: 2px 8px;
-        font-weight: bold;
-    }
-
-    /* Dataframe styling */
-    .stDataFrame {
-        border: 1px solid var(--border-color);
-        border-radius: 12px;
-        overflow: hidden;
-        box-shadow: 0 0 15px rgba(0, 240, 255, 0.1);
-    }
-
-    .stDataFrame .ag-header-cell-label {
-        color: var(--neon-blue); /* Header text color */
-        font-family: 'Orbitron', sans-serif;
-        font-size: 0.9em;
-        text-transform: uppercase;
-    }
-    .stDataFrame .ag-theme-streamlit {
-        --ag-background-color: var(--card-bg);
-        --ag-odd-row-background-color: #20202A; /* Slightly lighter for odd rows */
-        --ag-row-hover-background-color: #303040;
-        --ag-border-color: var(--divider-color);
-        --ag-data-color: var(--text-primary);
-        --ag-font-family: 'Share Tech Mono', monospace;
-        --ag-selected-row-background-color: #003344; /* Darker blue when selected */
-    }
-
-    /* Information boxes */
-    .stAlert.st-emotion-cache-12fmw13 { /* Streamlit info alert */
-        background-color: #101525;
-        color: var(--neon-blue);
-        border-color: var(--neon-blue);
-        box-shadow: 0 0 12px rgba(0, 240, 255, 0.4);
-    }
-    .stAlert.st-emotion-cache-12fmw13 p { color: var(--neon-blue); }
-
-    /* Markdown elements */
-    p {
-        color: var(--text-primary);
-    }
-    a {
-        color: var(--neon-blue);
-        text-decoration: none;
-    }
-    a:hover {
-        text-decoration: underline;
-    }
-
-    /* Centering content within columns */
-    .st-emotion-cache-ocqkz7 {
-        display: flex;
-        flex-direction: column;
-        align-items: center;
-        text-align: center;
-    }
-    .st-emotion-cache-ocqkz7 .stMetric {
-        width: 100%; /* Ensure metric takes full width of its column */
-    }
-
-    /* General containers/blocks */
-    .st-emotion-cache-h5rg5t, .st-emotion-cache-10qadwd, .st-emotion-cache-1p1fspc { /* These are common Streamlit containers */
-        background-color: var(--card-bg);
-        padding: 2rem;
-        border-radius: 15px;
-        border: 1px solid var(--border-color);
-        box-shadow: 0 0 15px rgba(157, 0, 255, 0.15); /* Soft purple glow for general cards */
-        margin-bottom: 2rem;
-    }
-
-    /* Specific adjustments for plotly charts to match theme */
-    .js-plotly-plot {
-        border-radius: 12px;
-        overflow: hidden;
-        box-shadow: 0 0 15px rgba(0, 240, 255, 0.15);
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+# --- Custom CSS for a Futuristic, Dark, and Neon Aesthetic (ONLY DARK MODE) ---
+apply_theme() # Shared, minified stylesheet with self-hosted fonts (see theme/)
 
 # --- Database Connection Context Manager ---
 @contextmanager
 def get_db_connection(db_file):
     conn = None
     try:
-        conn = sqlite3.connect(db_file, check_same_thread=False)
+        conn = traced_connect(db_file, check_same_thread=False)
         conn.row_factory = sqlite3.Row  # This allows accessing columns by name
         yield conn
     except sqlite3.Error as e:
@@ -362,89 +71,91 @@ def get_db_connection(db_file):
 
 # --- Data Loading Functions ---
 
-@st.cache_data(ttl=300) # Cache for 5 minutes
+@cache_resource
+def ensure_database_schemas():
+    """Creates or migrates the dashboard databases once per process, before anything reads them."""
+    for db_file in sorted({DPP_DB_FILE, PLANNER_DB_FILE, MOCK_DB_FILE}): # The mock test database is attached for cross-source views
+        with get_db_connection(db_file) as conn:
+            if conn is not None:
+                ensure_schema(conn, db_file)
+    ensure_legacy_import(MOCK_DB_FILE) # Old cognitive_assessments rows join the mock tests (see legacy_import.py)
+    return True
+
+ensure_database_schemas() # The loaders below expect epoch-day INTEGER dates (see db_schema.py)
+
+# Both datasets are fetched together on a small thread pool (see dashboard_data.py). The first
+# session starts that load in the background, so it overlaps with drawing the page.
+prewarm_dashboard_data(DPP_DB_FILE, PLANNER_DB_FILE)
+start_backup_schedule(sorted({DPP_DB_FILE, PLANNER_DB_FILE})) # Daily rotated backups while the dashboard server runs
+start_archive_schedule(list(DATABASES)) # Daily move of cold rows into per-year archive files (see archive.py)
+
+@profiled("app/load_dpp_logs")
 def load_dpp_logs_from_db():
     """Loads DPP logs from the database."""
-    if not os.path.exists(DPP_DB_FILE):
-        dashboard_logger.warning(f"DPP log database file '{DPP_DB_FILE}' not found.")
-        return pd.DataFrame() # Return empty DataFrame if DB doesn't exist
-    try:
-        with get_db_connection(DPP_DB_FILE) as conn:
-            df = pd.read_sql("SELECT * FROM dpp_log ORDER BY Date DESC, ID DESC", conn)
-            if not df.empty:
-                df['Date'] = pd.to_datetime(df['Date']).dt.date
-                df['Time_Taken'] = pd.to_numeric(df['Time_Taken'], errors='coerce')
-                df['Accuracy'] = pd.to_numeric(df['Accuracy'], errors='coerce')
-            dashboard_logger.info(f"Loaded {len(df)} DPP logs.")
-            return df
-    except Exception as e:
-        dashboard_logger.error(f"Error loading DPP logs from '{DPP_DB_FILE}': {e}", exc_info=True)
-        st.warning(f"⚠️ Could not load DPP log data from '{DPP_DB_FILE}': {e}. Ensure the DPP Logger app has been run to create the DB.")
-        return pd.DataFrame()
-
-@st.cache_data(ttl=300) # Cache for 5 minutes
+    data = load_dashboard_data(DPP_DB_FILE, PLANNER_DB_FILE)
+    if "dpp_logs" in data["errors"]:
+        st.warning(f"⚠️ Could not load DPP log data from '{DPP_DB_FILE}': {data['errors']['dpp_logs']}. Ensure the DPP Logger app has been run to create the DB.")
+    return data["frames"]["dpp_logs"]
+
+@profiled("app/load_planner_tasks")
 def load_planner_tasks_from_db():
     """Loads study planner tasks from the database."""
-    if not os.path.exists(PLANNER_DB_FILE):
-        dashboard_logger.warning(f"Study Planner database file '{PLANNER_DB_FILE}' not found.")
-        return pd.DataFrame()
-    try:
-        with get_db_connection(PLANNER_DB_FILE) as conn:
-            cursor = conn.cursor()
-            # CHANGE 1: Change 'tasks' to 'study_tasks' for PRAGMA table_info
-            cursor.execute("PRAGMA table_info(study_tasks)")
-            columns_info = cursor.fetchall()
-            available_columns = [col[1] for col in columns_info]
-
-            # CHANGE 2: Update select_cols to match the actual columns in 'study_tasks'
-            # Based on study_planner.py, the primary columns are:
-            # ID, Subject, Topic, DueDate, Status, Priority, Notes, CreatedDate
-            select_cols = ['ID', 'Subject', 'Topic', 'DueDate', 'Status', 'Priority']
-
-            # Add optional columns if they exist in the table
-            if 'Notes' in available_columns:
-                select_cols.append('Notes')
-            if 'CreatedDate' in available_columns:
-                select_cols.append('CreatedDate')
-
-            query_cols = ", ".join(select_cols)
-            # CHANGE 3: Change 'FROM tasks' to 'FROM study_tasks' and 'ORDER BY deadline' to 'ORDER BY DueDate'
-            df = pd.read_sql_query(f"SELECT {query_cols} FROM study_tasks ORDER BY DueDate ASC", conn)
-
-            if not df.empty:
-                # Convert DueDate to date object
-                df['DueDate'] = pd.to_datetime(df['DueDate'], errors='coerce').dt.date
-                if 'CreatedDate' in df.columns:
-                    df['CreatedDate'] = pd.to_datetime(df['CreatedDate'], errors='coerce')
-            dashboard_logger.info(f"Loaded {len(df)} planner tasks.")
-            return df
-    except Exception as e:
-        dashboard_logger.error(f"Error loading Study Planner data from '{PLANNER_DB_FILE}': {e}", exc_info=True)
-        st.warning(f"⚠️ Could not load Study Planner data from '{PLANNER_DB_FILE}': {e}. Ensure the Study Planner app has been run to create the DB.")
-        return pd.DataFrame()
-
-@st.cache_data(ttl=300)
-def get_daily_quote():
-    """Reads a random quote from quotes.txt."""
-    if os.path.exists(QUOTE_FILE):
-        with open(QUOTE_FILE, 'r') as f:
-            quotes = [q.strip() for q in f if q.strip()]
-        if quotes:
-            return random.choice(quotes)
-    return "💡 Discipline is the bridge between goals and accomplishment." # Default quote
+    data = load_dashboard_data(DPP_DB_FILE, PLANNER_DB_FILE)
+    if "planner_tasks" in data["errors"]:
+        st.warning(f"⚠️ Could not load Study Planner data from '{PLANNER_DB_FILE}': {data['errors']['planner_tasks']}. Ensure the Study Planner app has been run to create the DB.")
+    return data["frames"]["planner_tasks"]
+
+@profiled("app/load_cross_source")
+def load_cross_source_from_db():
+    """Loads the DPP vs mock test views (joined inside SQLite across both databases; see unified_views.py)."""
+    data = load_dashboard_data(DPP_DB_FILE, PLANNER_DB_FILE)
+    for name in ("subject_performance", "weekly_activity"):
+        if name in data["errors"]:
+            st.warning(f"⚠️ Could not compare DPPs with mock tests from '{MOCK_DB_FILE}': {data['errors'][name]}.")
+            break
+    return data["frames"]["subject_performance"], data["frames"]["weekly_activity"]
+
+@cache_resource
+def get_quote_store(files_version):
+    """Loads the quote corpus once per process; `files_version` (file mtimes) reloads it after an edit."""
+    return QuoteStore.from_files()
+
+def quote_filters():
+    """Author/tag chosen in the quote settings popover ("Any" means no filter)."""
+    return {name: None if st.session_state.get(f"quote_{name}", "Any") == "Any" else st.session_state[f"quote_{name}"]
+            for name in ("author", "tag")}
+
+def show_next_quote():
+    """Replaces the quote of the day with the next one from the shuffled rotation."""
+    st.session_state["shown_quote"] = get_quote_store(quote_files_version()).next_quote(**quote_filters())
+
+def reset_shown_quote():
+    st.session_state.pop("shown_quote", None)
 
 # --- Main Dashboard UI ---
 
 st.title("🚀 Quantum Study Dashboard")
 st.markdown("Your centralized hub for DPP progress and study planning.")
 
-# Display Daily Quote
-st.info(f"**Today's Quantum Insight:** *\"{get_daily_quote()}\"*")
+# Display Daily Quote (the same for everyone on a given day, unless a filter or 🔀 is used)
+quote_store = get_quote_store(quote_files_version())
+quote_text, quote_author = st.session_state.get("shown_quote") or quote_store.daily_quote(**quote_filters())
+col_quote, col_quote_settings = st.columns([10, 1])
+with col_quote:
+    st.info(f"**Today's Quantum Insight:** *\"{quote_text}\"*" + (f" — {quote_author}" if quote_author else ""))
+with col_quote_settings:
+    with st.popover("💬", use_container_width=True):
+        st.selectbox("Theme", ["Any"] + quote_store.tags, key="quote_tag", on_change=reset_shown_quote)
+        st.selectbox("Author", ["Any"] + quote_store.authors, key="quote_author", on_change=reset_shown_quote)
+        st.button("🔀 Another Quote", on_click=show_next_quote, use_container_width=True)
 
 # Tabs for different sections
 tab1, tab2, tab3 = st.tabs(["📊 Performance Overview", "🗓️ Study Planner Snapshot", "⚙️ Data Management"])
 
-with tab1:
+@st.fragment
+@profiled("app/tab_overview")
+def render_overview_tab():
+    """Renders the Performance Overview tab."""
     st.header("📊 DPP Performance Overview")
     st.markdown("Track your Daily Practice Problems (DPP) progress and accuracy.")
 
@@ -486,7 +197,28 @@ with tab1:
         fig_dpp_trend.update_layout(title_x=0.5)
         st.plotly_chart(fig_dpp_trend, use_container_width=True)
 
-with tab2:
+        st.markdown("---")
+        st.subheader("🧪 DPPs vs Mock Tests")
+        subject_df, weekly_df = load_cross_source_from_db()
+        if subject_df.empty or not subject_df['Mock_Tests'].any():
+            st.info("No mock tests found. Log them in the Mock Log app to compare them with your DPP accuracy.")
+        else:
+            subject_df.columns = ['Subject', 'DPPs', 'DPP Accuracy', 'DPP Score', 'Mock Tests', 'Mock Score (%)']
+            st.dataframe(subject_df, use_container_width=True, hide_index=True)
+            fig_subjects = px.bar(subject_df.melt(id_vars='Subject', value_vars=['DPP Accuracy', 'Mock Score (%)'], var_name='Source', value_name='Percent'),
+                                  x='Subject', y='Percent', color='Source', barmode='group',
+                                  title='DPP Accuracy vs Mock Test Score by Subject', labels={'Percent': '%'})
+            fig_subjects.update_layout(title_x=0.5, yaxis_range=[0, 100])
+            st.plotly_chart(fig_subjects, use_container_width=True)
+            fig_weekly = px.line(weekly_df, x='Week', y=['DPP_Accuracy', 'Mock_Score_Pct'], markers=True,
+                                 title='Weekly DPP Accuracy vs Mock Test Score', labels={'value': '%', 'variable': 'Source'})
+            fig_weekly.update_layout(title_x=0.5)
+            st.plotly_chart(fig_weekly, use_container_width=True)
+
+@st.fragment
+@profiled("app/tab_planner_snapshot")
+def render_planner_snapshot_tab():
+    """Renders the Study Planner Snapshot tab."""
     st.header("🗓️ Study Planner Snapshot")
     st.markdown("Quick glance at your upcoming tasks, deadlines, and progress.")
 
@@ -505,11 +237,11 @@ with tab2:
             st.metric("Total Study Tasks", total_tasks)
         with col_plan2:
             # CHANGE 5: Update column reference from 'deadline' to 'DueDate' and 'status' to 'Status'
-            overdue_tasks_count = len(pending_tasks[pending_tasks['DueDate'] < date.today()])
+            overdue_tasks_count = len(pending_tasks[pending_tasks['DueDate'] < pd.Timestamp(date.today())])
             st.metric("Overdue Tasks", overdue_tasks_count)
         with col_plan3:
             # CHANGE 6: Update column reference from 'deadline' to 'DueDate' and 'status' to 'Status'
-            upcoming_tasks_count = len(planner_df[(planner_df['Status'] == 'Pending') & (planner_df['DueDate'] >= date.today())])
+            upcoming_tasks_count = len(planner_df[(planner_df['Status'] == 'Pending') & (planner_df['DueDate'] >= pd.Timestamp(date.today()))])
             st.metric("Upcoming Tasks", upcoming_tasks_count)
 
         st.markdown("---")
@@ -522,13 +254,27 @@ with tab2:
         fig_status_pie.update_layout(title_x=0.5)
         st.plotly_chart(fig_status_pie, use_container_width=True)
 
+        st.markdown("---")
+        st.subheader("🎯 What to Study Now")
+        next_up = get_task_queue(PLANNER_DB_FILE).peek(5) # Shared with the planner, which applies its edits to it
+        if not next_up:
+            st.info("Nothing queued. Every task is completed!")
+        else:
+            next_up_df = pd.DataFrame(next_up)
+            display_cols = [c for c in ['ID', 'Subject', 'Topic', 'DueDate', 'Priority', 'Status'] if c in next_up_df.columns]
+            st.dataframe(next_up_df[display_cols], use_container_width=True, hide_index=True)
+        reminder_service = get_reminder_service(PLANNER_DB_FILE)
+        next_reminder = reminder_service.next_due
+        if next_reminder:
+            st.caption(f"🔔 {reminder_service.pending} reminder(s) scheduled; next at {next_reminder.strftime('%Y-%m-%d %H:%M')}.")
+
         st.markdown("---")
         st.subheader("Upcoming Study Tasks (Next 7 Days)")
-        seven_days_from_now = date.today() + timedelta(days=7)
+        seven_days_from_now = pd.Timestamp(date.today() + timedelta(days=7))
         # CHANGE 7: Update column reference from 'deadline' to 'DueDate' and 'status' to 'Status'
         upcoming_df = planner_df[
             (planner_df['Status'] != 'Completed') &
-            (planner_df['DueDate'] >= date.today()) &
+            (planner_df['DueDate'] >= pd.Timestamp(date.today())) &
             (planner_df['DueDate'] <= seven_days_from_now)
         ].sort_values('DueDate')
 
@@ -540,29 +286,29 @@ with tab2:
             st.dataframe(upcoming_df[display_cols], use_container_width=True)
 
 
-with tab3:
+@st.fragment
+@profiled("app/tab_data_management")
+def render_data_management_tab():
+    """Renders the Data Management tab."""
     st.header("⚙️ Data Management & Support")
     st.markdown("Manage your application data, download backups, or perform resets.")
+    load_stats = load_dashboard_data(DPP_DB_FILE, PLANNER_DB_FILE)
+    st.caption("⏱️ Last data load: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in load_stats["timings"].items())
+               + f" (parallel wall time {load_stats['wall_seconds'] * 1000:.0f} ms)")
 
     st.subheader("Backup & Restore")
     st.info("Regularly back up your data to prevent loss.")
     col_backup, col_restore = st.columns(2)
     with col_backup:
-        if os.path.exists(DPP_DB_FILE):
-            with open(DPP_DB_FILE, "rb") as f:
-                st.download_button(
-                    label="📥 Download DPP Data (study_data.db)",
-                    data=f.read(),
-                    file_name="study_data_backup.db",
-                    mime="application/octet-stream",
-                    use_container_width=True
-                )
-        else:
-            st.error(f"DPP database file (`{DPP_DB_FILE}`) not found.")
+        # Online, compressed backups (see backups.py); nothing is read from the database until a button is clicked
+        render_backup_controls(DPP_DB_FILE, key="dpp_backup")
 
     with col_restore:
-        # Implement restore logic if desired (requires file uploader and DB overwrite)
-        st.warning("Restore functionality not yet implemented. Manual replacement of DB file is required.")
+        # Validated, migrated and swapped in atomically (see restore.py); the current data is backed up first
+        render_restore_controls()
+
+    st.subheader("🗄️ Archive")
+    render_archive_controls()
 
     st.markdown("---")
     st.subheader("Clear Application Data")
@@ -578,8 +324,8 @@ with tab3:
                         conn.execute("DELETE FROM dpp_log")
                         conn.commit()
                     st.success("✅ All DPP log data cleared successfully!")
-                    st.cache_data.clear() # Clear cache for DPP logs
-                    st.rerun()
+                    clear_caches(resource=False) # Clear cache for DPP logs
+                    rerun_page()
                 except Exception as e:
                     st.error(f"Failed to clear DPP log data: {e}. Ensure table 'dpp_log' exists.")
 
@@ -596,8 +342,10 @@ with tab3:
                         # conn.execute("DELETE FROM badges") # This table is not created by study_planner.py or dpp_logger.py
                         conn.commit()
                     st.success("✅ All Study Planner data cleared successfully!")
-                    st.cache_data.clear() # Clear cache for planner tasks
-                    st.rerun()
+                    clear_caches(resource=False) # Clear cache for planner tasks
+                    reload_task_queue(PLANNER_DB_FILE) # Empty the queue built from the old tasks
+                    get_reminder_service(PLANNER_DB_FILE).clear_tasks()
+                    rerun_page()
                 except Exception as e:
                     st.error(f"Failed to clear Study Planner data: {e}. Ensure table 'study_tasks' exists.")
                     # Original message was too specific to non-existent tables:
@@ -605,4 +353,21 @@ with tab3:
 
     st.markdown("---")
     st.subheader("💬 Quotes Management")
-    st.info("To add or change daily motivation quotes, please edit the `quotes.txt` file directly in the application's folder. Each quote should be on a new line for proper parsing.")
\ No newline at end of file
+    st.info("To add or change daily motivation quotes, edit `quotes.csv` (columns `Author`, `Quote` and optionally `Tags`, separated by `;`) "
+            "or `quotes.txt` (one quote per line) in the application's folder. Changes are picked up on the next page load.")
+    quote_store = get_quote_store(quote_files_version())
+    st.caption(f"{len(quote_store)} quotes from {len(quote_store.authors)} authors · "
+               + ", ".join(f"{tag} {count}" for tag, count in quote_store.tag_counts().items()))
+
+# Each tab is a fragment, so interacting with one tab doesn't recompute the others.
+with tab1:
+    render_overview_tab()
+with tab2:
+    render_planner_snapshot_tab()
+with tab3:
+    render_data_management_tab()
+
+render_profiler_panel()
+render_sql_trace_panel()
+render_cache_panel()
+rerun_section.stop()
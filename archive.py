@@ -0,0 +1,272 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from cache_telemetry import clear_caches
+from db_pool import get_read_pool
+from db_schema import DATABASES, database_tables, decode_dates, ensure_schema, from_epoch_day, migrate, table_columns, to_epoch_day
+from profiler import rerun_page
+from sql_trace import traced_connect
+
+# --- Setup Logging ---
+archive_logger = logging.getLogger(__name__)
+
+# --- Archive Configuration ---
+ARCHIVE_DIR = os.environ.get("AISCHEDULER_ARCHIVE_DIR", "archive")
+ARCHIVE_AFTER_DAYS = int(os.environ.get("AISCHEDULER_ARCHIVE_AFTER_DAYS", "365")) # Rows dated further back than this leave the hot tables
+LOCK_TIMEOUT = 30 # Seconds to wait for in-flight writers before giving up on a year
+SCHEDULE_INTERVAL_HOURS = 24
+# Cold rows of each table: (date column, extra condition). Open tasks stay hot however old they are.
+ARCHIVE_POLICIES = {
+    "dpp_log": ("Date", None),
+    "study_tasks": ("DueDate", "Status = 'Completed'"),
+    "mock_test_results": ("assessment_date", None),
+}
+HISTORY_SUFFIX = "_all" # TEMP view over a hot table and its archived years, e.g. dpp_log_all
+
+_archive_lock = threading.Lock()
+_schedule_started = threading.Event()
+
+
+# --- Archive Files ---
+# One file per database and year (e.g. archive/study_data_2024.db), with the same tables and schema version.
+
+def archive_path(db_file, year):
+    stem = os.path.splitext(os.path.basename(db_file))[0]
+    return os.path.join(ARCHIVE_DIR, f"{stem}_{year}.db")
+
+
+def list_archives(db_file):
+    """Returns {year: path} of a database's archive files, oldest first."""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return {}
+    pattern = re.compile(rf"^{re.escape(os.path.splitext(os.path.basename(db_file))[0])}_(\d{{4}})\.db$")
+    archives = {}
+    for name in os.listdir(ARCHIVE_DIR):
+        match = pattern.match(name)
+        if match:
+            archives[int(match.group(1))] = os.path.join(ARCHIVE_DIR, name)
+    return dict(sorted(archives.items()))
+
+
+def _open_archive(db_file, year):
+    """Creates (or migrates) a year's archive file so its tables match the live schema."""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = archive_path(db_file, year)
+    conn = traced_connect(path, timeout=LOCK_TIMEOUT)
+    try:
+        migrate(conn, database_tables(db_file))
+    finally:
+        conn.close()
+    return path
+
+
+# --- Archiving ---
+
+def _cold_filter(table):
+    column, condition = ARCHIVE_POLICIES[table]
+    return f'"{column}" >= ? AND "{column}" < ?' + (f" AND {condition}" if condition else "")
+
+
+def _cold_years(conn, table, cutoff_day):
+    """Years that have cold rows; sparse history doesn't open (and create) an archive for every year in between."""
+    column, condition = ARCHIVE_POLICIES[table]
+    rows = conn.execute(f"""SELECT DISTINCT CAST(strftime('%Y', "{column}" * 86400, 'unixepoch') AS INTEGER) FROM "{table}" """
+                        f'WHERE "{column}" < ?' + (f" AND {condition}" if condition else ""), (cutoff_day,))
+    return [row[0] for row in rows]
+
+
+def _move_rows(conn, table, schema, start_day, end_day):
+    """Copies a day range of cold rows into an attached archive, then deletes the ones that landed there.
+
+    A row whose key is already taken in the archive by a *different* row (e.g. after restoring an
+    older backup) is left in the hot table rather than dropped. Returns (moved, kept).
+    """
+    columns = table_columns(conn, table)
+    names = [name for name, *_ in columns]
+    keys = [name for name, _, _, _, pk in columns if pk] or names
+    column_list = ", ".join(f'"{name}"' for name in names)
+    where = _cold_filter(table)
+    candidates = conn.execute(f'SELECT COUNT(*) FROM main."{table}" WHERE {where}', (start_day, end_day)).fetchone()[0]
+    if not candidates:
+        return 0, 0
+    archived = {name for name, *_ in table_columns(conn, table, schema=schema)}
+    for name, declared_type, *_ in columns:
+        if name not in archived: # Legacy columns kept by the version-2 rebuild aren't in the DDL the archive was created from
+            conn.execute(f'ALTER TABLE {schema}."{table}" ADD COLUMN "{name}" {declared_type}'.rstrip())
+    conn.execute(f'INSERT OR IGNORE INTO {schema}."{table}" ({column_list}) SELECT {column_list} FROM main."{table}" WHERE {where}',
+                 (start_day, end_day))
+    same_key = " AND ".join(f'a."{name}" = main."{table}"."{name}"' for name in keys)
+    same_row = " AND ".join(f'a."{name}" IS main."{table}"."{name}"' for name in names)
+    before = conn.total_changes
+    conn.execute(f'DELETE FROM main."{table}" WHERE {where} AND EXISTS (SELECT 1 FROM {schema}."{table}" AS a WHERE {same_key} AND {same_row})',
+                 (start_day, end_day))
+    moved = conn.total_changes - before
+    return moved, candidates - moved
+
+
+def archive_database(db_file, horizon_days=ARCHIVE_AFTER_DAYS, today=None):
+    """Moves a database's cold rows (older than `horizon_days`) into per-year archive files.
+
+    Each year is moved in one transaction spanning the live database and that year's archive,
+    and a rerun only deletes rows already archived unchanged, so an interrupted run never loses
+    a row. Freed pages are reused by new rows, which keeps the hot file from growing.
+    Returns a report dict.
+    """
+    started = time.perf_counter()
+    cutoff_day = to_epoch_day((today or date.today()) - timedelta(days=horizon_days))
+    moved, kept = {}, {}
+    with _archive_lock: # One archiving run at a time; they share the attach alias
+        conn = traced_connect(db_file, timeout=LOCK_TIMEOUT)
+        try:
+            ensure_schema(conn, db_file) # Cold rows are selected by epoch-day ranges
+            tables = [table for table in database_tables(db_file) if table in ARCHIVE_POLICIES]
+            years = sorted({year for table in tables for year in _cold_years(conn, table, cutoff_day)})
+            for year in years:
+                start_day = to_epoch_day(date(year, 1, 1))
+                end_day = min(to_epoch_day(date(year + 1, 1, 1)), cutoff_day)
+                conn.execute("ATTACH DATABASE ? AS archive", (_open_archive(db_file, year),))
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        for table in tables:
+                            year_moved, year_kept = _move_rows(conn, table, "archive", start_day, end_day)
+                            if year_moved:
+                                moved.setdefault(year, {})[table] = year_moved
+                            if year_kept:
+                                kept.setdefault(year, {})[table] = year_kept
+                        conn.commit()
+                    except sqlite3.Error:
+                        conn.rollback()
+                        raise
+                finally:
+                    conn.execute("DETACH DATABASE archive")
+        finally:
+            conn.close()
+    seconds = time.perf_counter() - started
+    total = sum(sum(counts.values()) for counts in moved.values())
+    if total or kept:
+        archive_logger.info(f"Archived {total} row(s) of {db_file} older than {from_epoch_day(cutoff_day)} in {seconds * 1000:.0f} ms: {moved}"
+                            + (f"; kept {kept} hot (key already used by a different archived row)" if kept else ""))
+    return {"db_file": db_file, "cutoff": from_epoch_day(cutoff_day), "moved": moved, "kept": kept, "seconds": seconds}
+
+
+def start_archive_schedule(db_files, interval_hours=SCHEDULE_INTERVAL_HOURS):
+    """Starts (once per process) a daemon thread that archives each database's cold rows daily."""
+    if _schedule_started.is_set():
+        return
+    _schedule_started.set()
+
+    def run():
+        while True:
+            for db_file in db_files:
+                if not os.path.exists(db_file):
+                    continue
+                try:
+                    archive_database(db_file)
+                except (OSError, sqlite3.Error) as e:
+                    archive_logger.error(f"Scheduled archiving of {db_file} failed: {e}")
+            time.sleep(interval_hours * 3600)
+
+    threading.Thread(target=run, name="db-archive", daemon=True).start()
+
+
+# --- History Reads ---
+
+def _quoted(name):
+    return f'"{name}"'
+
+
+def _main_file(conn):
+    return next(path for _, name, path in conn.execute("PRAGMA database_list") if name == "main")
+
+
+def attach_archives(conn, db_file=None):
+    """ATTACHes a database's archive files to a connection and (re)creates TEMP `<table>_all` views.
+
+    Each view is the hot table UNION ALL every attached year, so history queries read like
+    queries on the table itself. Attachments persist for the connection's lifetime; later calls
+    only attach new years. Returns the attached years.
+    """
+    db_file = db_file or _main_file(conn)
+    archives = list_archives(db_file)
+    if not archives:
+        return []
+    attached = {name for _, name, _ in conn.execute("PRAGMA database_list")}
+    others = sum(1 for name in attached if name not in ("main", "temp") and not name.startswith("archive_"))
+    limit = max(conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - others, 0) # SQLite caps attached databases (10 by default)
+    years = list(archives)[-limit:] if limit else [] # The newest years win
+    if len(years) < len(archives):
+        archive_logger.warning(f"Only the newest {len(years)} of {len(archives)} archives of {db_file} can be attached.")
+    added = [year for year in years if f"archive_{year}" not in attached]
+    for year in added:
+        conn.execute(f"ATTACH DATABASE ? AS archive_{year}", (archives[year],))
+    tables = [table for table in database_tables(db_file) if table in ARCHIVE_POLICIES]
+    views = {name for (name,) in conn.execute("SELECT name FROM temp.sqlite_master WHERE type = 'view'")}
+    if added or any(f"{table}{HISTORY_SUFFIX}" not in views for table in tables):
+        for table in tables:
+            names = [name for name, *_ in table_columns(conn, table)]
+            selects = [f'SELECT {", ".join(_quoted(name) for name in names)} FROM main."{table}"']
+            for year in years:
+                archived = {name for name, *_ in table_columns(conn, table, schema=f"archive_{year}")}
+                # An archive written before a column was added reads it as NULL
+                selects.append(f"SELECT {', '.join(_quoted(name) if name in archived else 'NULL AS ' + _quoted(name) for name in names)} "
+                               f'FROM archive_{year}."{table}"')
+            conn.execute(f'DROP VIEW IF EXISTS temp."{table}{HISTORY_SUFFIX}"')
+            conn.execute(f'CREATE TEMP VIEW "{table}{HISTORY_SUFFIX}" AS {" UNION ALL ".join(selects)}')
+    return years
+
+
+def history_table(conn, table):
+    """Name to read a table's full history from on this connection: `<table>_all` when there are archives, else the table."""
+    return f"{table}{HISTORY_SUFFIX}" if attach_archives(conn) else table
+
+
+def load_history(db_file, table, columns=None, where=None, params=(), order_by=None, prepare=None):
+    """Loads the rows of a table, hot and archived, for long-range analytics.
+
+    `prepare` types the frame like the page's snapshot loader does; by default only the dates are decoded.
+    """
+    conn = get_read_pool(db_file).connection()
+    source = history_table(conn, table)
+    select = ", ".join(f'"{column}"' for column in columns) if columns else "*"
+    df = pd.read_sql(f'SELECT {select} FROM "{source}"' + (f" WHERE {where}" if where else "") + (f" ORDER BY {order_by}" if order_by else ""),
+                     conn, params=params)
+    return prepare(df) if prepare else decode_dates(df, table)
+
+
+# --- Streamlit Controls ---
+
+def render_archive_controls():
+    """Lists each database's archive files and archives cold rows on demand."""
+    report = st.session_state.pop("archive_report", None)
+    if report:
+        moved = sum(sum(counts.values()) for result in report for counts in result["moved"].values())
+        cutoff = date.today() - timedelta(days=ARCHIVE_AFTER_DAYS)
+        st.success(f"✅ Archived {moved} row(s) dated before {cutoff:%Y-%m-%d}.")
+        kept = [f"{result['db_file']} {year}: {counts}" for result in report for year, counts in result["kept"].items()]
+        if kept:
+            st.warning("Some rows stayed in the live tables because an archived row already uses their ID: " + "; ".join(kept))
+    st.caption(f"Completed tasks, DPPs and mock tests dated more than {ARCHIVE_AFTER_DAYS} days ago are moved daily into "
+               f"per-year files in `{ARCHIVE_DIR}/`. Analytics can include them with **Include archived years**.")
+    for db_file in DATABASES:
+        archives = list_archives(db_file)
+        if archives:
+            st.caption(f"`{db_file}`: " + " · ".join(f"{year} ({os.path.getsize(path) / 1024:.0f} KiB)" for year, path in archives.items()))
+    if st.button("🗄️ Archive Old Rows Now", key="archive_button", use_container_width=True):
+        try:
+            with st.spinner("Archiving..."):
+                report = [archive_database(db_file) for db_file in DATABASES if os.path.exists(db_file)]
+            clear_caches(resource=False) # Cached frames still hold the archived rows
+            st.session_state["archive_report"] = report
+            rerun_page()
+        except (OSError, sqlite3.Error) as e:
+            archive_logger.error(f"Archiving failed: {e}", exc_info=True)
+            st.error(f"🚨 Archiving failed; the year being moved was rolled back. {e}")
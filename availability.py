@@ -0,0 +1,250 @@
+import sqlite3
+import logging
+from datetime import date, datetime, time, timedelta
+
+# --- Setup Logging ---
+availability_logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+BLOCK_KINDS = ["Class", "Coaching", "Self Study", "Other"]
+WEEKDAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+DEFAULT_DAY_START = time(6, 0) # Earliest time a study slot is suggested
+DEFAULT_DAY_END = time(22, 0) # Latest time a study slot may end
+TIME_FORMAT = "%H:%M"
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_MONDAY = date(1969, 12, 29) # Week buckets start on Mondays
+
+
+def to_minutes(moment):
+    """Converts a naive datetime to integer minutes since the epoch."""
+    return int((moment - _EPOCH).total_seconds() // 60)
+
+
+def from_minutes(minutes):
+    """Converts integer minutes since the epoch back to a datetime."""
+    return _EPOCH + timedelta(minutes=int(minutes))
+
+
+class IntervalTree:
+    """Static augmented interval tree over half-open [start, end) integer intervals.
+
+    Intervals are kept sorted by start in an implicit balanced BST (the middle of
+    each index range is its root). Each root stores the maximum end of its range,
+    so overlap queries prune whole subtrees and run in O(log n + k).
+    """
+
+    def __init__(self, intervals):
+        items = sorted(intervals, key=lambda iv: (iv[0], iv[1]))
+        self._starts = [iv[0] for iv in items]
+        self._ends = [iv[1] for iv in items]
+        self._payloads = [iv[2] for iv in items]
+        self._max_end = [0] * len(items)
+        self._build(0, len(items))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def _build(self, lo, hi):
+        """Fills the max-end augmentation for the index range [lo, hi)."""
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        max_end = self._ends[mid]
+        for child_max in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child_max is not None and child_max > max_end:
+                max_end = child_max
+        self._max_end[mid] = max_end
+        return max_end
+
+    def overlaps(self, start, end):
+        """Returns all (start, end, payload) intervals overlapping [start, end), ordered by start."""
+        found = []
+        self._collect(0, len(self._starts), start, end, found)
+        return found
+
+    def _collect(self, lo, hi, start, end, found):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self._max_end[mid] <= start:
+            return # Nothing in this range ends after the query starts
+        self._collect(lo, mid, start, end, found)
+        if self._starts[mid] >= end:
+            return # This interval and everything to its right start too late
+        if self._ends[mid] > start:
+            found.append((self._starts[mid], self._ends[mid], self._payloads[mid]))
+        self._collect(mid + 1, hi, start, end, found)
+
+
+class AvailabilityCalendar:
+    """Busy-time calendar built from availability rules.
+
+    Recurring rules are expanded lazily, one week at a time, the first time a
+    query touches that week; each week gets its own IntervalTree.
+    """
+
+    def __init__(self, rules):
+        self._rules = list(rules)
+        self._weeks = {}
+
+    @property
+    def rules(self):
+        return self._rules
+
+    @classmethod
+    def from_db(cls, conn):
+        """Builds a calendar from the availability table."""
+        return cls(load_availability_rules(conn))
+
+    def _week_tree(self, week):
+        tree = self._weeks.get(week)
+        if tree is None:
+            week_start = _EPOCH_MONDAY + timedelta(weeks=week)
+            tree = IntervalTree(self._expand(week_start, week_start + timedelta(days=6)))
+            self._weeks[week] = tree
+        return tree
+
+    def _expand(self, first_day, last_day):
+        """Yields (start, end, label) blocks of every rule falling between two dates (inclusive)."""
+        for rule in self._rules:
+            start_day = max(first_day, rule["StartDate"])
+            end_day = min(last_day, rule["EndDate"])
+            day = start_day
+            while day <= end_day:
+                if rule["Weekdays"] is None or day.weekday() in rule["Weekdays"]:
+                    yield (to_minutes(datetime.combine(day, rule["StartTime"])),
+                           to_minutes(datetime.combine(day, rule["EndTime"])),
+                           rule["Label"])
+                day += timedelta(days=1)
+
+    def busy(self, start, end):
+        """Returns (start, end, label) busy blocks overlapping [start, end) as datetimes."""
+        lo, hi = to_minutes(start), to_minutes(end)
+        blocks = []
+        for week in range((start.date() - _EPOCH_MONDAY).days // 7, (end.date() - _EPOCH_MONDAY).days // 7 + 1):
+            blocks.extend(self._week_tree(week).overlaps(lo, hi))
+        return [(from_minutes(s), from_minutes(e), label) for s, e, label in blocks]
+
+    def is_free(self, start, end):
+        """Returns True when [start, end) does not overlap any busy block."""
+        return not self.busy(start, end)
+
+    def free_slots(self, day, day_start=DEFAULT_DAY_START, day_end=DEFAULT_DAY_END, min_minutes=30):
+        """Returns the (start, end) free gaps of at least min_minutes on a day."""
+        cursor = datetime.combine(day, day_start)
+        window_end = datetime.combine(day, day_end)
+        slots = []
+        for block_start, block_end, _ in self.busy(cursor, window_end):
+            if block_start - cursor >= timedelta(minutes=min_minutes):
+                slots.append((cursor, block_start))
+            cursor = max(cursor, block_end)
+        if window_end - cursor >= timedelta(minutes=min_minutes):
+            slots.append((cursor, window_end))
+        return slots
+
+
+def suggest_task_slots(calendar, tasks, start_day, days=7, task_minutes=60,
+                       day_start=DEFAULT_DAY_START, day_end=DEFAULT_DAY_END, earliest=None):
+    """Greedily places tasks (in the given order) into the earliest free slots of the next few days.
+
+    Slots starting before the optional `earliest` datetime are trimmed (e.g. the past part of today).
+    """
+    suggestions = []
+    pending = list(tasks)
+    for offset in range(days):
+        if not pending:
+            break
+        for slot_start, slot_end in calendar.free_slots(start_day + timedelta(days=offset), day_start, day_end, task_minutes):
+            if earliest is not None:
+                slot_start = max(slot_start, earliest)
+            while pending and slot_end - slot_start >= timedelta(minutes=task_minutes):
+                task = pending.pop(0)
+                suggestions.append({**task, "SlotStart": slot_start, "SlotEnd": slot_start + timedelta(minutes=task_minutes)})
+                slot_start += timedelta(minutes=task_minutes)
+    return suggestions
+
+# --- Database Functions ---
+
+def create_availability_table(conn):
+    """Creates the availability table if it doesn't already exist."""
+    if conn is None:
+        return False
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS availability (
+                ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                Label TEXT NOT NULL,
+                Kind TEXT NOT NULL,
+                StartDate TEXT NOT NULL,
+                EndDate TEXT NOT NULL,
+                StartTime TEXT NOT NULL,
+                EndTime TEXT NOT NULL,
+                Weekdays TEXT, -- Comma-separated weekday numbers (Mon=0); NULL for a one-off block
+                Notes TEXT
+            );
+        """)
+        conn.commit()
+        availability_logger.info("Availability table ensured.")
+        return True
+    except sqlite3.Error:
+        availability_logger.exception("Failed to create availability table.")
+        return False
+
+
+def load_availability_rules(conn):
+    """Loads availability rules as dicts with parsed dates, times and weekday sets."""
+    if conn is None:
+        return []
+    try:
+        rows = conn.execute("""
+            SELECT ID, Label, Kind, StartDate, EndDate, StartTime, EndTime, Weekdays, Notes
+            FROM availability ORDER BY StartDate ASC, StartTime ASC;
+        """).fetchall()
+    except sqlite3.Error:
+        availability_logger.exception("Failed to load availability rules.")
+        return []
+    rules = []
+    for row in rows:
+        rules.append({
+            "ID": row[0], "Label": row[1], "Kind": row[2],
+            "StartDate": date.fromisoformat(row[3]), "EndDate": date.fromisoformat(row[4]),
+            "StartTime": datetime.strptime(row[5], TIME_FORMAT).time(),
+            "EndTime": datetime.strptime(row[6], TIME_FORMAT).time(),
+            "Weekdays": {int(d) for d in row[7].split(",")} if row[7] else None,
+            "Notes": row[8],
+        })
+    return rules
+
+
+def insert_availability_block(conn, label, kind, start_date, end_date, start_time, end_time, weekdays, notes=""):
+    """Inserts a one-off (no weekdays) or weekly recurring busy block."""
+    if conn is None:
+        return False
+    try:
+        conn.execute("""
+            INSERT INTO availability (Label, Kind, StartDate, EndDate, StartTime, EndTime, Weekdays, Notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+        """, (label, kind, str(start_date), str(end_date if weekdays else start_date),
+              start_time.strftime(TIME_FORMAT), end_time.strftime(TIME_FORMAT),
+              ",".join(str(d) for d in sorted(weekdays)) if weekdays else None, notes))
+        conn.commit()
+        availability_logger.info(f"Inserted availability block: {label} ({kind})")
+        return True
+    except sqlite3.Error:
+        availability_logger.exception("Failed to insert availability block.")
+        return False
+
+
+def delete_availability_block(conn, block_id):
+    """Deletes an availability rule by its ID."""
+    if conn is None:
+        return False
+    try:
+        conn.execute("DELETE FROM availability WHERE ID = ?", (block_id,))
+        conn.commit()
+        availability_logger.info(f"Deleted availability block ID: {block_id}")
+        return True
+    except sqlite3.Error:
+        availability_logger.exception("Failed to delete availability block.")
+        return False
@@ -0,0 +1,153 @@
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import streamlit as st
+
+from exports import render_file_download
+
+# --- Setup Logging ---
+backup_logger = logging.getLogger(__name__)
+
+# --- Backup Configuration ---
+BACKUP_DIR = os.environ.get("AISCHEDULER_BACKUP_DIR", "backups")
+KEEP_BACKUPS = 10 # Newest compressed backups kept per database; older ones are deleted
+PAGES_PER_STEP = 256 # Pages copied per backup step; writers can commit between steps
+STEP_SLEEP = 0.005 # Seconds yielded to other connections between steps
+SCHEDULE_INTERVAL_HOURS = 24 # Automatic backup cadence (only when the database changed since the last one)
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+_backup_lock = threading.Lock()
+_schedule_started = threading.Event()
+
+
+def _backup_pattern(db_file):
+    stem = re.escape(os.path.splitext(os.path.basename(db_file))[0])
+    return re.compile(rf"^{stem}_(\d{{8}}_\d{{6}})\.db\.gz$")
+
+
+def list_backups(db_file):
+    """Returns the compressed backups of a database, newest first."""
+    if not os.path.isdir(BACKUP_DIR):
+        return []
+    pattern = _backup_pattern(db_file)
+    backups = []
+    for name in os.listdir(BACKUP_DIR):
+        match = pattern.match(name)
+        if match:
+            path = os.path.join(BACKUP_DIR, name)
+            backups.append({"path": path, "file_name": name, "bytes": os.path.getsize(path),
+                            "created": datetime.strptime(match.group(1), TIMESTAMP_FORMAT)})
+    return sorted(backups, key=lambda b: b["created"], reverse=True)
+
+
+def rotate_backups(db_file, keep=KEEP_BACKUPS):
+    """Deletes all but the newest `keep` backups of a database. Returns how many were removed."""
+    expired = list_backups(db_file)[keep:]
+    for backup in expired:
+        os.remove(backup["path"])
+    if expired:
+        backup_logger.info(f"Rotated out {len(expired)} old backup(s) of {db_file}.")
+    return len(expired)
+
+
+def create_backup(db_file, keep=KEEP_BACKUPS):
+    """Takes a consistent online backup of a database into a gzip-compressed, timestamped file.
+
+    sqlite3's backup API copies PAGES_PER_STEP pages at a time and restarts if a writer
+    changes the database mid-copy, so the result is always a consistent snapshot and writers
+    are only blocked for a single step. The copy is integrity-checked before it is compressed.
+    """
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(db_file))[0]
+    with _backup_lock: # One backup at a time; they share the staging file
+        stamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+        staging_path = os.path.join(BACKUP_DIR, f".{stem}.staging.db")
+        final_path = os.path.join(BACKUP_DIR, f"{stem}_{stamp}.db.gz")
+        started = time.perf_counter()
+        source = sqlite3.connect(f"file:{os.path.abspath(db_file)}?mode=ro", uri=True)
+        target = sqlite3.connect(staging_path)
+        try:
+            source.backup(target, pages=PAGES_PER_STEP, sleep=STEP_SLEEP)
+            check = target.execute("PRAGMA quick_check").fetchone()[0]
+            if check != "ok":
+                raise sqlite3.DatabaseError(f"Backup of {db_file} failed its integrity check: {check}")
+            page_count = target.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            target.close()
+            source.close()
+        try:
+            with open(staging_path, "rb") as f_in, gzip.open(f"{final_path}.tmp", "wb", compresslevel=6) as f_out:
+                shutil.copyfileobj(f_in, f_out, length=1024 * 1024) # Streamed, 1 MiB at a time
+            os.replace(f"{final_path}.tmp", final_path)
+        finally:
+            os.remove(staging_path)
+        seconds = time.perf_counter() - started
+    rotate_backups(db_file, keep)
+    size = os.path.getsize(final_path)
+    backup_logger.info(f"Backed up {db_file} ({page_count} pages) to {final_path} ({size / 1024:.1f} KiB) in {seconds * 1000:.0f} ms.")
+    return {"path": final_path, "file_name": os.path.basename(final_path), "bytes": size, "pages": page_count, "seconds": seconds}
+
+
+def backup_if_changed(db_file, max_age_hours=SCHEDULE_INTERVAL_HOURS):
+    """Backs up a database if it changed since its newest backup and that backup is older than max_age_hours."""
+    if not os.path.exists(db_file):
+        return None
+    backups = list_backups(db_file)
+    if backups:
+        newest = backups[0]
+        modified = datetime.fromtimestamp(os.path.getmtime(db_file))
+        if modified <= newest["created"] or (datetime.now() - newest["created"]).total_seconds() < max_age_hours * 3600:
+            return None
+    return create_backup(db_file)
+
+
+def start_backup_schedule(db_files, interval_hours=SCHEDULE_INTERVAL_HOURS):
+    """Starts (once per process) a daemon thread that keeps a recent backup of each database."""
+    if _schedule_started.is_set():
+        return
+    _schedule_started.set()
+
+    def run():
+        while True:
+            for db_file in db_files:
+                try:
+                    backup_if_changed(db_file, interval_hours)
+                except (OSError, sqlite3.Error) as e:
+                    backup_logger.error(f"Scheduled backup of {db_file} failed: {e}")
+            time.sleep(3600) # Check hourly; backup_if_changed decides whether one is due
+
+    threading.Thread(target=run, name="db-backup", daemon=True).start()
+
+
+def render_backup_controls(db_file, key):
+    """Shows the latest backups of a database with on-demand backup and download buttons."""
+    if not os.path.exists(db_file):
+        st.error(f"Database file (`{db_file}`) not found.")
+        return
+    if st.button(f"💾 Back Up {os.path.basename(db_file)} Now", key=f"{key}_create", use_container_width=True):
+        try:
+            with st.spinner("Backing up..."):
+                result = create_backup(db_file)
+            st.success(f"✅ Backup created: {result['file_name']} ({result['bytes'] / 1024:.1f} KiB, {result['seconds'] * 1000:.0f} ms)")
+        except (OSError, sqlite3.Error) as e:
+            backup_logger.error(f"Backup of {db_file} failed: {e}", exc_info=True)
+            st.error(f"🚨 Backup failed: {e}")
+    backups = list_backups(db_file)
+    if not backups:
+        st.caption(f"No backups yet. A backup is also taken automatically every {SCHEDULE_INTERVAL_HOURS} h when the data changes.")
+        return
+    by_path = {b["path"]: b for b in backups}
+    selected = by_path[st.selectbox("Available Backups", list(by_path), key=f"{key}_select",
+                                    format_func=lambda p: f"{by_path[p]['created']:%Y-%m-%d %H:%M:%S} · {by_path[p]['bytes'] / 1024:.1f} KiB")]
+    # The file is read only in the rerun where it was asked for; the button is gone on the next one
+    if st.button("📥 Get Download Link", key=f"{key}_download", use_container_width=True) and os.path.exists(selected["path"]):
+        render_file_download(selected["path"], selected["file_name"],
+                             "application/gzip" if selected["file_name"].endswith(".gz") else "application/vnd.sqlite3", key=f"{key}_file")
+        st.caption("To restore it, choose it under Existing backup in the restore panel.")
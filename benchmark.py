@@ -0,0 +1,415 @@
+"""Benchmark suite for the study dashboard's data paths.
+
+Seeds synthetic semester workloads (study_tasks, dpp_log, mock_test_results) into
+temporary SQLite databases, times the loaders, filters, aggregations and
+scheduling steps at each size, and compares the medians against a JSON baseline.
+
+    python benchmark.py                       # compare against benchmark_baseline.json (created on first run)
+    python benchmark.py --sizes 1000 10000    # quicker run on the smaller workloads
+    python benchmark.py --update-baseline     # accept the current timings as the new baseline
+
+Exits with status 1 when any case is slower than its baseline by more than the tolerance.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import snapshots
+from db_schema import DATABASES, migrate
+from loaders import read_dpp_logs, read_mock_test_results, read_study_tasks
+from reminders import MemorySink, ReminderService
+from review_scheduler import create_review_state_table, load_due_reviews, rebuild_review_state
+from study_allocator import allocate_study_hours, domain_priorities
+from task_queue import TaskQueue
+
+# --- Setup Logging ---
+benchmark_logger = logging.getLogger(__name__)
+
+# --- Benchmark Configuration ---
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_SEED = 42
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25 # Allowed slowdown over the baseline (25%)
+MIN_REGRESSION_SECONDS = 0.005 # Differences below this are timer noise, never a regression
+BASELINE_FILE = "benchmark_baseline.json"
+
+SEMESTER_START = date(2025, 7, 1)
+SEMESTER_DAYS = 182
+AS_OF = SEMESTER_START + timedelta(days=SEMESTER_DAYS // 2) # "Today" halfway through the semester
+
+# --- Synthetic Workload Model ---
+# Subject mixes and chapter lists follow a typical JEE preparation semester.
+DPP_SUBJECTS = {"Physics": 0.32, "Chemistry": 0.30, "Maths": 0.30, "Biology": 0.03, "Others": 0.05}
+PLANNER_SUBJECTS = {"Physics": 0.28, "Chemistry": 0.27, "Maths": 0.28, "Biology": 0.04, "Computer Science": 0.03, "General": 0.10}
+SUBJECT_ACCURACY = {"Physics": 62, "Chemistry": 70, "Maths": 58, "Biology": 75, "Others": 65, "General": 65, "Computer Science": 72}
+CHAPTERS = {
+    "Physics": ["Kinematics", "Laws of Motion", "Work Energy Power", "Rotational Motion", "Gravitation", "Fluids",
+                "Thermodynamics", "Oscillations", "Waves", "Electrostatics", "Current Electricity", "Magnetism",
+                "EMI", "Ray Optics", "Wave Optics", "Modern Physics"],
+    "Chemistry": ["Mole Concept", "Atomic Structure", "Chemical Bonding", "Thermodynamics", "Equilibrium",
+                  "Electrochemistry", "Kinetics", "Periodic Table", "Coordination Compounds", "p-Block",
+                  "GOC", "Hydrocarbons", "Alcohols Phenols Ethers", "Carbonyl Compounds", "Amines", "Biomolecules"],
+    "Maths": ["Quadratic Equations", "Sequences and Series", "Permutations", "Binomial Theorem", "Matrices",
+              "Complex Numbers", "Functions", "Limits", "Differentiation", "AOD", "Integration",
+              "Differential Equations", "Straight Lines", "Circles", "Conics", "Vectors 3D", "Probability"],
+    "Biology": ["Cell Biology", "Genetics", "Human Physiology", "Plant Physiology", "Ecology"],
+    "Computer Science": ["Python Basics", "Data Structures", "SQL"],
+    "Others": ["Aptitude", "Reasoning", "General Knowledge"],
+    "General": ["Revision", "Mock Analysis", "Formula Sheet"],
+}
+MOCK_DOMAINS = [
+    "Physics: Mechanics (Kinematics, Laws of Motion, Work, Energy, Power, Rotational Motion)",
+    "Physics: Electrodynamics (Electrostatics, Current, Magnetism, EMI, AC)",
+    "Physics: Modern Physics (Dual Nature, Atoms, Nuclei, Semiconductors)",
+    "Chemistry: Physical Chemistry (Stoichiometry, States of Matter, Thermodynamics, Equilibrium, Electrochemistry, Kinetics)",
+    "Chemistry: Organic Chemistry (Basic Principles, Hydrocarbons, Oxygen/Nitrogen/Halogen Compounds, Biomolecules, Polymers)",
+    "Mathematics: Algebra (Complex Numbers, Quadratic Eq, Seq & Series, Perm & Comb, Binomial, Matrices, Determinants)",
+    "Mathematics: Calculus (Functions, Limits, Continuity, Differentiability, AOD, Integrals, Diff Eq, Area)",
+    "Mathematics: Coordinate Geometry (Straight Lines, Circles, Conics)",
+    "General Aptitude & Logical Reasoning (IAT/NEST Specific)",
+    "Full Syllabus Mock Test (JEE Mains Pattern)",
+]
+EXAM_MAX_MARKS = {"JEE Mains": 300, "JEE Advanced": 360, "IAT": 240, "NEST": 240, "Other": 100}
+EXAM_MIX = {"JEE Mains": 0.55, "JEE Advanced": 0.25, "IAT": 0.08, "NEST": 0.07, "Other": 0.05}
+
+
+def _choice(rng, weights, n):
+    """Draws n labels from a {label: probability} mapping."""
+    labels = np.array(list(weights))
+    probs = np.array(list(weights.values()), dtype=float)
+    return labels[rng.choice(len(labels), size=n, p=probs / probs.sum())]
+
+
+def _chapters(rng, subjects):
+    """Draws a chapter for every subject, favouring the early chapters of each syllabus."""
+    chapters = np.empty(len(subjects), dtype=object)
+    for subject, names in CHAPTERS.items():
+        mask = subjects == subject
+        weights = 1.0 / np.arange(1, len(names) + 1) ** 0.5
+        chapters[mask] = np.array(names, dtype=object)[rng.choice(len(names), size=mask.sum(), p=weights / weights.sum())]
+    return chapters
+
+
+def _semester_days(rng, n):
+    """Draws day offsets into the semester, busier towards exams and lighter on Sundays."""
+    days = np.minimum((rng.triangular(0, SEMESTER_DAYS, SEMESTER_DAYS, size=n)).astype(int), SEMESTER_DAYS - 1)
+    sundays = (pd.Timestamp(SEMESTER_START) + pd.to_timedelta(days, unit="D")).dayofweek == 6
+    days[sundays & (rng.random(n) < 0.5)] -= 1 # Half of Sunday work slips to Saturday
+    return np.maximum(days, 0)
+
+
+def _iso_dates(days):
+    return (pd.Timestamp(SEMESTER_START) + pd.to_timedelta(days, unit="D")).strftime("%Y-%m-%d").tolist()
+
+
+def generate_dpp_log(rng, n):
+    """Returns n synthetic dpp_log rows."""
+    subjects = _choice(rng, DPP_SUBJECTS, n)
+    base_accuracy = np.array([SUBJECT_ACCURACY[s] for s in subjects])
+    accuracy = np.clip(rng.normal(base_accuracy, 15), 0, 100).round().astype(int)
+    score = np.clip(accuracy + rng.normal(0, 8, size=n), 0, 100).round().astype(int)
+    time_taken = np.clip(rng.lognormal(np.log(35), 0.4, size=n), 5, 180).round().astype(int)
+    return list(zip(_iso_dates(_semester_days(rng, n)), subjects.tolist(), _chapters(rng, subjects).tolist(),
+                    [f"DPP-{i + 1}" for i in range(n)], score.tolist(), accuracy.tolist(), time_taken.tolist(),
+                    [""] * n))
+
+
+def generate_study_tasks(rng, n):
+    """Returns n synthetic study_tasks rows; tasks due before AS_OF are mostly completed."""
+    subjects = _choice(rng, PLANNER_SUBJECTS, n)
+    chapters = _chapters(rng, subjects)
+    due_days = _semester_days(rng, n)
+    created_days = np.maximum(due_days - rng.integers(1, 22, size=n), 0)
+    priorities = _choice(rng, {"High": 0.3, "Medium": 0.5, "Low": 0.2}, n)
+    past = due_days < (AS_OF - SEMESTER_START).days
+    statuses = np.where(past, _choice(rng, {"Completed": 0.85, "Pending": 0.08, "Deferred": 0.07}, n),
+                        _choice(rng, {"Pending": 0.65, "In Progress": 0.2, "Deferred": 0.05, "Completed": 0.1}, n))
+    topics = [f"{chapter} - Set {i + 1}" for i, chapter in enumerate(chapters)]
+    return list(zip(subjects.tolist(), topics, _iso_dates(due_days), priorities.tolist(), statuses.tolist(),
+                    [""] * n, _iso_dates(created_days)))
+
+
+def generate_mock_test_results(rng, n):
+    """Returns n synthetic mock_test_results rows in the Mock Log page's schema."""
+    exam_types = _choice(rng, EXAM_MIX, n)
+    domains = np.array(MOCK_DOMAINS, dtype=object)[rng.integers(0, len(MOCK_DOMAINS), size=n)]
+    max_marks = np.array([EXAM_MAX_MARKS[e] for e in exam_types])
+    percentage = np.clip(rng.normal(58, 16, size=n), 0, 100)
+    total_questions = (max_marks // 4).astype(int)
+    attempted = (total_questions * rng.uniform(0.6, 1.0, size=n)).astype(int)
+    correct = np.minimum((attempted * percentage / 100 * 1.1).astype(int), attempted)
+    section = max_marks / 3 * percentage / 100
+    date_strs = _iso_dates(_semester_days(rng, n))
+    return list(zip(
+        [f"bench-{i}" for i in range(n)], [1] * n, date_strs, exam_types.tolist(),
+        [f"Mock {i % 50 + 1}" for i in range(n)], domains.tolist(), total_questions.tolist(), attempted.tolist(),
+        correct.tolist(), (attempted - correct).tolist(), section.round(1).tolist(), section.round(1).tolist(),
+        section.round(1).tolist(), [0.0] * n, (max_marks * percentage / 100).round().astype(int).tolist(),
+        max_marks.tolist(), np.clip(percentage * 1.5, 0, 99.9).round(2).tolist(), rng.integers(1, 200000, size=n).tolist(),
+        (max_marks * 0.7).tolist(), _choice(rng, {"Easy": 0.2, "Medium": 0.5, "Hard": 0.3}, n).tolist(),
+        rng.integers(60, 181, size=n).tolist(), [""] * n, [""] * n, [f"{d}T10:00:00" for d in date_strs]))
+
+
+# --- Workload Databases ---
+# Rows are written with the legacy TEXT-date schema and then migrated (see db_schema.py), so the
+# benchmark also times the upgrade path and reads the same typed tables as the pages.
+
+def build_workload(directory, size, seed):
+    """Creates study_data.db and mock_data.db with `size` rows per table; returns their paths."""
+    rng = np.random.default_rng(seed)
+    study_db = os.path.join(directory, f"study_data_{size}.db")
+    mock_db = os.path.join(directory, f"mock_data_{size}.db")
+    with sqlite3.connect(study_db) as conn:
+        conn.executescript("""
+            CREATE TABLE dpp_log (
+                ID INTEGER PRIMARY KEY AUTOINCREMENT, Date TEXT NOT NULL, Subject TEXT NOT NULL,
+                Chapter TEXT NOT NULL, DPP_Number TEXT NOT NULL, Score INTEGER NOT NULL,
+                Accuracy INTEGER NOT NULL, Time_Taken INTEGER NOT NULL, Notes TEXT,
+                UNIQUE(Date, Subject, Chapter, DPP_Number)
+            );
+            CREATE TABLE study_tasks (
+                ID INTEGER PRIMARY KEY AUTOINCREMENT, Subject TEXT NOT NULL, Topic TEXT NOT NULL,
+                DueDate TEXT NOT NULL, Priority TEXT NOT NULL, Status TEXT NOT NULL, Notes TEXT,
+                CreatedDate TEXT NOT NULL, UNIQUE(Subject, Topic, DueDate)
+            );
+        """)
+        conn.executemany("INSERT INTO dpp_log (Date, Subject, Chapter, DPP_Number, Score, Accuracy, Time_Taken, Notes) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", generate_dpp_log(rng, size))
+        conn.executemany("INSERT INTO study_tasks (Subject, Topic, DueDate, Priority, Status, Notes, CreatedDate) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)", generate_study_tasks(rng, size))
+        conn.commit()
+        migrate(conn, DATABASES["study_data.db"])
+    with sqlite3.connect(mock_db) as conn:
+        conn.execute("""
+            CREATE TABLE mock_test_results (
+                id TEXT PRIMARY KEY, user_id INTEGER, assessment_date TEXT, exam_type TEXT, test_name TEXT,
+                domain TEXT, total_questions INTEGER, attempted INTEGER, correct INTEGER, wrong INTEGER,
+                physics_score REAL, chemistry_score REAL, maths_score REAL, biology_score REAL,
+                total_score INTEGER, max_score_possible INTEGER, percentile REAL, rank INTEGER,
+                target_score REAL, difficulty TEXT, time_taken_minutes INTEGER, feedback TEXT,
+                neural_signature TEXT, timestamp TEXT
+            )
+        """)
+        conn.executemany(f"INSERT INTO mock_test_results VALUES ({', '.join(['?'] * 24)})",
+                         generate_mock_test_results(rng, size))
+        conn.commit()
+        migrate(conn, DATABASES["cognisynth_data_rmj.db"])
+    return study_db, mock_db
+
+
+# --- Benchmark Cases ---
+# Each case mirrors what a page does on a rerun; `ctx` carries connections and loaded frames.
+# The loaders are the pages' own (see loaders.py): a plain call reads the Parquet snapshot, as a
+# rerun does; the *_rebuild cases first mark the database as changed, as a commit does, so the
+# snapshot is rebuilt from SQLite.
+
+def _touch(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        # Rewriting the header is a commit with no data change; it's a new data version all the same (see snapshots.commit_counter)
+        conn.execute(f"PRAGMA user_version = {conn.execute('PRAGMA user_version').fetchone()[0]}")
+    finally:
+        conn.close()
+
+
+def load_dpp_log(ctx):
+    return read_dpp_logs(ctx["study_db"])
+
+
+def load_study_tasks(ctx):
+    return read_study_tasks(ctx["study_db"])
+
+
+def load_mock_results(ctx):
+    return read_mock_test_results(ctx["mock_db"], user_id=1)
+
+
+def rebuild_dpp_log(ctx):
+    _touch(ctx["study_db"])
+    return load_dpp_log(ctx)
+
+
+def rebuild_study_tasks(ctx):
+    _touch(ctx["study_db"])
+    return load_study_tasks(ctx)
+
+
+def rebuild_mock_results(ctx):
+    _touch(ctx["mock_db"])
+    return load_mock_results(ctx)
+
+
+def filter_dpp(ctx):
+    df = ctx["dpp"]
+    start = pd.Timestamp(AS_OF - timedelta(days=30))
+    return df[df['Subject'].isin(["Physics", "Maths"]) & (df['Date'] >= start) & (df['Date'] <= pd.Timestamp(AS_OF))]
+
+
+def filter_overdue_tasks(ctx):
+    df = ctx["tasks"]
+    return df[(df['DueDate'] < pd.Timestamp(AS_OF)) & (df['Status'] != 'Completed')]
+
+
+def aggregate_dpp_subjects(ctx):
+    return ctx["dpp"].groupby('Subject').agg(
+        Avg_Score=('Score', 'mean'), Avg_Accuracy=('Accuracy', 'mean'),
+        Total_DPPs=('ID', 'count'), Avg_Time_Taken=('Time_Taken', 'mean'))
+
+
+def aggregate_dpp_weekly(ctx):
+    return ctx["dpp"].groupby(['Subject', pd.Grouper(key='Date', freq='W')])['Accuracy'].mean()
+
+
+def aggregate_mock_domains(ctx):
+    return domain_priorities(ctx["mock_df"], MOCK_DOMAINS, EXAM_MAX_MARKS)
+
+
+def task_queue_next_up(ctx):
+    return TaskQueue.from_frame(ctx["tasks"]).peek(5, today=AS_OF)
+
+
+def review_state_rebuild(ctx):
+    return rebuild_review_state(ctx["study"])
+
+
+def due_reviews(ctx):
+    return load_due_reviews(ctx["study"], AS_OF, 7)
+
+
+def study_hour_allocation(ctx):
+    return allocate_study_hours(ctx["mock_df"], MOCK_DOMAINS, EXAM_MAX_MARKS, weekly_hours=20.0)
+
+
+def reminder_load(ctx):
+    return ReminderService(ctx["study_db"], MemorySink()).load()
+
+
+CASES = [
+    ("load_dpp_log", load_dpp_log),
+    ("load_study_tasks", load_study_tasks),
+    ("load_mock_results", load_mock_results),
+    ("load_dpp_log_rebuild", rebuild_dpp_log),
+    ("load_study_tasks_rebuild", rebuild_study_tasks),
+    ("load_mock_results_rebuild", rebuild_mock_results),
+    ("filter_dpp", filter_dpp),
+    ("filter_overdue_tasks", filter_overdue_tasks),
+    ("aggregate_dpp_subjects", aggregate_dpp_subjects),
+    ("aggregate_dpp_weekly", aggregate_dpp_weekly),
+    ("aggregate_mock_domains", aggregate_mock_domains),
+    ("task_queue_next_up", task_queue_next_up),
+    ("review_state_rebuild", review_state_rebuild),
+    ("due_reviews", due_reviews),
+    ("study_hour_allocation", study_hour_allocation),
+    ("reminder_load", reminder_load),
+]
+
+
+def time_case(func, ctx, repeat):
+    """Returns the median wall time of `repeat` calls, in seconds, after one untimed warm-up call."""
+    func(ctx) # Keeps one-off costs such as lazy imports out of the timings
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(ctx)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def run_size(directory, size, seed, repeat):
+    """Builds one workload and returns {case: median seconds}."""
+    started = time.perf_counter()
+    study_db, mock_db = build_workload(directory, size, seed)
+    benchmark_logger.info(f"Seeded {size:,} rows per table in {time.perf_counter() - started:.1f}s.")
+    ctx = {"study_db": study_db, "mock_db": mock_db, "study": sqlite3.connect(study_db)}
+    try:
+        create_review_state_table(ctx["study"])
+        ctx["dpp"] = load_dpp_log(ctx)
+        ctx["tasks"] = load_study_tasks(ctx)
+        ctx["mock_df"] = load_mock_results(ctx)
+        results = {}
+        for name, func in CASES:
+            results[name] = round(time_case(func, ctx, repeat), 6)
+            print(f"  {size:>9,}  {name:<24} {results[name] * 1000:>10.2f} ms")
+        return results
+    finally:
+        ctx["study"].close()
+
+
+def compare(results, baseline, tolerance):
+    """Returns (size, case, baseline, current) for every case slower than the tolerance allows."""
+    regressions = []
+    for size, cases in results.items():
+        for name, current in cases.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            if current > previous * (1 + tolerance) and current - previous > MIN_REGRESSION_SECONDS:
+                regressions.append((size, name, previous, current))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the study dashboard's loaders, aggregations and schedulers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Rows per table for each workload.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per case (the median is kept).")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed for the synthetic workload generator.")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="JSON baseline to compare against.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown, e.g. 0.25 for 25%%.")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run's timings.")
+    parser.add_argument("--output", help="Also write this run's results to a JSON file.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    benchmark_logger.setLevel(logging.INFO)
+
+    directory = tempfile.mkdtemp(prefix="aischeduler-bench-")
+    snapshots.SNAPSHOT_DIR = os.path.join(directory, "snapshots") # Keeps the workload snapshots out of the app's
+    try:
+        results = {str(size): run_size(directory, size, args.seed, args.repeat) for size in args.sizes}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for size, name, previous, current in regressions:
+            print(f"  {int(size):>9,}  {name:<24} {previous * 1000:.2f} ms -> {current * 1000:.2f} ms ({current / previous - 1:+.0%})")
+        return 1
+    print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import timedelta
+
+import pandas as pd
+import streamlit as st
+
+# --- Setup Logging ---
+cache_logger = logging.getLogger(__name__)
+
+# --- Telemetry Configuration ---
+PROM_FILE = os.environ.get("AISCHEDULER_CACHE_METRICS_FILE", "cache_metrics.prom") # Read by node_exporter's textfile collector
+PROM_WRITE_INTERVAL = 15 # Seconds between rewrites of the Prometheus text file
+
+_caches = {}
+_registry_lock = threading.Lock()
+_export_lock = threading.Lock()
+_last_export = 0.0
+
+
+def estimate_size(value):
+    """Estimates the in-memory size of a cached value in bytes (DataFrames are measured deeply)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _ttl_seconds(ttl):
+    if isinstance(ttl, timedelta):
+        return ttl.total_seconds()
+    if isinstance(ttl, (int, float)):
+        return float(ttl)
+    return None
+
+
+def _entry_key(value):
+    """A cheap stand-in for Streamlit's argument hash, only computed on a miss."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return (type(value).__name__, value.shape, int(pd.util.hash_pandas_object(value, index=True).sum()))
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+class CacheStats:
+    """Hit/miss/eviction counters and live entry sizes for one cached function.
+
+    Streamlit only runs the wrapped function on a miss, so misses are counted there
+    and hits are the remaining successful calls. An entry that misses again while
+    still tracked was evicted by its TTL or by max_entries.
+    """
+
+    def __init__(self, name, kind, ttl):
+        self.name = name
+        self.kind = kind
+        self.ttl = _ttl_seconds(ttl)
+        self.calls = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clears = 0
+        self._entries = {} # key -> (created, bytes)
+        self._lock = threading.Lock()
+
+    def record_miss(self, key, result):
+        size = estimate_size(result)
+        with self._lock:
+            self.misses += 1
+            if key in self._entries:
+                self.evictions += 1
+            self._entries[key] = (time.monotonic(), size)
+
+    def record_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def record_clear(self):
+        with self._lock:
+            self.evictions += len(self._entries)
+            self.clears += 1
+            self._entries.clear()
+
+    def expire(self):
+        """Drops entries whose TTL has passed, counting them as evictions."""
+        if self.ttl is None:
+            return
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            expired = [key for key, (created, _) in self._entries.items() if created < cutoff]
+            for key in expired:
+                del self._entries[key]
+            self.evictions += len(expired)
+
+    def snapshot(self):
+        self.expire()
+        with self._lock:
+            hits = max(self.calls - self.misses, 0)
+            return {"cache": self.name, "kind": self.kind, "ttl_seconds": self.ttl, "calls": self.calls, "hits": hits,
+                    "misses": self.misses, "hit_ratio": round(hits / self.calls, 3) if self.calls else None,
+                    "evictions": self.evictions, "clears": self.clears, "entries": len(self._entries),
+                    "bytes": sum(size for _, size in self._entries.values())}
+
+
+def _register(func, kind, ttl):
+    source = inspect.getsourcefile(func) or func.__module__ # Pages all run as __main__, so name caches by file
+    name = f"{os.path.splitext(os.path.basename(source))[0]}.{func.__qualname__}"
+    with _registry_lock:
+        stats = _caches.get(name)
+        if stats is None:
+            stats = _caches[name] = CacheStats(name, kind, ttl) # Page scripts re-decorate on every rerun
+        return stats
+
+
+def _instrument(streamlit_decorator, kind, func, kwargs):
+    stats = _register(func, kind, kwargs.get("ttl"))
+    key_params = [name for name in inspect.signature(func).parameters if not name.startswith("_")]
+
+    @functools.wraps(func)
+    def counted(*args, **inner_kwargs):
+        result = func(*args, **inner_kwargs)
+        bound = inspect.signature(func).bind(*args, **inner_kwargs)
+        stats.record_miss(tuple(_entry_key(bound.arguments[p]) for p in key_params if p in bound.arguments), result)
+        return result
+
+    cached = streamlit_decorator(**kwargs)(counted)
+
+    @functools.wraps(func)
+    def wrapper(*args, **inner_kwargs):
+        result = cached(*args, **inner_kwargs)
+        stats.record_call()
+        _maybe_export()
+        return result
+
+    def clear(*args, **inner_kwargs):
+        cached.clear(*args, **inner_kwargs)
+        stats.record_clear()
+
+    wrapper.clear = clear
+    wrapper.stats = stats
+    return wrapper
+
+
+def cache_data(func=None, **kwargs):
+    """Drop-in for @st.cache_data that also records hits, misses, evictions and entry sizes."""
+    if func is not None:
+        return _instrument(st.cache_data, "data", func, kwargs)
+    return lambda f: _instrument(st.cache_data, "data", f, kwargs)
+
+
+def cache_resource(func=None, **kwargs):
+    """Drop-in for @st.cache_resource that also records hits, misses, evictions and entry sizes."""
+    if func is not None:
+        return _instrument(st.cache_resource, "resource", func, kwargs)
+    return lambda f: _instrument(st.cache_resource, "resource", f, kwargs)
+
+
+def clear_caches(data=True, resource=True):
+    """Clears Streamlit's data and/or resource caches, counting every tracked entry as evicted."""
+    kinds = {kind for kind, wanted in (("data", data), ("resource", resource)) if wanted}
+    if data:
+        st.cache_data.clear()
+    if resource:
+        st.cache_resource.clear()
+    with _registry_lock:
+        cleared = [stats for stats in _caches.values() if stats.kind in kinds]
+    for stats in cleared:
+        stats.record_clear()
+    cache_logger.info(f"Cleared {', '.join(sorted(kinds))} caches ({len(cleared)} tracked functions).")
+    _maybe_export(force=True)
+
+
+def cache_stats():
+    """Returns a snapshot of every tracked cache as a list of dicts."""
+    with _registry_lock:
+        caches = list(_caches.values())
+    return [stats.snapshot() for stats in caches]
+
+
+def prometheus_text():
+    """Formats the cache counters in the Prometheus text exposition format."""
+    metrics = [
+        ("calls_total", "counter", "Calls to a cached function.", "calls"),
+        ("hits_total", "counter", "Calls answered from the cache.", "hits"),
+        ("misses_total", "counter", "Calls that ran the function.", "misses"),
+        ("evictions_total", "counter", "Entries dropped by TTL, max_entries or an explicit clear.", "evictions"),
+        ("clears_total", "counter", "Explicit clears of the cache.", "clears"),
+        ("entries", "gauge", "Entries currently cached.", "entries"),
+        ("bytes", "gauge", "Estimated memory held by cached entries.", "bytes"),
+    ]
+    snapshot = cache_stats()
+    lines = []
+    for suffix, metric_type, help_text, field in metrics:
+        name = f"aischeduler_cache_{suffix}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+        lines += [f'{name}{{cache="{row["cache"]}",kind="{row["kind"]}"}} {row[field]}' for row in snapshot]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_textfile(path=PROM_FILE):
+    """Atomically rewrites the Prometheus text file, so a scraper never sees a partial file."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(prometheus_text())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        cache_logger.error(f"Failed to write cache metrics to {path}: {e}")
+
+
+def _maybe_export(force=False):
+    global _last_export
+    if not force and time.monotonic() - _last_export < PROM_WRITE_INTERVAL:
+        return
+    if not _export_lock.acquire(blocking=False): # Another thread is already writing
+        return
+    try:
+        _last_export = time.monotonic()
+        write_prometheus_textfile()
+    finally:
+        _export_lock.release()
+
+
+def render_cache_panel():
+    """Shows per-function cache hit rates and sizes in the sidebar (developer mode only)."""
+    from profiler import dev_mode_enabled # Imported lazily; only needed on this path
+    if not dev_mode_enabled():
+        return
+    with st.sidebar.expander("🧊 Cache Telemetry", expanded=False):
+        stats = pd.DataFrame(cache_stats())
+        if stats.empty:
+            st.caption("No cached functions called yet.")
+            return
+        st.dataframe(stats.drop(columns=["ttl_seconds"]), use_container_width=True, hide_index=True)
+        st.caption(f"Total cached: {stats['bytes'].sum() / 1024:.1f} KiB · exported to {PROM_FILE}")
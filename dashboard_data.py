@@ -0,0 +1,112 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from cache_telemetry import cache_data
+from db_pool import get_read_pool
+from db_schema import decode_dates
+from metrics import ROWS_LOADED
+from unified_views import MOCK_DB_FILE, create_unified_views, unified_attachments
+
+# --- Setup Logging ---
+dashboard_data_logger = logging.getLogger(__name__)
+
+# --- Loader Configuration ---
+MAX_WORKERS = 4 # One thread per dataset; threads (and their read connections) are reused across loads
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="dashboard-load")
+_prewarm_started = threading.Event()
+
+
+# --- Dataset Loaders ---
+# Each loader receives a read connection owned by the calling pool thread and returns a typed frame.
+
+def load_dpp_logs(conn):
+    """Loads the DPP log; the typed columns map straight to datetime64 and integer arrays."""
+    df = pd.read_sql("SELECT * FROM dpp_log ORDER BY Date DESC, ID DESC", conn)
+    ROWS_LOADED.inc(len(df), table="dpp_log")
+    return decode_dates(df, "dpp_log")
+
+
+def load_planner_tasks(conn):
+    """Loads the study planner tasks with datetime64 due and created dates."""
+    df = pd.read_sql_query("""
+        SELECT ID, Subject, Topic, DueDate, Status, Priority, Notes, CreatedDate
+        FROM study_tasks ORDER BY DueDate ASC
+    """, conn)
+    ROWS_LOADED.inc(len(df), table="study_tasks")
+    return decode_dates(df, "study_tasks")
+
+
+def load_subject_performance(conn):
+    """Per-subject DPP accuracy next to mock test subject scores, joined inside SQLite (see unified_views.py)."""
+    create_unified_views(conn)
+    df = pd.read_sql("SELECT * FROM subject_performance ORDER BY Subject", conn)
+    ROWS_LOADED.inc(len(df), table="subject_performance")
+    return df
+
+
+def load_weekly_activity(conn):
+    """DPPs and mock tests per week (Monday start), joined inside SQLite (see unified_views.py)."""
+    create_unified_views(conn)
+    df = pd.read_sql("SELECT * FROM weekly_activity ORDER BY Week", conn)
+    ROWS_LOADED.inc(len(df), table="weekly_activity")
+    df["Week"] = df["Week"].to_numpy(dtype="int64").astype("datetime64[D]").astype("datetime64[ns]")
+    return df
+
+
+def _timed_load(name, db_file, loader, attachments=None):
+    """Runs one loader on a pool thread; returns (name, frame, seconds, error)."""
+    started = time.perf_counter()
+    if not os.path.exists(db_file):
+        dashboard_data_logger.warning(f"Database file '{db_file}' for {name} not found.")
+        return name, pd.DataFrame(), 0.0, None
+    try:
+        df = loader(get_read_pool(db_file, attachments).connection())
+        return name, df, time.perf_counter() - started, None
+    except Exception as e:
+        dashboard_data_logger.error(f"Error loading {name} from '{db_file}': {e}", exc_info=True)
+        return name, pd.DataFrame(), time.perf_counter() - started, str(e)
+
+
+def load_datasets(datasets):
+    """Loads {name: (db_file, loader[, attachments])} datasets in parallel.
+
+    Returns a dict with the frames, per-dataset timings (seconds), errors and the
+    total wall time, which is roughly the slowest query rather than their sum.
+    """
+    started = time.perf_counter()
+    futures = [_executor.submit(_timed_load, name, *spec) for name, spec in datasets.items()]
+    frames, timings, errors = {}, {}, {}
+    for future in futures:
+        name, df, seconds, error = future.result()
+        frames[name], timings[name] = df, seconds
+        if error:
+            errors[name] = error
+    wall = time.perf_counter() - started
+    dashboard_data_logger.info(f"Loaded {len(frames)} dashboard datasets in {wall * 1000:.0f} ms "
+                               f"({', '.join(f'{n} {s * 1000:.0f} ms' for n, s in timings.items())}).")
+    return {"frames": frames, "timings": timings, "errors": errors, "wall_seconds": wall}
+
+
+@cache_data(ttl=300, show_spinner=False) # Cache for 5 minutes, like the per-page loaders
+def load_dashboard_data(dpp_db_file, planner_db_file, mock_db_file=MOCK_DB_FILE):
+    """Loads every dataset shown on the dashboard in one parallel pass."""
+    return load_datasets({
+        "dpp_logs": (dpp_db_file, load_dpp_logs),
+        "planner_tasks": (planner_db_file, load_planner_tasks),
+        "subject_performance": (dpp_db_file, load_subject_performance, unified_attachments(mock_db_file)),
+        "weekly_activity": (dpp_db_file, load_weekly_activity, unified_attachments(mock_db_file)),
+    })
+
+
+def prewarm_dashboard_data(dpp_db_file, planner_db_file):
+    """Starts filling the dashboard cache in the background, once per server process."""
+    if _prewarm_started.is_set():
+        return
+    _prewarm_started.set()
+    threading.Thread(target=load_dashboard_data, args=(dpp_db_file, planner_db_file),
+                     name="dashboard-prewarm", daemon=True).start()
@@ -0,0 +1,80 @@
+import logging
+import os
+import sqlite3
+import threading
+
+from sql_trace import traced_connect
+
+# --- Setup Logging ---
+pool_logger = logging.getLogger(__name__)
+
+
+class ReadPool:
+    """Per-thread, read-only SQLite connections to one database file.
+
+    Each thread lazily opens its own `mode=ro` connection and reuses it on later
+    calls, so parallel loaders never share a connection. drain() closes every
+    connection; threads transparently reconnect on their next call.
+    `attachments` ({schema: db_file}) are ATTACHed to every connection (read-only
+    too) so queries can join across files; files that don't exist yet are skipped.
+    """
+
+    def __init__(self, db_file, attachments=None):
+        self.db_file = os.path.abspath(db_file)
+        self.attachments = {schema: os.path.abspath(path) for schema, path in (attachments or {}).items()}
+        self._local = threading.local()
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def connection(self):
+        """Returns this thread's read connection, opening it if needed."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+        conn = traced_connect(f"file:{self.db_file}?mode=ro", uri=True, check_same_thread=False)
+        for schema, path in self.attachments.items():
+            if os.path.exists(path): # A URI too (the connection was opened with uri=True), so it can't be written through
+                conn.execute(f"ATTACH DATABASE ? AS {schema}", (f"file:{path}?mode=ro",))
+        with self._lock:
+            self._connections.add(conn)
+            self._local.conn, self._local.generation = conn, self._generation
+        pool_logger.debug(f"Opened read connection to {self.db_file} in {threading.current_thread().name}.")
+        return conn
+
+    def drain(self):
+        """Closes every pooled connection (e.g. before the database file is replaced)."""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+            self._generation += 1
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pool_logger.exception(f"Failed to close a read connection to {self.db_file}.")
+        pool_logger.info(f"Drained {len(connections)} read connection(s) to {self.db_file}.")
+        return len(connections)
+
+    def __len__(self):
+        return len(self._connections)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_read_pool(db_file, attachments=None):
+    """Returns the process-wide read pool for a database file (and set of attached files)."""
+    key = (os.path.abspath(db_file), tuple(sorted((schema, os.path.abspath(path)) for schema, path in (attachments or {}).items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ReadPool(db_file, attachments)
+        return pool
+
+
+def drain_pools():
+    """Closes the pooled connections of every database."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return sum(pool.drain() for pool in pools)
@@ -0,0 +1,367 @@
+import logging
+import os
+import sqlite3
+from datetime import date, datetime
+
+import numpy as np
+
+# --- Setup Logging ---
+schema_logger = logging.getLogger(__name__)
+
+# --- Schema Versioning ---
+# PRAGMA user_version of a database whose tables match the DDL below. Bump it (and add a
+# step to MIGRATIONS) whenever a table changes, so older databases can be brought forward.
+SCHEMA_VERSION = 2
+
+# --- Column Domains ---
+# Dates are stored as INTEGER days since 1970-01-01 and timestamps as INTEGER seconds since
+# 1970-01-01 00:00 (naive local time), so loaders map them to datetime64 without parsing.
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_EPOCH = datetime(1970, 1, 1)
+DPP_SUBJECTS = ("Physics", "Chemistry", "Maths", "Biology", "Others")
+TASK_SUBJECTS = ("Physics", "Chemistry", "Maths", "Biology", "Computer Science", "General")
+TASK_PRIORITIES = ("High", "Medium", "Low")
+TASK_STATUSES = ("Pending", "In Progress", "Completed", "Deferred")
+# STRICT tables need SQLite 3.37+; older libraries get the same columns and CHECKs without it.
+_STRICT = " STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else ""
+
+
+def _one_of(column, values):
+    return f"CHECK ({column} IN ({', '.join(repr(v) for v in values)}))"
+
+
+DPP_LOG_DDL = f"""
+    CREATE TABLE IF NOT EXISTS dpp_log (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        Date INTEGER NOT NULL, -- Epoch day
+        Subject TEXT NOT NULL {_one_of("Subject", DPP_SUBJECTS)},
+        Chapter TEXT NOT NULL,
+        DPP_Number TEXT NOT NULL,
+        Score INTEGER NOT NULL,
+        Accuracy INTEGER NOT NULL,
+        Time_Taken INTEGER NOT NULL,
+        Notes TEXT,
+        UNIQUE(Date, Subject, Chapter, DPP_Number)
+    ){_STRICT};
+"""
+
+STUDY_TASKS_DDL = f"""
+    CREATE TABLE IF NOT EXISTS study_tasks (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        Subject TEXT NOT NULL {_one_of("Subject", TASK_SUBJECTS)},
+        Topic TEXT NOT NULL,
+        DueDate INTEGER NOT NULL, -- Epoch day
+        Priority TEXT NOT NULL {_one_of("Priority", TASK_PRIORITIES)},
+        Status TEXT NOT NULL {_one_of("Status", TASK_STATUSES)},
+        Notes TEXT,
+        CreatedDate INTEGER NOT NULL, -- Epoch day
+        UNIQUE(Subject, Topic, DueDate)
+    ){_STRICT};
+"""
+
+MOCK_TEST_RESULTS_DDL = f"""
+    CREATE TABLE IF NOT EXISTS mock_test_results (
+        id TEXT PRIMARY KEY,
+        user_id INTEGER,
+        assessment_date INTEGER, -- Epoch day
+        exam_type TEXT, -- Added exam_type column
+        test_name TEXT, -- Added test_name column
+        domain TEXT,
+        total_questions INTEGER, -- Added total_questions
+        attempted INTEGER, -- Added attempted
+        correct INTEGER, -- Added correct
+        wrong INTEGER, -- Added wrong
+        physics_score REAL, -- Added physics_score
+        chemistry_score REAL, -- Added chemistry_score
+        maths_score REAL, -- Added maths_score
+        biology_score REAL, -- Added biology_score
+        total_score INTEGER,
+        max_score_possible INTEGER,
+        percentile REAL, -- Added percentile
+        rank INTEGER, -- Added rank
+        target_score REAL, -- Added target_score
+        difficulty TEXT,
+        time_taken_minutes INTEGER,
+        feedback TEXT,
+        neural_signature TEXT,
+        timestamp INTEGER -- Epoch second
+    ){_STRICT}
+"""
+
+# Core tables of each database file; helper tables (review_state, availability, reminder_log, notes)
+# are created on demand by their own modules.
+DATABASES = {
+    "study_data.db": {"dpp_log": DPP_LOG_DDL, "study_tasks": STUDY_TASKS_DDL},
+    "cognisynth_data_rmj.db": {"mock_test_results": MOCK_TEST_RESULTS_DDL},
+}
+DDL_BY_TABLE = {table: ddl for tables in DATABASES.values() for table, ddl in tables.items()}
+# Range scans on dpp_log.Date use the UNIQUE index, which starts with Date.
+INDEXES = {
+    "study_tasks": ("CREATE INDEX IF NOT EXISTS idx_study_tasks_due ON study_tasks (DueDate)",),
+    "mock_test_results": ("CREATE INDEX IF NOT EXISTS idx_mock_test_results_user_date ON mock_test_results (user_id, assessment_date)",),
+}
+DAY_COLUMNS = {"dpp_log": ("Date",), "study_tasks": ("DueDate", "CreatedDate"), "mock_test_results": ("assessment_date",)}
+SECOND_COLUMNS = {"mock_test_results": ("timestamp",)}
+# Enum columns: (allowed values, value that unknown legacy values are migrated to)
+ENUM_COLUMNS = {
+    "dpp_log": {"Subject": (DPP_SUBJECTS, "Others")},
+    "study_tasks": {"Subject": (TASK_SUBJECTS, "General"), "Priority": (TASK_PRIORITIES, "Medium"), "Status": (TASK_STATUSES, "Pending")},
+}
+ENUM_ALIASES = {"math": "Maths", "mathematics": "Maths", "chem": "Chemistry", "bio": "Biology", "cs": "Computer Science"} # Lower-cased legacy spellings
+
+
+def normalize_enum(value, values, fallback):
+    """Maps a free-text value onto one of `values` (case-insensitively, or through ENUM_ALIASES); unknown values become `fallback`."""
+    key = str(value or "").strip().lower()
+    canonical = {v.lower(): v for v in values}.get(key) or ENUM_ALIASES.get(key)
+    return canonical if canonical in values else fallback
+
+
+# --- Date Conversion ---
+
+def to_epoch_day(value):
+    """Converts a date, datetime, Timestamp or ISO date string to an integer epoch day."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value.strip()[:10])
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def from_epoch_day(day):
+    """Converts an integer epoch day back to a date."""
+    return date.fromordinal(int(day) + EPOCH_ORDINAL)
+
+
+def to_epoch_seconds(value):
+    """Converts a naive datetime (or ISO datetime string) to integer seconds since the epoch."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip())
+    return int((value - _EPOCH).total_seconds())
+
+
+def _to_datetime64(values, unit):
+    values = np.asarray(values, dtype="float64") # NULLs arrive as NaN
+    nat = np.iinfo(np.int64).min # The int64 pattern of NaT
+    return np.where(np.isnan(values), nat, values).astype("int64").astype(f"datetime64[{unit}]").astype("datetime64[ns]")
+
+
+def decode_dates(df, table):
+    """Maps a table's epoch-day and epoch-second columns to datetime64 in place (no string parsing)."""
+    for column in DAY_COLUMNS.get(table, ()):
+        if column in df.columns:
+            df[column] = _to_datetime64(df[column], "D")
+    for column in SECOND_COLUMNS.get(table, ()):
+        if column in df.columns:
+            df[column] = _to_datetime64(df[column], "s")
+    return df
+
+
+def readable_select(table):
+    """SELECT list for a table with its dates rendered as ISO text (for exports)."""
+    columns = []
+    for name, *_ in reference_columns(DDL_BY_TABLE[table]):
+        if name in DAY_COLUMNS.get(table, ()):
+            columns.append(f"date(\"{name}\" * 86400, 'unixepoch') AS \"{name}\"")
+        elif name in SECOND_COLUMNS.get(table, ()):
+            columns.append(f"datetime(\"{name}\", 'unixepoch') AS \"{name}\"")
+        else:
+            columns.append(f'"{name}"')
+    return ", ".join(columns)
+
+
+# --- Schema Introspection ---
+
+def table_columns(conn, table, schema="main"):
+    """Returns [(name, declared type, NOT NULL, default, primary key position)] for a table (empty if missing)."""
+    return [(row[1], row[2], bool(row[3]), row[4], row[5]) for row in conn.execute(f'PRAGMA "{schema}".table_info("{table}")')]
+
+
+_reference_columns = {}
+
+
+def reference_columns(ddl):
+    """Columns of a table as the DDL defines them (built once in a scratch in-memory database)."""
+    if ddl not in _reference_columns:
+        scratch = sqlite3.connect(":memory:")
+        try:
+            scratch.execute(ddl)
+            table = scratch.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'").fetchone()[0]
+            _reference_columns[ddl] = table_columns(scratch, table)
+        finally:
+            scratch.close()
+    return _reference_columns[ddl]
+
+
+# --- Migrations ---
+
+def _add_missing_tables_and_columns(conn, tables):
+    """Version 1: every core table exists with every column (older files predate several columns)."""
+    steps = []
+    for table, ddl in tables.items():
+        existing = {column[0] for column in table_columns(conn, table)}
+        if not existing:
+            conn.execute(ddl)
+            steps.append(f"created {table}")
+            continue
+        for name, declared_type, _, default, _ in reference_columns(ddl):
+            if name not in existing:
+                # ADD COLUMN can't add NOT NULL without a default, so migrated columns are nullable.
+                conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {declared_type}' + (f" DEFAULT {default}" if default is not None else ""))
+                steps.append(f"added {table}.{name}")
+    return steps
+
+
+def _enum_cases(values):
+    """{lower-cased spelling: allowed value} for an enum column, aliases included."""
+    return {key: value for key, value in ({value.lower(): value for value in values} | ENUM_ALIASES).items() if value in values}
+
+
+def _typed_expression(table, name, declared_type):
+    """SQL converting a version-1 column value to its version-2 type (NULL for an unreadable date)."""
+    column = f'"{name}"'
+    if name in DAY_COLUMNS.get(table, ()):
+        return f"CASE WHEN typeof({column}) = 'integer' THEN {column} ELSE CAST(julianday({column}) - 2440587.5 AS INTEGER) END"
+    if name in SECOND_COLUMNS.get(table, ()):
+        return f"CASE WHEN typeof({column}) = 'integer' THEN {column} ELSE CAST(strftime('%s', {column}) AS INTEGER) END"
+    if name in ENUM_COLUMNS.get(table, {}):
+        values, fallback = ENUM_COLUMNS[table][name]
+        whens = " ".join(f"WHEN {key!r} THEN {value!r}" for key, value in _enum_cases(values).items())
+        return f"CASE lower(trim({column})) {whens} ELSE {fallback!r} END"
+    if declared_type == "INTEGER": # Rounded, not truncated: a logged 85.6 becomes 86
+        return f"CASE WHEN typeof({column}) = 'integer' THEN {column} ELSE CAST(round({column}) AS INTEGER) END"
+    if declared_type == "REAL":
+        return f"CAST({column} AS REAL)"
+    return column
+
+
+def _count(conn, table, condition):
+    return conn.execute(f'SELECT COUNT(*) FROM "{table}" WHERE {condition}').fetchone()[0]
+
+
+def _quarantine_rows(conn, table, condition):
+    """Moves rows matching `condition`, values untouched, into <table>_quarantine (created only when needed). Returns the number moved."""
+    if not _count(conn, table, condition):
+        return 0
+    quarantine = f"{table}_quarantine"
+    conn.execute(f'CREATE TABLE IF NOT EXISTS "{quarantine}" AS SELECT * FROM "{table}" WHERE 0')
+    columns = ", ".join(f'"{column[0]}"' for column in table_columns(conn, table))
+    moved = conn.execute(f'INSERT INTO "{quarantine}" ({columns}) SELECT {columns} FROM "{table}" WHERE {condition}').rowcount
+    conn.execute(f'DELETE FROM "{table}" WHERE {condition}')
+    return moved
+
+
+def _rebuild_strict_tables(conn, tables):
+    """Version 2: STRICT tables with epoch-day/epoch-second dates, typed metrics and enum CHECKs.
+
+    Each table is copied into a new one and swapped in (SQLite can't change column types in
+    place). Columns the new schema doesn't know are kept, typed ANY. Rows whose required date
+    can't be read, and rows the new table refuses (e.g. duplicates once values are normalized),
+    are moved to <table>_quarantine unchanged rather than given a made-up date or dropped.
+    """
+    steps = []
+    for table, ddl in tables.items():
+        old_columns = {column[0] for column in table_columns(conn, table)}
+        if not old_columns:
+            continue
+        new_table = f"{table}_v2"
+        conn.execute(ddl.replace(f"EXISTS {table} (", f"EXISTS {new_table} (", 1))
+        reference = reference_columns(ddl)
+        new_columns = [column for column in reference if column[0] in old_columns]
+        extra = [name for name in old_columns if name not in {c[0] for c in reference}]
+        for name in extra:
+            conn.execute(f'ALTER TABLE "{new_table}" ADD COLUMN "{name}"' + (" ANY" if _STRICT else ""))
+        unreadable = [f'("{name}" IS NOT NULL AND ({_typed_expression(table, name, declared_type)}) IS NULL)'
+                      for name, declared_type, _, _, _ in new_columns if name in DAY_COLUMNS.get(table, ())]
+        required = [f"({_typed_expression(table, name, declared_type)}) IS NULL" for name, declared_type, not_null, _, _ in new_columns
+                    if not_null and name in DAY_COLUMNS.get(table, ())]
+        if required and (quarantined := _quarantine_rows(conn, table, " OR ".join(required))):
+            steps.append(f"quarantined {quarantined} {table} row(s) with unreadable dates in {table}_quarantine")
+        if unreadable and (cleared := _count(conn, table, " OR ".join(unreadable))):
+            steps.append(f"cleared {cleared} unreadable {table} date(s) to NULL")
+        for name, declared_type, _, _, _ in new_columns:
+            if name in ENUM_COLUMNS.get(table, {}):
+                values, fallback = ENUM_COLUMNS[table][name]
+                keys = ", ".join(repr(key) for key in _enum_cases(values))
+                allowed = ", ".join(repr(value) for value in values)
+                if respelled := _count(conn, table, f'"{name}" NOT IN ({allowed}) AND lower(trim("{name}")) IN ({keys})'):
+                    steps.append(f"normalized {respelled} {table}.{name} spelling(s)")
+                if unknown := _count(conn, table, f"""COALESCE(lower(trim("{name}")), '') NOT IN ({keys})"""):
+                    steps.append(f"set {unknown} unknown {table}.{name} value(s) to {fallback!r}")
+            elif declared_type == "INTEGER" and name not in DAY_COLUMNS.get(table, ()) + SECOND_COLUMNS.get(table, ()):
+                if rounded := _count(conn, table, f"""typeof("{name}") != 'integer' AND CAST("{name}" AS REAL) != round("{name}")"""):
+                    steps.append(f"rounded {rounded} fractional {table}.{name} value(s)")
+        # Old rows are matched to their copies by the rowid alias (ID), or by rowid when there is none
+        rowid_alias = next((name for name, declared_type, _, _, pk in new_columns if pk == 1 and declared_type == "INTEGER"
+                            and sum(1 for column in reference if column[4]) == 1), None)
+        key = f'"{rowid_alias}"' if rowid_alias else "rowid"
+        targets = ", ".join(([] if rowid_alias else [key]) + [f'"{name}"' for name in [name for name, *_ in new_columns] + extra])
+        expressions = ([] if rowid_alias else [key]) + [_typed_expression(table, name, declared_type) for name, declared_type, _, _, _ in new_columns] \
+            + [f'"{name}"' for name in extra]
+        sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone() \
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone() else None
+        copied = conn.execute(f'INSERT OR IGNORE INTO "{new_table}" ({targets}) SELECT {", ".join(expressions)} FROM "{table}"').rowcount
+        refused = _quarantine_rows(conn, table, f'{key} NOT IN (SELECT {key} FROM "{new_table}")')
+        conn.execute(f'DROP TABLE "{table}"')
+        conn.execute(f'ALTER TABLE "{new_table}" RENAME TO "{table}"')
+        if sequence is not None: # Keep AUTOINCREMENT from reusing IDs of deleted rows
+            conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequence[0], table))
+        for index in INDEXES.get(table, ()):
+            conn.execute(index)
+        steps.append(f"rebuilt {table} as a typed table ({copied} rows)")
+        if refused:
+            steps.append(f"quarantined {refused} {table} row(s) the typed table refused (duplicates once normalized) in {table}_quarantine")
+    return steps
+
+
+MIGRATIONS = {
+    1: _add_missing_tables_and_columns,
+    2: _rebuild_strict_tables,
+}
+
+
+def database_tables(db_file):
+    """Returns the core tables {name: DDL} of a known database file (by file name)."""
+    return DATABASES.get(os.path.basename(db_file), {})
+
+
+def _create_tables(conn, tables):
+    for table, ddl in tables.items():
+        conn.execute(ddl)
+        for index in INDEXES.get(table, ()):
+            conn.execute(index)
+
+
+def migrate(conn, tables):
+    """Brings a database up to SCHEMA_VERSION in one transaction. Returns (from_version, steps)."""
+    conn.execute("BEGIN IMMEDIATE") # Explicit, so the DDL is rolled back too if a step fails; IMMEDIATE so concurrent callers queue
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(f"Database schema version {version} is newer than this app supports ({SCHEMA_VERSION}).")
+        steps = []
+        if version < SCHEMA_VERSION and not any(table_columns(conn, table) for table in tables):
+            _create_tables(conn, tables) # A new database starts at the current schema
+            steps.append(f"created {', '.join(tables)}")
+            version_after = SCHEMA_VERSION
+        else:
+            version_after = version
+            for target in range(version + 1, SCHEMA_VERSION + 1):
+                steps += MIGRATIONS[target](conn, tables)
+                version_after = target
+        conn.execute(f"PRAGMA user_version = {version_after}")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    if steps:
+        schema_logger.info(f"Migrated database from schema version {version} to {SCHEMA_VERSION}: {', '.join(steps)}")
+    return version, steps
+
+
+def ensure_schema(conn, db_file):
+    """Creates or migrates a database's core tables; cheap when the database is already current."""
+    tables = database_tables(db_file)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        return migrate(conn, tables)
+    _create_tables(conn, tables) # IF NOT EXISTS: cheap, and recreates a table that was dropped
+    conn.commit()
+    return SCHEMA_VERSION, []
@@ -0,0 +1,172 @@
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import secrets
+import shutil
+import time
+from datetime import date, datetime
+
+import streamlit as st
+
+from metrics import EXPORT_ROWS, EXPORT_SECONDS
+from sql_trace import traced_connect
+
+# --- Setup Logging ---
+export_logger = logging.getLogger(__name__)
+
+# --- Export Configuration ---
+# Not under static/: Streamlit's static handler refuses files over 200 MB and serves .csv/.gz as text/plain.
+# Finished files are handed to st.download_button instead, once, in the rerun that built them (see render_file_download).
+EXPORT_DIR = os.environ.get("AISCHEDULER_EXPORT_DIR", "exports")
+EXPORT_TTL_SECONDS = 3600 # Finished exports are deleted after an hour
+CHUNK_ROWS = 5000 # Rows fetched from the cursor (and held in memory) at a time
+FORMATS = {
+    # name -> (extension, MIME type)
+    "CSV": (".csv", "text/csv"),
+    "JSON Lines": (".jsonl", "application/jsonl"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def _fetch_chunks(cursor, chunk_rows):
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            return
+        yield rows
+
+
+def _write_text(cursor, path, fmt, compress, chunk_rows):
+    columns = [d[0] for d in cursor.description]
+    raw = gzip.open(path, "wb") if compress else open(path, "wb")
+    rows_written = 0
+    with raw, io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+        if fmt == "CSV":
+            writer = csv.writer(f)
+            writer.writerow(columns)
+        for rows in _fetch_chunks(cursor, chunk_rows):
+            if fmt == "CSV":
+                writer.writerows(rows)
+            else:
+                f.writelines(json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in rows)
+            rows_written += len(rows)
+    return rows_written
+
+
+def _write_parquet(cursor, path, compress, chunk_rows):
+    # Imported lazily; only needed on this path
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    columns = [d[0] for d in cursor.description]
+    writer, schema, rows_written = None, None, 0
+    try:
+        for rows in _fetch_chunks(cursor, chunk_rows):
+            batch = pa.Table.from_pydict({name: list(values) for name, values in zip(columns, zip(*rows))})
+            if schema is None:
+                # Columns that are all NULL in the first chunk can't be typed from it; assume text.
+                schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in batch.schema])
+                writer = pq.ParquetWriter(path, schema, compression="gzip" if compress else "snappy")
+            writer.write_table(batch.cast(schema))
+            rows_written += len(rows)
+        if writer is None: # No rows: still write a readable file with the column names
+            pq.write_table(pa.table({name: pa.array([], pa.string()) for name in columns}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows_written
+
+
+def _remove_expired_exports():
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - EXPORT_TTL_SECONDS
+    for token in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, token)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path)
+        except FileNotFoundError: # Another session's sweep got there first
+            continue
+        except OSError as e:
+            export_logger.warning(f"Could not remove expired export {path}: {e}")
+
+
+def _new_export_path(file_name):
+    """Returns the path for a new export file, in its own directory so concurrent exports never collide."""
+    _remove_expired_exports()
+    token = secrets.token_hex(8)
+    os.makedirs(os.path.join(EXPORT_DIR, token))
+    return os.path.join(EXPORT_DIR, token, file_name)
+
+
+def render_file_download(path, file_name, mime, key):
+    """Download button for a file on disk, served with its MIME type through Streamlit's media endpoint.
+
+    st.download_button keeps the whole file in memory, so only call this in the rerun where the
+    user asked for the file; the button is gone on the next rerun. Clicking it doesn't rerun.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    st.download_button(f"📥 Download {file_name}", data=data, file_name=file_name, mime=mime, key=key, on_click="ignore")
+
+
+def export_query(db_file, sql, params=(), fmt="CSV", compress=False, base_name="export", table=None, chunk_rows=CHUNK_ROWS):
+    """Streams a query's rows to a CSV, JSON Lines or Parquet file in chunks of `chunk_rows`.
+
+    Rows are read from a separate read-only connection, so memory stays bounded by the chunk
+    size whatever the result size. Returns a dict with the file path, name, MIME type, row
+    count, size and elapsed seconds.
+    """
+    extension, mime = FORMATS[fmt]
+    file_name = f"{base_name}{extension}" + (".gz" if compress and fmt != "Parquet" else "") # Parquet compresses internally
+    path = _new_export_path(file_name)
+    started = time.perf_counter()
+    conn = traced_connect(f"file:{os.path.abspath(db_file)}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(sql, params)
+        if fmt == "Parquet":
+            rows = _write_parquet(cursor, path, compress, chunk_rows)
+        else:
+            rows = _write_text(cursor, path, fmt, compress, chunk_rows)
+    finally:
+        conn.close()
+    seconds = time.perf_counter() - started
+    EXPORT_ROWS.inc(rows, table=table or base_name, format=fmt)
+    EXPORT_SECONDS.observe(seconds, table=table or base_name, format=fmt)
+    size = os.path.getsize(path)
+    export_logger.info(f"Exported {rows} rows to {file_name} ({size / 1024:.1f} KiB) in {seconds * 1000:.0f} ms.")
+    return {"path": path, "file_name": file_name, "mime": mime,
+            "rows": rows, "bytes": size, "seconds": seconds}
+
+
+def render_export_controls(key, db_file, sql, params, base_name, table=None):
+    """Shows format/compression options and an export button; the file is only built, and read, when clicked."""
+    col_format, col_gzip, col_button = st.columns([2, 1, 2])
+    with col_format:
+        fmt = st.selectbox("Export Format", list(FORMATS), key=f"{key}_format")
+    with col_gzip:
+        compress = st.checkbox("gzip", key=f"{key}_gzip", help="Compress the file (Parquet uses gzip internally).")
+    with col_button:
+        prepare = st.button("📦 Prepare Export", key=f"{key}_button", use_container_width=True)
+    if not prepare: # Nothing is kept between reruns, so other reruns cost nothing
+        return
+    try:
+        with st.spinner("Exporting..."):
+            result = export_query(db_file, sql, params, fmt, compress, base_name, table)
+        render_file_download(result["path"], result["file_name"], result["mime"], key=f"{key}_download")
+    except Exception as e:
+        export_logger.error(f"Export of {base_name} failed: {e}", exc_info=True)
+        st.error(f"🚨 Export failed: {e}")
+        return
+    st.caption(f"{result['rows']} rows · {result['bytes'] / 1024:.1f} KiB · built in {result['seconds'] * 1000:.0f} ms")
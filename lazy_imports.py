@@ -0,0 +1,60 @@
+import importlib
+import logging
+import threading
+import time
+
+# --- Setup Logging ---
+lazy_logger = logging.getLogger(__name__)
+
+_proxies = {}
+_import_timings = {}
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    `px = lazy_import("plotly.express")` costs nothing until the page actually
+    draws a chart, so script reruns that never reach a chart skip the import.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_module"]
+                if module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    _import_timings[self._name] = time.perf_counter() - started
+                    lazy_logger.info(f"Lazily imported {self._name} in {_import_timings[self._name] * 1000:.0f} ms.")
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Returns a shared lazy proxy for a module (reused across Streamlit reruns)."""
+    with _lock:
+        proxy = _proxies.get(name)
+        if proxy is None:
+            proxy = _proxies[name] = LazyModule(name)
+        return proxy
+
+
+def import_timings():
+    """Returns {module: seconds} for every lazy import resolved so far in this process."""
+    return dict(_import_timings)
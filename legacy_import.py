@@ -0,0 +1,221 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from archive import LOCK_TIMEOUT, history_table
+from db_schema import ensure_schema, from_epoch_day, table_columns, to_epoch_day, to_epoch_seconds
+from sql_trace import traced_connect
+
+# --- Setup Logging ---
+import_logger = logging.getLogger(__name__)
+
+# --- Legacy Import Configuration ---
+# Older builds logged assessments to cognitive_assessments in the mock test database. Its rows are
+# copied into mock_test_results (the source table is left untouched), a batch per transaction.
+LEGACY_TABLE = "cognitive_assessments"
+TARGET_TABLE = "mock_test_results"
+BATCH_SIZE = 500
+SUBJECT_SCORE_COLUMNS = {"Physics": "physics_score", "Chemistry": "chemistry_score", "Maths": "maths_score", "Biology": "biology_score"}
+
+_LEGACY_COLUMNS = ("id", "user_id", "assessment_date", "assessment_label", "knowledge_domain", "exam_type", "total_scalar_units",
+                   "correct_responses", "incorrect_responses", "unattempted_segments", "attained_scalar_units", "processing_cycles_ms")
+_TARGET_COLUMNS = ("id", "user_id", "assessment_date", "exam_type", "test_name", "domain", "total_questions", "attempted", "correct",
+                   "wrong", "physics_score", "chemistry_score", "maths_score", "biology_score", "total_score", "max_score_possible",
+                   "time_taken_minutes", "timestamp")
+
+# Storage classes a STRICT column accepts, after the declared type's affinity has converted the value
+_STRICT_STORAGE = {"INTEGER": ("integer",), "REAL": ("real",), "TEXT": ("text",), "BLOB": ("blob",)}
+
+_imported_files = set() # Imported successfully in this process
+_running_files = set() # Being imported right now, by another session's thread
+_import_lock = threading.Lock()
+
+
+# --- Checkpoint ---
+# The highest legacy id already handled, committed with each batch, so an interrupted import resumes after it.
+
+def create_checkpoint_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS legacy_import_checkpoint (
+            source TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            imported INTEGER NOT NULL DEFAULT 0,
+            duplicates INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            rejected INTEGER NOT NULL DEFAULT 0, -- Refused by a mock_test_results constraint
+            updated INTEGER NOT NULL -- Epoch second
+        )
+    """)
+    if "rejected" not in {column[0] for column in table_columns(conn, "legacy_import_checkpoint")}: # Checkpoints written before the column
+        conn.execute("ALTER TABLE legacy_import_checkpoint ADD COLUMN rejected INTEGER NOT NULL DEFAULT 0")
+
+
+def _checkpoint(conn):
+    row = conn.execute("SELECT last_id FROM legacy_import_checkpoint WHERE source = ?", (LEGACY_TABLE,)).fetchone()
+    return row[0] if row else 0
+
+
+# --- Row Mapping ---
+
+def legacy_test_id(legacy_id):
+    """Stable mock_test_results id of a legacy row (same SHA256 hex form as logged tests), so a rerun can't insert it twice."""
+    return hashlib.sha256(f"{LEGACY_TABLE}-{legacy_id}".encode()).hexdigest()
+
+
+def map_legacy_row(row):
+    """Maps a cognitive_assessments row onto mock_test_results columns ({column: value})."""
+    legacy = dict(zip(_LEGACY_COLUMNS, row))
+    correct, wrong = legacy["correct_responses"] or 0, legacy["incorrect_responses"] or 0
+    mapped = dict.fromkeys(SUBJECT_SCORE_COLUMNS.values(), 0.0) | {
+        "id": legacy_test_id(legacy["id"]),
+        "user_id": legacy["user_id"],
+        "assessment_date": to_epoch_day(legacy["assessment_date"]),
+        "exam_type": legacy["exam_type"],
+        "test_name": legacy["assessment_label"],
+        "domain": legacy["knowledge_domain"],
+        "total_questions": correct + wrong + (legacy["unattempted_segments"] or 0),
+        "attempted": correct + wrong,
+        "correct": correct,
+        "wrong": wrong,
+        "total_score": legacy["attained_scalar_units"],
+        "max_score_possible": legacy["total_scalar_units"],
+        "time_taken_minutes": round((legacy["processing_cycles_ms"] or 0) / 60000),
+        # No entry time was kept; the assessment day's midnight stands in
+        "timestamp": to_epoch_seconds(datetime.fromisoformat(str(legacy["assessment_date"]).strip()[:10])),
+    }
+    # A single-subject domain ("Physics: Optics ...") credits the whole score to that subject
+    subject = str(legacy["knowledge_domain"] or "").split(":")[0].strip().title()
+    if subject in SUBJECT_SCORE_COLUMNS:
+        mapped[SUBJECT_SCORE_COLUMNS[subject]] = float(legacy["attained_scalar_units"])
+    return mapped
+
+
+# --- Import ---
+
+def create_staging_table(conn):
+    """(Re)creates TEMP legacy_batch: the target's columns and declared types, without STRICT.
+
+    A value stored there goes through the same type conversion as in the target, so one left in
+    the wrong storage class (e.g. text in an INTEGER column) is exactly one STRICT would refuse.
+    """
+    declared = {name: declared_type for name, declared_type, *_ in table_columns(conn, TARGET_TABLE)}
+    conn.execute("DROP TABLE IF EXISTS temp.legacy_batch")
+    definitions = ", ".join(f'"{name}" {declared[name]}' for name in _TARGET_COLUMNS)
+    conn.execute(f"CREATE TEMP TABLE legacy_batch ({definitions})")
+    # (column, storage classes a STRICT column of its type accepts), for the columns that are typed
+    return [(name, _STRICT_STORAGE[declared[name].upper()]) for name in _TARGET_COLUMNS if declared[name].upper() in _STRICT_STORAGE]
+
+
+def _insert_batch(conn, rows, source, typed_columns):
+    """Inserts mapped rows unless the same test (same id, or user, day and name) is already logged, hot or archived.
+
+    The batch is staged in TEMP legacy_batch with one executemany, then copied with one
+    INSERT ... SELECT: rows whose values a STRICT column would refuse are filtered out in SQL
+    (see create_staging_table), as are repeats of a test within the batch. Returns (inserted,
+    duplicates, rejected); rejected rows are logged.
+    """
+    columns = ", ".join(f'"{name}"' for name in _TARGET_COLUMNS)
+    values = ", ".join(f":{name}" for name in _TARGET_COLUMNS)
+    conn.execute("DELETE FROM temp.legacy_batch")
+    conn.executemany(f"INSERT INTO temp.legacy_batch ({columns}) VALUES ({values})", rows)
+    same_test = "{0}.user_id = b.user_id AND {0}.assessment_date = b.assessment_date AND lower(trim({0}.test_name)) = lower(trim(b.test_name))"
+    logged = f'EXISTS (SELECT 1 FROM "{source}" AS logged WHERE logged.id = b.id OR ({same_test.format("logged")}))'
+    valid = " AND ".join(f"typeof(b.\"{name}\") IN ('null', {', '.join(repr(s) for s in storage)})" for name, storage in typed_columns) or "1"
+    before = conn.total_changes
+    conn.execute(f"""
+        INSERT OR IGNORE INTO {TARGET_TABLE} ({columns})
+        SELECT {columns} FROM temp.legacy_batch AS b
+        WHERE {valid} AND NOT {logged}
+            AND b.rowid = (SELECT MIN(first.rowid) FROM temp.legacy_batch AS first WHERE {same_test.format("first")})
+    """)
+    inserted = conn.total_changes - before
+    # Every row inserted, or a repeat of one, now counts as logged; what is left was refused
+    refused = conn.execute(f"SELECT test_name, assessment_date FROM temp.legacy_batch AS b WHERE NOT {logged}").fetchall()
+    for test_name, day in refused:
+        import_logger.warning(f"Rejected legacy assessment {test_name!r} of {from_epoch_day(day)}: a {TARGET_TABLE} constraint refuses it.")
+    return inserted, len(rows) - inserted - len(refused), len(refused)
+
+
+def import_legacy_assessments(db_file, batch_size=BATCH_SIZE):
+    """Copies cognitive_assessments rows not yet imported into mock_test_results.
+
+    Rows are read in id order, `batch_size` at a time; each batch and its checkpoint commit
+    together, so a crash or a concurrent run never imports a row twice or skips one.
+    Returns a report dict (all zeros when there is nothing left to import).
+    """
+    started = time.perf_counter()
+    report = {"imported": 0, "duplicates": 0, "skipped": 0, "rejected": 0, "last_id": 0, "seconds": 0.0}
+    conn = traced_connect(db_file, timeout=LOCK_TIMEOUT)
+    try:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (LEGACY_TABLE,)).fetchone():
+            return report
+        ensure_schema(conn, db_file) # Epoch-day dates, and every column mapped to
+        create_checkpoint_table(conn)
+        conn.commit()
+        source = history_table(conn, TARGET_TABLE) # Tests already moved to the archive files count as logged too
+        typed_columns = create_staging_table(conn)
+        while True:
+            conn.execute("BEGIN IMMEDIATE") # The checkpoint is re-read under the write lock
+            try:
+                last_id = _checkpoint(conn)
+                batch = conn.execute(f"SELECT {', '.join(_LEGACY_COLUMNS)} FROM {LEGACY_TABLE} WHERE id > ? ORDER BY id LIMIT ?",
+                                     (last_id, batch_size)).fetchall()
+                if not batch:
+                    conn.rollback()
+                    break
+                rows = []
+                for row in batch:
+                    try:
+                        rows.append(map_legacy_row(row))
+                    except (TypeError, ValueError) as e:
+                        import_logger.warning(f"Skipping {LEGACY_TABLE} row {row[0]}: {e}")
+                        report["skipped"] += 1
+                inserted, duplicates, rejected = _insert_batch(conn, rows, source, typed_columns)
+                report["imported"] += inserted
+                report["duplicates"] += duplicates
+                report["rejected"] += rejected
+                report["last_id"] = batch[-1][0]
+                conn.execute("""
+                    INSERT INTO legacy_import_checkpoint (source, last_id, imported, duplicates, skipped, rejected, updated)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(source) DO UPDATE SET last_id = excluded.last_id, imported = imported + excluded.imported,
+                        duplicates = duplicates + excluded.duplicates, skipped = skipped + excluded.skipped,
+                        rejected = rejected + excluded.rejected, updated = excluded.updated
+                """, (LEGACY_TABLE, batch[-1][0], inserted, duplicates, len(batch) - len(rows), rejected, to_epoch_seconds(datetime.now())))
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+    finally:
+        conn.close()
+    report["seconds"] = time.perf_counter() - started
+    if report["last_id"]:
+        import_logger.info(f"Imported {report['imported']} legacy assessment(s) from {db_file} in {report['seconds'] * 1000:.0f} ms "
+                           f"({report['duplicates']} already logged, {report['skipped']} unreadable, {report['rejected']} rejected by a constraint).")
+    return report
+
+
+def ensure_legacy_import(db_file):
+    """Runs the legacy import until it succeeds once in this process (later calls, and calls during a run, are no-ops).
+
+    Errors are logged, not raised; a failed run (e.g. the database was locked) is retried on the next call.
+    """
+    with _import_lock:
+        if db_file in _imported_files or db_file in _running_files:
+            return None
+        _running_files.add(db_file)
+    try:
+        report = import_legacy_assessments(db_file)
+    except (OSError, sqlite3.Error) as e:
+        import_logger.error(f"Importing legacy assessments from {db_file} failed: {e}")
+        return None
+    else:
+        with _import_lock:
+            _imported_files.add(db_file)
+        return report
+    finally:
+        with _import_lock:
+            _running_files.discard(db_file)
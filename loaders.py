@@ -0,0 +1,72 @@
+import pandas as pd
+
+from db_schema import decode_dates
+from snapshots import read_snapshot
+
+# --- Table Loaders ---
+# The pages' snapshot reads, kept importable (pages run as scripts) so benchmark.py times the same code.
+
+DPP_LOG_ORDER = "Date DESC, ID DESC"
+STUDY_TASKS_ORDER = "DueDate ASC, Priority ASC, ID DESC"
+MOCK_TEST_RESULTS_ORDER = "assessment_date DESC"
+
+
+def prepare_dpp_logs(df):
+    """Maps the epoch-day DPP log dates to datetime64 (run once per snapshot)."""
+    return decode_dates(df, "dpp_log")
+
+
+def prepare_study_tasks(df):
+    """Maps the epoch-day study task dates to datetime64 (run once per snapshot)."""
+    return decode_dates(df, "study_tasks")
+
+
+def prepare_mock_test_results(df):
+    """Types the raw mock_test_results columns and adds the derived score columns (run once per snapshot)."""
+    if not df.empty:
+        decode_dates(df, "mock_test_results") # Epoch days/seconds to datetime64, without parsing
+
+        # Ensure numeric types and handle potential NaNs
+        df['total_score'] = pd.to_numeric(df['total_score'], errors='coerce').fillna(0)
+        df['max_score_possible'] = pd.to_numeric(df['max_score_possible'], errors='coerce').fillna(100) # Default to 100
+        df['time_taken_minutes'] = pd.to_numeric(df['time_taken_minutes'], errors='coerce').fillna(0)
+        df['total_questions'] = pd.to_numeric(df['total_questions'], errors='coerce').fillna(0).astype(int)
+        df['attempted'] = pd.to_numeric(df['attempted'], errors='coerce').fillna(0).astype(int)
+        df['correct'] = pd.to_numeric(df['correct'], errors='coerce').fillna(0).astype(int)
+        df['wrong'] = pd.to_numeric(df['wrong'], errors='coerce').fillna(0).astype(int)
+        df['physics_score'] = pd.to_numeric(df['physics_score'], errors='coerce').fillna(0.0)
+        df['chemistry_score'] = pd.to_numeric(df['chemistry_score'], errors='coerce').fillna(0.0)
+        df['maths_score'] = pd.to_numeric(df['maths_score'], errors='coerce').fillna(0.0)
+        df['biology_score'] = pd.to_numeric(df['biology_score'], errors='coerce').fillna(0.0)
+        df['percentile'] = pd.to_numeric(df['percentile'], errors='coerce').fillna(0.0)
+        df['rank'] = pd.to_numeric(df['rank'], errors='coerce').fillna(0).astype(int)
+        df['target_score'] = pd.to_numeric(df['target_score'], errors='coerce').fillna(0.0)
+
+        # Calculate percentage_score for consistent analysis and display
+        # Handle division by zero for max_score_possible
+        df['percentage_score'] = (df['total_score'] / df['max_score_possible'] * 100).round(2)
+        df.loc[df['max_score_possible'] == 0, 'percentage_score'] = 0.0 # Set to 0 if max_score_possible is 0
+
+        # Calculate accuracy based on correct/attempted for question analysis
+        df['accuracy_q'] = (df['correct'] / df['attempted'] * 100).round(2)
+        df.loc[df['attempted'] == 0, 'accuracy_q'] = 0.0 # Set to 0 if attempted is 0
+
+        # Calculate unattempted questions
+        df['unattempted'] = df['total_questions'] - df['attempted']
+    return df
+
+
+def read_dpp_logs(db_file, columns=None):
+    """All DPP logs (optionally only some columns) from the typed Parquet snapshot of the table."""
+    return read_snapshot(db_file, "dpp_log", prepare=prepare_dpp_logs, columns=columns, order_by=DPP_LOG_ORDER)
+
+
+def read_study_tasks(db_file, columns=None):
+    """All study tasks (optionally only some columns) from the typed Parquet snapshot of the table."""
+    return read_snapshot(db_file, "study_tasks", prepare=prepare_study_tasks, columns=columns, order_by=STUDY_TASKS_ORDER)
+
+
+def read_mock_test_results(db_file, user_id=None):
+    """Mock test results with their derived score columns, optionally only one user's."""
+    return read_snapshot(db_file, "mock_test_results", prepare=prepare_mock_test_results, order_by=MOCK_TEST_RESULTS_ORDER,
+                         filters=[("user_id", "=", user_id)] if user_id else None)
@@ -0,0 +1,275 @@
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import profiler
+import sql_trace
+from cache_telemetry import prometheus_text as cache_prometheus_text
+
+# --- Setup Logging ---
+metrics_logger = logging.getLogger(__name__)
+
+# --- Exporter Configuration ---
+METRICS_PORT = os.environ.get("AISCHEDULER_METRICS_PORT") # e.g. 9464 serves http://127.0.0.1:9464/metrics; unset disables HTTP
+METRICS_TEXTFILE = os.environ.get("AISCHEDULER_METRICS_TEXTFILE", "aischeduler.prom") # node_exporter textfile; empty disables it
+TEXTFILE_INTERVAL = 15 # Seconds between textfile rewrites
+SESSION_IDLE_SECONDS = 300 # A session with no rerun for this long no longer counts as active
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_FILES = ("study_data.db", "cognisynth_data_rmj.db")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class _Metric:
+    """Base for labelled metrics; each label combination is one series (a dict entry guarded by a lock)."""
+
+    metric_type = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in series:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that can go up and down; set directly or by a collector at scrape time."""
+
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def replace(self, values):
+        """Replaces every series at once from {label tuple: value} (drops series that disappeared)."""
+        with self._lock:
+            self._series = dict(values)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values (seconds unless named otherwise)."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0] # bucket counts, count, sum
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += 1
+            series[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of a with-block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        with self._lock:
+            series = [(key, list(counts), count, total) for key, (counts, count, total) in self._series.items()]
+        for key, counts, count, total in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(names, key + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {round(total, 6)}")
+        return lines
+
+
+_registry = []
+_collectors = []
+_sessions = {} # session id -> monotonic time of its last rerun
+_started = False
+_start_lock = threading.Lock()
+
+# --- Metrics ---
+RERUN_SECONDS = Histogram("aischeduler_rerun_seconds", "Full script run time per page.", ["page"])
+ROWS_LOADED = Counter("aischeduler_rows_loaded_total", "Rows read from the database by the page loaders.", ["table"])
+DB_WRITES = Counter("aischeduler_db_writes_total", "Write statements executed, by table and operation.", ["table", "op"])
+DB_FILE_BYTES = Gauge("aischeduler_db_file_bytes", "Size of each SQLite database file (including its WAL).", ["db"])
+ACTIVE_SESSIONS = Gauge("aischeduler_active_sessions", f"Browser sessions with a rerun in the last {SESSION_IDLE_SECONDS} s.")
+AI_NEXUS_SECONDS = Histogram("aischeduler_ai_nexus_seconds", "AI Nexus response time by query intent.", ["intent"])
+EXPORT_ROWS = Counter("aischeduler_export_rows_total", "Rows written to downloadable exports.", ["table", "format"])
+EXPORT_SECONDS = Histogram("aischeduler_export_seconds", "Time to build a downloadable export.", ["table", "format"])
+
+
+def register_collector(collector):
+    """Registers a callable run just before each exposition (for gauges that are cheap to read but not event-driven)."""
+    _collectors.append(collector)
+
+
+def _collect_db_sizes():
+    sizes = {}
+    for db_file in DB_FILES:
+        if os.path.exists(db_file):
+            wal = f"{db_file}-wal"
+            sizes[(db_file,)] = os.path.getsize(db_file) + (os.path.getsize(wal) if os.path.exists(wal) else 0)
+    DB_FILE_BYTES.replace(sizes)
+
+
+def _collect_sessions():
+    cutoff = time.monotonic() - SESSION_IDLE_SECONDS
+    for session_id, last_seen in list(_sessions.items()):
+        if last_seen < cutoff:
+            _sessions.pop(session_id, None)
+    ACTIVE_SESSIONS.set(len(_sessions))
+
+
+register_collector(_collect_db_sizes)
+register_collector(_collect_sessions)
+
+
+# --- Event Sources ---
+# Reruns come from the render profiler and writes from the SQL trace, so the pages need no extra calls.
+
+def _on_profiler_record(record):
+    section = record["section"]
+    if section.endswith("/rerun"):
+        RERUN_SECONDS.observe(record["wall_ms"] / 1000, page=section.rsplit("/", 1)[0])
+
+
+_WRITE_TARGET = re.compile(r'^(INSERT|REPLACE|UPDATE|DELETE)\b(?:\s+OR\s+\w+)?(?:\s+INTO|\s+FROM)?\s+["`\[]?(\w+)', re.I)
+
+
+@lru_cache(maxsize=1024)
+def _write_target(shape):
+    match = _WRITE_TARGET.match(shape)
+    if match is None:
+        return None
+    op = match.group(1).upper()
+    return ("INSERT" if op == "REPLACE" else op), match.group(2)
+
+
+def _on_sql_statement(event):
+    if event["verb"] in ("INSERT", "REPLACE", "UPDATE", "DELETE"):
+        target = _write_target(event["shape"])
+        if target:
+            DB_WRITES.inc(op=target[0].lower(), table=target[1])
+
+
+profiler.add_listener(_on_profiler_record)
+sql_trace.add_listener(_on_sql_statement)
+
+
+# --- Exposition ---
+
+def render_text(include_cache=True):
+    """Returns every metric in the Prometheus text format; the cache telemetry is appended unless `include_cache` is False."""
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception:
+            metrics_logger.exception("Metrics collector failed.")
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n" + (cache_prometheus_text() if include_cache else "")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # Scrapes every few seconds would flood the app log
+        return
+
+
+def _write_textfile_forever(path):
+    while True:
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                # The cache series already have their own textfile (cache_telemetry.PROM_FILE); node_exporter
+                # rejects a series that appears in two files, so only the HTTP endpoint adds them here.
+                f.write(render_text(include_cache=False))
+            os.replace(tmp_path, path) # Atomic, so the collector never reads a half-written file
+        except OSError as e:
+            metrics_logger.error(f"Failed to write metrics to {path}: {e}")
+        time.sleep(TEXTFILE_INTERVAL)
+
+
+def start_metrics():
+    """Marks the current session active and, once per process, starts the HTTP endpoint and/or textfile writer."""
+    global _started
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx # Imported lazily; only needed on this path
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            _sessions[ctx.session_id] = time.monotonic()
+    except ImportError:
+        pass
+    if _started:
+        return
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+        if METRICS_PORT:
+            try:
+                server = ThreadingHTTPServer(("127.0.0.1", int(METRICS_PORT)), _MetricsHandler)
+                threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+                metrics_logger.info(f"Serving metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+            except (OSError, ValueError) as e:
+                metrics_logger.error(f"Could not start the metrics endpoint on port {METRICS_PORT}: {e}")
+        if METRICS_TEXTFILE:
+            threading.Thread(target=_write_textfile_forever, args=(METRICS_TEXTFILE,), name="metrics-textfile", daemon=True).start()
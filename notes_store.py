@@ -0,0 +1,184 @@
+import csv
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from db_schema import TASK_SUBJECTS, normalize_enum
+
+# --- Setup Logging ---
+notes_logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+LEGACY_NOTES_FILE = "notes.csv" # Written by the old CSV-based notes page; imported once, then renamed
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+PAGE_SIZE = 100 # Notes listed per page, newest first
+
+
+def create_notes_table(conn):
+    """Creates the notes table (and its lookup indexes) if it doesn't already exist."""
+    if conn is None:
+        return False
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS notes (
+                ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                Subject TEXT NOT NULL,
+                Topic TEXT NOT NULL, -- Matches study_tasks.Topic / dpp_log.Chapter for linking
+                Content TEXT NOT NULL,
+                CreatedDate TEXT NOT NULL,
+                UpdatedDate TEXT NOT NULL
+            );
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_notes_subject_topic ON notes (Subject, Topic COLLATE NOCASE);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_notes_updated ON notes (UpdatedDate);")
+        conn.commit()
+        notes_logger.info("Notes table ensured.")
+        return True
+    except sqlite3.Error:
+        notes_logger.exception("Failed to create notes table.")
+        return False
+
+
+def import_notes_csv(conn, csv_path=LEGACY_NOTES_FILE):
+    """Imports a legacy notes.csv (Subject, Topic, Content) in one transaction, then renames it so it's only imported once.
+
+    Returns the number of notes imported (0 when there is no file).
+    """
+    if conn is None or not os.path.exists(csv_path):
+        return 0
+    created = datetime.fromtimestamp(os.path.getmtime(csv_path)).strftime(TIMESTAMP_FORMAT) # Best guess at when the notes were written
+    try:
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            # Old files used free-text subjects ("Math", "physics"); map them onto the page's subject list
+            rows = [(normalize_enum(row.get("Subject"), TASK_SUBJECTS, "General"), (row.get("Topic") or "").strip(), row.get("Content") or "", created, created)
+                    for row in csv.DictReader(f) if (row.get("Content") or "").strip()]
+        with conn: # Commits, or rolls back on error
+            conn.executemany("""
+                INSERT INTO notes (Subject, Topic, Content, CreatedDate, UpdatedDate)
+                VALUES (?, ?, ?, ?, ?);
+            """, rows)
+        os.replace(csv_path, f"{csv_path}.imported")
+    except (OSError, csv.Error, sqlite3.Error):
+        notes_logger.exception(f"Failed to import {csv_path}.")
+        return 0
+    notes_logger.info(f"Imported {len(rows)} notes from {csv_path}.")
+    return len(rows)
+
+
+def add_note(conn, subject, topic, content):
+    """Appends a note; returns its ID (None on failure)."""
+    if conn is None:
+        return None
+    now = datetime.now().strftime(TIMESTAMP_FORMAT)
+    try:
+        cursor = conn.execute("""
+            INSERT INTO notes (Subject, Topic, Content, CreatedDate, UpdatedDate)
+            VALUES (?, ?, ?, ?, ?);
+        """, (subject, topic, content, now, now))
+        conn.commit()
+        notes_logger.info(f"Inserted note ID {cursor.lastrowid}: {subject} / {topic}")
+        return cursor.lastrowid
+    except sqlite3.Error:
+        notes_logger.exception("Failed to insert note.")
+        return None
+
+
+def update_note(conn, note_id, subject, topic, content):
+    """Edits a note in place by its ID."""
+    if conn is None:
+        return False
+    try:
+        conn.execute("""
+            UPDATE notes SET Subject = ?, Topic = ?, Content = ?, UpdatedDate = ?
+            WHERE ID = ?;
+        """, (subject, topic, content, datetime.now().strftime(TIMESTAMP_FORMAT), note_id))
+        conn.commit()
+        notes_logger.info(f"Updated note ID: {note_id}")
+        return True
+    except sqlite3.Error:
+        notes_logger.exception("Failed to update note.")
+        return False
+
+
+def delete_note(conn, note_id):
+    """Deletes a note by its ID."""
+    if conn is None:
+        return False
+    try:
+        conn.execute("DELETE FROM notes WHERE ID = ?", (note_id,))
+        conn.commit()
+        notes_logger.info(f"Deleted note ID: {note_id}")
+        return True
+    except sqlite3.Error:
+        notes_logger.exception("Failed to delete note.")
+        return False
+
+
+def load_notes(conn, subject=None, topic=None, search=None, limit=PAGE_SIZE, offset=0):
+    """Loads one page of notes, most recently edited first, optionally filtered by subject, topic and text."""
+    if conn is None:
+        return pd.DataFrame()
+    clauses, params = [], []
+    if subject:
+        clauses.append("Subject = ?")
+        params.append(subject)
+    if topic:
+        clauses.append("Topic = ? COLLATE NOCASE")
+        params.append(topic)
+    if search:
+        clauses.append("(Topic LIKE ? OR Content LIKE ?)")
+        params += [f"%{search}%"] * 2
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    try:
+        return pd.read_sql_query(f"""
+            SELECT ID, Subject, Topic, Content, CreatedDate, UpdatedDate FROM notes {where}
+            ORDER BY UpdatedDate DESC, ID DESC LIMIT ? OFFSET ?;
+        """, conn, params=params + [limit, offset])
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        notes_logger.exception("Failed to load notes.")
+        return pd.DataFrame()
+
+
+def count_notes(conn):
+    """Returns the total number of notes."""
+    try:
+        return conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+    except sqlite3.Error:
+        notes_logger.exception("Failed to count notes.")
+        return 0
+
+
+def known_topics(conn, subject):
+    """Topics already used for a subject by study tasks, DPP chapters and notes (for linking new notes)."""
+    queries = [
+        "SELECT Topic FROM study_tasks WHERE Subject = ?",
+        "SELECT Chapter FROM dpp_log WHERE Subject = ?",
+        "SELECT Topic FROM notes WHERE Subject = ?",
+    ]
+    topics = set()
+    for query in queries: # Separately, so a missing table doesn't hide the others
+        try:
+            topics.update(row[0] for row in conn.execute(query, (subject,)) if row[0])
+        except sqlite3.Error:
+            continue
+    return sorted(topics, key=str.lower)
+
+
+def linked_items(conn, subject, topic):
+    """Returns (study tasks, DPP logs) for the same subject whose topic/chapter matches a note's topic."""
+    frames = []
+    for query in ("""
+            SELECT ID, date(DueDate * 86400, 'unixepoch') AS DueDate, Priority, Status FROM study_tasks
+            WHERE Subject = ? AND Topic = ? COLLATE NOCASE ORDER BY DueDate ASC;
+        """, """
+            SELECT ID, date(Date * 86400, 'unixepoch') AS Date, DPP_Number, Score, Accuracy FROM dpp_log
+            WHERE Subject = ? AND Chapter = ? COLLATE NOCASE ORDER BY Date DESC;
+        """):
+        try:
+            frames.append(pd.read_sql_query(query, conn, params=(subject, topic)))
+        except (sqlite3.Error, pd.errors.DatabaseError):
+            frames.append(pd.DataFrame())
+    return tuple(frames)
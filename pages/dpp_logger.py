@@ -3,9 +3,23 @@ import sqlite3
 import pandas as pd
 from datetime import date, datetime
 import logging
-import plotly.express as px
 from contextlib import contextmanager
 import os
+from review_scheduler import create_review_state_table, record_dpp_review, rebuild_review_state, load_due_reviews, generate_review_tasks
+from reminders import get_reminder_service
+from task_queue import reload_task_queue
+from lazy_imports import lazy_import
+from theme import apply_theme, sidebar_image
+from profiler import begin_rerun, profile_section, profiled, render_profiler_panel, rerun_page, stop_page
+from sql_trace import render_sql_trace_panel, traced_connect
+from cache_telemetry import cache_data, cache_resource, clear_caches, render_cache_panel
+from metrics import start_metrics
+from loaders import DPP_LOG_ORDER, prepare_dpp_logs, read_dpp_logs
+from archive import list_archives, load_history
+from db_schema import DPP_SUBJECTS, ensure_schema, readable_select, to_epoch_day
+from exports import render_export_controls
+
+px = lazy_import("plotly.express") # Loaded on the first chart, not on every cold start
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,6 +28,7 @@ app_logger = logging.getLogger(__name__)
 # --- Database Configuration ---
 DB_FILE = "study_data.db"
 DATE_FORMAT = "%Y-%m-%d"
+ANALYTICS_COLUMNS = ("ID", "Date", "Subject", "Chapter", "DPP_Number", "Score", "Accuracy", "Time_Taken") # Notes are never charted
 
 # --- Streamlit Page Configuration ---
 # Setting page config here for standalone running.
@@ -30,328 +45,22 @@ st.set_page_config(
     }
 )
 
-# --- Custom CSS for a Futuristic, Dark, and Neon Aesthetic (ONLY DARK MODE) ---
-# This CSS is identical to the one in your main dashboard for consistency
-st.markdown(
-    """
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;700&display=swap');
-    @import url('https://fonts.googleapis.com/css2?family=Share+Tech+Mono&display=swap');
-
-    /* Ensure html and body take full height and prevent scrollbars */
-    html, body {
-        height: 100%;
-        margin: 0;
-        padding: 0;
-        overflow-x: hidden; /* Prevent horizontal scrollbar */
-    }
+# --- Render Profiling ---
+rerun_section = begin_rerun("dpp_logger") # Stopped at the end of the script; see profiler.py
+start_metrics() # Prometheus exporter (see metrics.py); also marks this session as active
 
-    /* CSS Variables for a consistent Neon Dark Theme */
-    :root {
-        --neon-blue: #00F0FF;          /* Primary neon highlight */
-        --neon-purple: #9D00FF;        /* Secondary neon highlight */
-        --neon-green: #39FF14;         /* Tertiary neon for success/alerts */
-        --neon-orange: #FF9900;        /* Warning/pending status neon */
-        --neon-yellow: #FFD700;        /* Accent glow */
-
-        --dark-bg-deep: #05050A;       /* Very dark background for the page */
-        --dark-bg-gradient-start: #1A0033; /* Dark purple for gradient */
-        --dark-bg-gradient-end: #000A1A;   /* Dark blue for gradient */
-        --card-bg: #1B1B25;            /* Background for cards and components */
-        --sidebar-bg: #101015;         /* Slightly different dark for sidebar */
-
-        --text-primary: #E0E0FF;       /* Light, slightly blue-ish text */
-        --text-secondary: #A0A0B0;     /* Greyish text for descriptions */
-        --border-color: #303040;       /* Subtle dark border */
-        --divider-color: #202028;      /* Even darker for dividers */
-    }
-
-    /* Apply dark background to the entire page */
-    body {
-        background: linear-gradient(135deg, var(--dark-bg-gradient-start), var(--dark-bg-deep), var(--dark-bg-gradient-end));
-        background-attachment: fixed; /* Ensures gradient covers full background without scrolling */
-        color: var(--text-primary);
-        font-family: 'Share Tech Mono', monospace; /* Monospaced for futuristic feel */
-        line-height: 1.6;
-    }
-
-    /* Ensure Streamlit app container is transparent to show body background */
-    .stApp {
-        background-color: transparent;
-    }
-
-    /* Headers with Orbitron font and neon glow */
-    h1, h2, h3, h4, h5, h6 {
-        font-family: 'Orbitron', sans-serif;
-        color: var(--neon-blue);
-        text-shadow: 0 0 8px var(--neon-blue), 0 0 15px rgba(0, 240, 255, 0.4); /* Stronger neon glow */
-        margin-top: 1.5em;
-        margin-bottom: 0.8em;
-        letter-spacing: 0.05em; /* Add slight spacing */
-    }
-    h1 { font-size: 2.8em; }
-    h2 { font-size: 2.2em; }
-    h3 { font-size: 1.8em; }
-
-    /* Streamlit components styling */
-    .stSidebar {
-        background-color: var(--sidebar-bg);
-        border-right: 1px solid var(--border-color);
-        padding-top: 2rem;
-        box-shadow: 2px 0 15px rgba(0, 240, 255, 0.3); /* Stronger glow */
-    }
-
-    .stButton>button {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep); /* Dark text on bright button */
-        border-radius: 8px;
-        padding: 0.8em 1.5em; /* Larger padding */
-        font-size: 1.05em;
-        font-weight: 700;
-        transition: all 0.3s ease-in-out;
-        border: none;
-        box-shadow: 0 0 10px var(--neon-blue), 0 0 20px rgba(0, 240, 255, 0.6); /* Pronounced glow */
-        text-transform: uppercase;
-        font-family: 'Orbitron', sans-serif;
-    }
-    .stButton>button:hover {
-        background-color: var(--neon-purple); /* Change color on hover */
-        box-shadow: 0 0 15px var(--neon-purple), 0 0 25px rgba(157, 0, 255, 0.7); /* Change glow color */
-        transform: translateY(-4px) scale(1.03); /* More pronounced lift and scale */
-    }
-    .stButton>button[kind="secondary"] {
-        background-color: var(--card-bg);
-        color: var(--neon-blue);
-        border: 1px solid var(--neon-blue);
-        box-shadow: 0 0 7px rgba(0, 240, 255, 0.2);
-    }
-    .stButton>button[kind="secondary"]:hover {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        transform: none; /* No lift for secondary hover */
-        box-shadow: 0 0 10px var(--neon-blue), 0 0 20px rgba(0, 240, 255, 0.6);
-    }
-
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 15px; /* Increased gap */
-        justify-content: center;
-        border-bottom: 2px solid var(--divider-color); /* Subtle divider */
-    }
-
-    .stTabs [data-baseweb="tab"] {
-        height: 60px; /* Taller tabs */
-        background-color: var(--card-bg);
-        border-radius: 10px 10px 0 0;
-        padding: 15px 30px;
-        transition: all 0.3s ease-in-out;
-        font-weight: 700;
-        color: var(--text-secondary);
-        border: 1px solid var(--border-color);
-        border-bottom: none;
-        text-transform: uppercase;
-        font-family: 'Orbitron', sans-serif;
-        box-shadow: 0 -3px 10px rgba(0, 240, 255, 0.1); /* Subtle top glow */
-    }
-    .stTabs [data-baseweb="tab"]:hover {
-        background-color: #2A2A3A;
-        color: var(--neon-blue);
-        box-shadow: 0 -3px 12px var(--neon-blue), 0 -3px 25px rgba(0, 240, 255, 0.5);
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        border-bottom: 5px solid var(--neon-blue);
-        border-top: 2px solid var(--neon-blue);
-        box-shadow: 0 0 20px var(--neon-blue), 0 0 35px rgba(0, 240, 255, 0.8);
-        transform: translateY(-3px); /* More pronounced lift */
-    }
-
-    .stMetric {
-        background-color: var(--card-bg);
-        padding: 2rem; /* More padding */
-        border-radius: 18px; /* More rounded */
-        border: 1px solid var(--border-color);
-        box-shadow: 0 0 12px rgba(157, 0, 255, 0.2); /* Purple glow for metrics */
-        margin-bottom: 2rem;
-        transition: transform 0.4s ease-in-out, box-shadow 0.4s ease-in-out;
-        text-align: center;
-    }
-    .stMetric:hover {
-        transform: translateY(-10px); /* Greater lift */
-        box-shadow: 0 0 20px var(--neon-purple), 0 0 30px rgba(157, 0, 255, 0.6);
-    }
-    .stMetric>div>div:first-child { /* Metric label */
-        color: var(--text-secondary);
-        font-size: 1.15em;
-        font-family: 'Share Tech Mono', monospace;
-        margin-bottom: 0.5em;
-    }
-    .stMetric>div>div:nth-child(2) { /* Metric value */
-        color: var(--neon-yellow); /* Gold/Yellow for main value */
-        font-size: 3em; /* Much larger value */
-        font-family: 'Orbitron', sans-serif;
-        text-shadow: 0 0 8px var(--neon-yellow), 0 0 15px rgba(255, 215, 0, 0.6);
-        line-height: 1; /* Adjust line height */
-    }
-    .stMetric>div>div:last-child { /* Metric delta */
-        color: var(--neon-green); /* Green for positive deltas */
-        font-size: 1em;
-        font-weight: bold;
-    }
-
-
-    .stAlert {
-        border-radius: 12px;
-        font-size: 1em;
-        margin-bottom: 1.8rem;
-        background-color: var(--card-bg);
-        border: 1px solid;
-        color: var(--text-primary);
-        box-shadow: 0 0 10px rgba(0, 240, 255, 0.15);
-        padding: 1rem 1.5rem;
-    }
-    .stAlert.st-emotion-cache-1f81n9p { /* Streamlit success alert */
-        background-color: #0A251E; /* Dark emerald */
-        color: var(--neon-green);
-        border-color: var(--neon-green);
-        box-shadow: 0 0 12px rgba(57, 255, 20, 0.4);
-    }
-    .stAlert.st-emotion-cache-1f81n9p p { color: var(--neon-green); } /* Text within success alert */
-
-    .stAlert.st-emotion-cache-1j0080z { /* Streamlit error alert */
-        background-color: #330000; /* Dark red */
-        color: #FF4B4B;
-        border-color: #FF4B4B;
-        box-shadow: 0 0 12px rgba(255, 75, 75, 0.4);
-    }
-    .stAlert.st-emotion-cache-1j0080z p { color: #FF4B4B; } /* Text within error alert */
-
-    .stAlert.st-emotion-cache-1e74g6b { /* Streamlit warning alert */
-        background-color: #332000; /* Dark orange */
-        color: var(--neon-orange);
-        border-color: var(--neon-orange);
-        box-shadow: 0 0 12px rgba(255, 153, 0, 0.4);
-    }
-    .stAlert.st-emotion-cache-1e74g6b p { color: var(--neon-orange); } /* Text within warning alert */
-
-    /* Input widgets styling */
-    .stTextInput>div>div>input, .stSelectbox>div>div>div>div, .stTextArea>div>div, .stNumberInput>div>div>input {
-        background-color: #2A2A3A; /* Darker input background */
-        border: 1px solid var(--border-color);
-        border-radius: 8px;
-        color: var(--text-primary);
-        padding: 0.7em 1em;
-        font-size: 0.95em;
-        box-shadow: inset 0 0 5px rgba(0, 240, 255, 0.1); /* Inner glow */
-        transition: all 0.2s ease;
-    }
-    .stTextInput>div>div>input:focus, .stSelectbox>div>div>div>div:focus, .stTextArea>div>div:focus-within, .stNumberInput>div>div>input:focus {
-        border-color: var(--neon-blue);
-        box-shadow: inset 0 0 8px var(--neon-blue), 0 0 5px var(--neon-blue); /* Stronger focus glow */
-        outline: none;
-    }
-
-    /* Slider styling */
-    .stSlider>div>div>div:nth-child(1) { /* Track background */
-        background: var(--border-color);
-    }
-    .stSlider>div>div>div:nth-child(2) { /* Filled track */
-        background: var(--neon-blue);
-    }
-    .stSlider [data-testid="stThumbValue"] { /* Value label above thumb */
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        border-radius: 5px;
-        padding: 2px 8px;
-        font-weight: bold;
-    }
-
-    /* Dataframe styling */
-    .stDataFrame {
-        border: 1px solid var(--border-color);
-        border-radius: 12px;
-        overflow: hidden;
-        box-shadow: 0 0 15px rgba(0, 240, 255, 0.1);
-    }
-
-    .stDataFrame .ag-header-cell-label {
-        color: var(--neon-blue); /* Header text color */
-        font-family: 'Orbitron', sans-serif;
-        font-size: 0.9em;
-        text-transform: uppercase;
-    }
-    .stDataFrame .ag-theme-streamlit {
-        --ag-background-color: var(--card-bg);
-        --ag-odd-row-background-color: #20202A; /* Slightly lighter for odd rows */
-        --ag-row-hover-background-color: #303040;
-        --ag-border-color: var(--divider-color);
-        --ag-data-color: var(--text-primary);
-        --ag-font-family: 'Share Tech Mono', monospace;
-        --ag-selected-row-background-color: #003344; /* Darker blue when selected */
-    }
-
-    /* Information boxes */
-    .stAlert.st-emotion-cache-12fmw13 { /* Streamlit info alert */
-        background-color: #101525;
-        color: var(--neon-blue);
-        border-color: var(--neon-blue);
-        box-shadow: 0 0 12px rgba(0, 240, 255, 0.4);
-    }
-    .stAlert.st-emotion-cache-12fmw13 p { color: var(--neon-blue); }
-
-    /* Markdown elements */
-    p {
-        color: var(--text-primary);
-    }
-    a {
-        color: var(--neon-blue);
-        text-decoration: none;
-    }
-    a:hover {
-        text-decoration: underline;
-    }
-
-    /* Centering content within columns */
-    .st-emotion-cache-ocqkz7 {
-        display: flex;
-        flex-direction: column;
-        align-items: center;
-        text-align: center;
-    }
-    .st-emotion-cache-ocqkz7 .stMetric {
-        width: 100%; /* Ensure metric takes full width of its column */
-    }
-
-    /* General containers/blocks */
-    .st-emotion-cache-h5rg5t, .st-emotion-cache-10qadwd, .st-emotion-cache-1p1fspc { /* These are common Streamlit containers */
-        background-color: var(--card-bg);
-        padding: 2rem;
-        border-radius: 15px;
-        border: 1px solid var(--border-color);
-        box-shadow: 0 0 15px rgba(157, 0, 255, 0.15); /* Soft purple glow for general cards */
-        margin-bottom: 2rem;
-    }
-
-    /* Specific adjustments for plotly charts to match theme */
-    .js-plotly-plot {
-        border-radius: 12px;
-        overflow: hidden;
-        box-shadow: 0 0 15px rgba(0, 240, 255, 0.15);
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+# --- Custom CSS for a Futuristic, Dark, and Neon Aesthetic (ONLY DARK MODE) ---
+apply_theme() # Shared, minified stylesheet with self-hosted fonts (see theme/)
 
 # --- Database Functions ---
 
-@st.cache_resource
+@cache_resource
 def get_connection():
     """Establishes and returns a SQLite database connection.
     This connection is cached and reused across Streamlit reruns.
     """
     try:
-        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+        conn = traced_connect(DB_FILE, check_same_thread=False)
         conn.row_factory = sqlite3.Row  # Access columns by name
         app_logger.info(f"Successfully connected to database: {DB_FILE}")
         return conn
@@ -361,25 +70,11 @@ def get_connection():
         return None
 
 def create_dpp_log_table(conn):
-    """Creates the dpp_log table if it doesn't already exist."""
+    """Creates the dpp_log table if it doesn't already exist (migrating an older schema)."""
     if conn is None:
         return False
     try:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS dpp_log (
-                ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                Date TEXT NOT NULL,
-                Subject TEXT NOT NULL,
-                Chapter TEXT NOT NULL,
-                DPP_Number TEXT NOT NULL,
-                Score INTEGER NOT NULL,
-                Accuracy INTEGER NOT NULL,
-                Time_Taken INTEGER NOT NULL,
-                Notes TEXT,
-                UNIQUE(Date, Subject, Chapter, DPP_Number)
-            );
-        """)
-        conn.commit()
+        ensure_schema(conn, DB_FILE)
         app_logger.info("DPP log table ensured.")
         return True
     except sqlite3.Error as e:
@@ -387,15 +82,14 @@ def create_dpp_log_table(conn):
         app_logger.exception("Failed to create dpp_log table.")
         return False
 
-@st.cache_data(ttl=300) # Cache data for 5 minutes
-def load_dpp_logs(_conn):
-    """Loads all DPP logs from the database into a Pandas DataFrame."""
+@profiled("dpp_logger/load_dpp_logs")
+@cache_data(ttl=300) # Cache data for 5 minutes
+def load_dpp_logs(_conn, columns=None):
+    """Loads all DPP logs (optionally only some columns) from the typed Parquet snapshot of the table."""
     if _conn is None:
         return pd.DataFrame()
     try:
-        df = pd.read_sql("SELECT * FROM dpp_log ORDER BY Date DESC, ID DESC", _conn)
-        if not df.empty:
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+        df = read_dpp_logs(DB_FILE, columns)
         app_logger.info("DPP logs loaded successfully.")
         return df
     except Exception as e:
@@ -403,6 +97,17 @@ def load_dpp_logs(_conn):
         app_logger.exception("Failed to load DPP logs.")
         return pd.DataFrame()
 
+@profiled("dpp_logger/load_dpp_history")
+@cache_data(ttl=300) # Cache data for 5 minutes
+def load_dpp_history(columns=None):
+    """Loads the DPP logs of every year, including those moved to the archive files (see archive.py)."""
+    try:
+        return load_history(DB_FILE, "dpp_log", columns=columns, order_by=DPP_LOG_ORDER, prepare=prepare_dpp_logs)
+    except Exception as e:
+        st.error(f"🚨 Error loading archived DPP logs: {e}")
+        app_logger.exception("Failed to load archived DPP logs.")
+        return pd.DataFrame()
+
 def insert_dpp_log(conn, dpp_data):
     """Inserts a new DPP log entry into the database."""
     if conn is None:
@@ -481,11 +186,25 @@ def validate_dpp_inputs(score, accuracy, time_taken, chapter, dpp_number):
         return False
     return True
 
+def filtered_dpp_logs_query(subject, log_date, search_query):
+    """Builds the SQL and parameters matching the Manage tab's filters (for exports)."""
+    clauses, params = [], []
+    if subject != "All":
+        clauses.append("Subject = ?")
+        params.append(subject)
+    if log_date != "All":
+        clauses.append("Date = ?")
+        params.append(to_epoch_day(log_date))
+    if search_query:
+        clauses.append("(instr(lower(Chapter), ?) OR instr(lower(DPP_Number), ?) OR instr(lower(COALESCE(Notes, '')), ?))")
+        params += [search_query.lower()] * 3
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT {readable_select('dpp_log')} FROM dpp_log{where} ORDER BY Date DESC, ID DESC", params
+
 def clear_caches_and_rerun():
     """Clears Streamlit caches and reruns the app."""
-    st.cache_data.clear()
-    st.cache_resource.clear()
-    st.rerun()
+    clear_caches()
+    rerun_page()
 
 # --- Streamlit UI ---
 
@@ -496,13 +215,13 @@ st.markdown("Track your Daily Practice Problems performance with ease and visual
 conn = get_connection()
 
 # Ensure database table exists
-if conn is None or not create_dpp_log_table(conn):
-    st.stop() # Stop if connection or table creation fails
+if conn is None or not create_dpp_log_table(conn) or not create_review_state_table(conn):
+    stop_page() # Stop if connection or table creation fails
 
 # --- Sidebar for Navigation/Quick Actions ---
 with st.sidebar:
     st.header("⚡ Quick Actions")
-    st.image("https://images.unsplash.com/photo-1510531704581-5b97826359de?q=80&w=2070&auto=format&fit=crop&ixlib=rb-4.0.3&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D", use_column_width=True, caption="Stay focused, stay productive!")
+    sidebar_image("dpp_logger", caption="Stay focused, stay productive!")
     st.info("💡 Tip: Navigate between tabs to log, manage, and analyze your DPPs.")
     if st.button("🔄 Refresh All Data", help="Clear data cache and reload all DPP entries. Useful after manual DB changes."):
         clear_caches_and_rerun()
@@ -520,7 +239,10 @@ with st.sidebar:
 # --- Main Content Tabs ---
 tab1, tab2, tab3 = st.tabs(["➕ Log New DPP", "📚 View & Manage DPPs", "📈 Analytics & Insights"])
 
-with tab1:
+@st.fragment
+@profiled("dpp_logger/tab_log")
+def render_log_dpp_tab():
+    """Renders the Log New DPP tab."""
     st.header("✨ Log Your Daily Practice Problem")
     st.markdown("Record your performance after completing a DPP. Detailed logs lead to better insights!")
 
@@ -530,7 +252,7 @@ with tab1:
         with col_date:
             dpp_date = st.date_input("🗓️ **DPP Date**", date.today(), help="Select the date you completed this DPP.")
         with col_subject:
-            subject = st.selectbox("📚 **Subject**", ["Physics", "Chemistry", "Maths", "Biology", "Others"], help="Choose the subject of this DPP.")
+            subject = st.selectbox("📚 **Subject**", list(DPP_SUBJECTS), help="Choose the subject of this DPP.")
 
         col_chap, col_dpp_num = st.columns(2)
         with col_chap:
@@ -554,15 +276,20 @@ with tab1:
 
         if submitted:
             if validate_dpp_inputs(score, accuracy, time_taken, chapter, dpp_number):
-                dpp_row_data = (str(dpp_date), subject.strip(), chapter.strip(),
+                dpp_row_data = (to_epoch_day(dpp_date), subject.strip(), chapter.strip(),
                                  dpp_number.strip(), score, accuracy, time_taken, notes.strip())
                 if insert_dpp_log(conn, dpp_row_data):
+                    record_dpp_review(conn, dpp_date, subject.strip(), chapter.strip(), accuracy, time_taken)
+                    get_reminder_service(DB_FILE).reload_reviews()
                     st.success("🎉 DPP logged successfully! Check 'View & Manage DPPs' tab.")
                     clear_caches_and_rerun()
                 else:
                     st.error("Please correct the input errors above.")
 
-with tab2:
+@st.fragment
+@profiled("dpp_logger/tab_manage")
+def render_manage_dpps_tab():
+    """Renders the View & Manage DPPs tab."""
     st.header("📋 Your DPP History")
     st.markdown("Easily review, filter, edit, or delete your past DPP entries. Keep your records organized!")
 
@@ -581,20 +308,22 @@ with tab2:
         with col_search_text:
             search_query = st.text_input("Search (Chapter, DPP No., Notes)", placeholder="e.g., optics, DPP 05, errors", key="search_query")
 
-        filtered_df = df_logs.copy()
-        if selected_subject != "All":
-            filtered_df = filtered_df[filtered_df["Subject"] == selected_subject]
-        if selected_date != "All":
-            filtered_df = filtered_df[filtered_df["Date"].dt.date == selected_date]
-        if search_query:
-            search_query_lower = search_query.lower()
-            filtered_df = filtered_df[
-                filtered_df.apply(lambda row:
-                    search_query_lower in str(row["Chapter"]).lower() or
-                    search_query_lower in str(row["DPP_Number"]).lower() or
-                    search_query_lower in str(row["Notes"]).lower(), axis=1
-                )
-            ]
+        with profile_section("dpp_logger/filter") as section:
+            filtered_df = df_logs.copy()
+            if selected_subject != "All":
+                filtered_df = filtered_df[filtered_df["Subject"] == selected_subject]
+            if selected_date != "All":
+                filtered_df = filtered_df[filtered_df["Date"].dt.date == selected_date]
+            if search_query:
+                search_query_lower = search_query.lower()
+                filtered_df = filtered_df[
+                    filtered_df.apply(lambda row:
+                        search_query_lower in str(row["Chapter"]).lower() or
+                        search_query_lower in str(row["DPP_Number"]).lower() or
+                        search_query_lower in str(row["Notes"]).lower(), axis=1
+                    )
+                ]
+            section.rows = len(filtered_df)
 
         if filtered_df.empty:
             st.warning("No DPPs match your current filters. Try adjusting your selections.")
@@ -602,13 +331,10 @@ with tab2:
             st.subheader(f"📊 Displaying {len(filtered_df)} Matching DPP Entry(s)")
             st.dataframe(filtered_df.set_index("ID"), use_container_width=True, height=350)
 
-            st.download_button(
-                label="📥 Download Filtered Data as CSV",
-                data=filtered_df.to_csv(index=False).encode('utf-8'),
-                file_name=f"dpp_logs_filtered_{date.today().strftime('%Y%m%d')}.csv",
-                mime="text/csv",
-                help="Download the currently filtered DPP entries as a CSV file."
-            )
+            # The file is streamed from SQLite only when an export is requested, not on every rerun
+            export_sql, export_params = filtered_dpp_logs_query(selected_subject, selected_date, search_query)
+            render_export_controls("dpp_export", DB_FILE, export_sql, export_params,
+                                   base_name=f"dpp_logs_filtered_{date.today().strftime('%Y%m%d')}", table="dpp_log")
 
             st.markdown("---")
             col_edit, col_delete = st.columns(2)
@@ -625,7 +351,7 @@ with tab2:
                         with st.form(f"edit_form_{selected_edit_id}"):
                             st.markdown(f"**Editing Entry ID: {selected_edit_id}**")
                             e_date = st.date_input("Date", value=entry_to_edit["Date"].date())
-                            e_subject = st.selectbox("Subject", ["Physics","Chemistry","Maths","Biology","Others"], index=["Physics","Chemistry","Maths","Biology","Others"].index(entry_to_edit["Subject"]))
+                            e_subject = st.selectbox("Subject", list(DPP_SUBJECTS), index=DPP_SUBJECTS.index(entry_to_edit["Subject"]))
                             e_chapter = st.text_input("Chapter Name", value=entry_to_edit["Chapter"])
                             e_dpp_num = st.text_input("DPP Number", value=entry_to_edit["DPP_Number"])
                             e_score = st.number_input("Score", min_value=0, max_value=100, value=int(entry_to_edit["Score"]))
@@ -636,9 +362,11 @@ with tab2:
                             update_button = st.form_submit_button("🔄 Update Entry", type="primary", use_container_width=True)
                             if update_button:
                                 if validate_dpp_inputs(e_score, e_accuracy, e_time_taken, e_chapter, e_dpp_num):
-                                    updated_data = (str(e_date), e_subject.strip(), e_chapter.strip(),
+                                    updated_data = (to_epoch_day(e_date), e_subject.strip(), e_chapter.strip(),
                                                      e_dpp_num.strip(), e_score, e_accuracy, e_time_taken, e_notes.strip())
                                     if update_dpp_log(conn, selected_edit_id, updated_data):
+                                        rebuild_review_state(conn)
+                                        get_reminder_service(DB_FILE).reload_reviews()
                                         st.success(f"🎉 Entry ID {selected_edit_id} updated successfully!")
                                         clear_caches_and_rerun()
 
@@ -655,19 +383,26 @@ with tab2:
                             confirm_delete_btn = st.button("🚨 Confirm Deletion", type="primary", key="confirm_del_btn")
                             if confirm_delete_btn:
                                 if delete_dpp_log(conn, selected_delete_id):
+                                    rebuild_review_state(conn)
+                                    get_reminder_service(DB_FILE).reload_reviews()
                                     st.success(f"🗑️ Entry ID {selected_delete_id} deleted.")
                                     clear_caches_and_rerun()
 
-with tab3:
+@st.fragment
+@profiled("dpp_logger/tab_analytics")
+def render_analytics_tab():
+    """Renders the Analytics & Insights tab."""
     st.header("📈 Your Performance Analytics")
     st.markdown("Gain insights from your DPP data. Identify strengths, weaknesses, and track your progress over time.")
 
-    df_logs_analysis = load_dpp_logs(_conn=conn)
+    include_archive = bool(list_archives(DB_FILE)) and st.toggle("🗄️ Include archived years", key="dpp_include_archive",
+                                                                  help="Also analyse DPPs moved to the per-year archive files.")
+    df_logs_analysis = (load_dpp_history(columns=ANALYTICS_COLUMNS) if include_archive
+                        else load_dpp_logs(_conn=conn, columns=ANALYTICS_COLUMNS))
 
     if df_logs_analysis.empty:
         st.info("No data available for analytics. Please add some DPP logs first in the 'Log New DPP' tab!")
     else:
-        df_logs_analysis['Date'] = pd.to_datetime(df_logs_analysis['Date'])
         df_logs_analysis = df_logs_analysis.sort_values(by='Date')
 
         st.subheader("📊 Overall Performance Summary")
@@ -742,4 +477,35 @@ with tab3:
                                          labels={'Time_Taken': 'Time Taken (minutes)'},
                                          color_discrete_sequence=['#ff6347'])
             fig_hist_time.update_layout(title_x=0.5)
-            st.plotly_chart(fig_hist_time, use_container_width=True)
\ No newline at end of file
+            st.plotly_chart(fig_hist_time, use_container_width=True)
+
+        st.markdown("---")
+        st.subheader("🧠 Spaced-Repetition Reviews")
+        horizon_days = st.slider("Include reviews due within (days)", 0, 14, 0, key="review_horizon_days")
+        due_reviews = load_due_reviews(conn, date.today(), horizon_days)
+        if due_reviews.empty:
+            st.info("No chapters are due for review. Keep logging DPPs to build your revision plan!")
+        else:
+            st.dataframe(
+                due_reviews[['Subject', 'Chapter', 'DueDate', 'OverdueDays', 'IntervalDays', 'Ease', 'Lapses']].round(2),
+                use_container_width=True, hide_index=True
+            )
+            if st.button("🗓️ Add Due Reviews to Study Planner", help="Creates a study task for each due review. Existing review tasks are not duplicated."):
+                created = generate_review_tasks(conn, date.today(), horizon_days)
+                get_reminder_service(DB_FILE).load() # Picks up the new review tasks
+                reload_task_queue(DB_FILE)
+                st.success(f"🎉 {created} review task(s) added to the Study Planner.")
+                clear_caches_and_rerun()
+
+# Each tab is a fragment, so interacting with one tab doesn't recompute the others.
+with tab1:
+    render_log_dpp_tab()
+with tab2:
+    render_manage_dpps_tab()
+with tab3:
+    render_analytics_tab()
+
+render_profiler_panel()
+render_sql_trace_panel()
+render_cache_panel()
+rerun_section.stop()
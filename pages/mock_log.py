@@ -3,15 +3,26 @@ import pandas as pd
 import sqlite3
 from datetime import date, datetime, timedelta
 import os
-import plotly.express as px
-import plotly.graph_objects as go
 import hashlib
-from sklearn.ensemble import RandomForestRegressor
-import numpy as np
-import altair as alt
 import random
 import time
 import logging
+from study_allocator import allocate_study_hours, allocation_to_tasks
+from task_queue import reload_task_queue
+from reminders import get_reminder_service
+from lazy_imports import lazy_import
+from theme import apply_theme
+from profiler import begin_rerun, profiled, render_profiler_panel, rerun_page
+from sql_trace import render_sql_trace_panel, traced_connect
+from cache_telemetry import cache_data, cache_resource, render_cache_panel
+from metrics import AI_NEXUS_SECONDS, start_metrics
+from loaders import MOCK_TEST_RESULTS_ORDER, prepare_mock_test_results, read_mock_test_results
+from archive import list_archives, load_history
+from db_schema import ensure_schema, to_epoch_day, to_epoch_seconds
+from legacy_import import ensure_legacy_import
+
+px = lazy_import("plotly.express") # Loaded on the first chart, not on every cold start
+go = lazy_import("plotly.graph_objects")
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,6 +31,7 @@ app_logger = logging.getLogger(__name__)
 # --- Configuration for Comprehensive Exam Prep (Single User: rmj) ---
 APP_NAME = "Apex Cogni-Synth: Quantum Prep Nexus (JEE, IAT, NEST Edition - rmj's)"
 DB_FILE_MOCK_TESTS = "cognisynth_data_rmj.db" # Specific DB for rmj's data
+PLANNER_DB_FILE = "study_data.db" # Study Planner DB, target for generated weekly focus tasks
 
 # Hardcoded user details for 'rmj'
 USER_ID_RMJ = 1
@@ -88,318 +100,12 @@ st.set_page_config(
     }
 )
 
-# --- Custom CSS for a Futuristic, Dark, and Neon Aesthetic (ONLY DARK MODE) ---
-# This CSS is consistent with the main dashboard for a unified look
-st.markdown(
-    """
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;700&display=swap');
-    @import url('https://fonts.googleapis.com/css2?family=Share+Tech+Mono&display=swap');
-
-    /* Ensure html and body take full height and prevent scrollbars */
-    html, body {
-        height: 100%;
-        margin: 0;
-        padding: 0;
-        overflow-x: hidden; /* Prevent horizontal scrollbar */
-    }
-
-    /* CSS Variables for a consistent Neon Dark Theme */
-    :root {
-        --neon-blue: #00F0FF;          /* Primary neon highlight */
-        --neon-purple: #9D00FF;        /* Secondary neon highlight */
-        --neon-green: #39FF14;         /* Tertiary neon for success/alerts */
-        --neon-orange: #FF9900;        /* Warning/pending status neon */
-        --neon-yellow: #FFD700;        /* Accent glow */
-
-        --dark-bg-deep: #05050A;       /* Very dark background for the page */
-        --dark-bg-gradient-start: #1A0033; /* Dark purple for gradient */
-        --dark-bg-gradient-end: #000A1A;   /* Dark blue for gradient */
-        --card-bg: #1B1B25;            /* Background for cards and components */
-        --sidebar-bg: #101015;         /* Slightly different dark for sidebar */
-
-        --text-primary: #E0E0FF;       /* Light, slightly blue-ish text */
-        --text-secondary: #A0A0B0;     /* Greyish text for descriptions */
-        --border-color: #303040;       /* Subtle dark border */
-        --divider-color: #202028;      /* Even darker for dividers */
-    }
-
-    /* Apply dark background to the entire page */
-    body {
-        background: linear-gradient(135deg, var(--dark-bg-gradient-start), var(--dark-bg-deep), var(--dark-bg-gradient-end));
-        background-attachment: fixed; /* Ensures gradient covers full background without scrolling */
-        color: var(--text-primary);
-        font-family: 'Share Tech Mono', monospace; /* Monospaced for futuristic feel */
-        line-height: 1.6;
-    }
-
-    /* Ensure Streamlit app container is transparent to show body background */
-    .stApp {
-        background-color: transparent;
-    }
-
-    /* Headers with Orbitron font and neon glow */
-    h1, h2, h3, h4, h5, h6 {
-        font-family: 'Orbitron', sans-serif;
-        color: var(--neon-blue);
-        text-shadow: 0 0 8px var(--neon-blue), 0 0 15px rgba(0, 240, 255, 0.4); /* Stronger neon glow */
-        margin-top: 1.5em;
-        margin-bottom: 0.8em;
-        letter-spacing: 0.05em; /* Add slight spacing */
-    }
-    h1 { font-size: 2.8em; }
-    h2 { font-size: 2.2em; }
-    h3 { font-size: 1.8em; }
-
-    /* Streamlit components styling */
-    .stSidebar {
-        background-color: var(--sidebar-bg);
-        border-right: 1px solid var(--border-color);
-        padding-top: 2rem;
-        box-shadow: 2px 0 15px rgba(0, 240, 255, 0.3); /* Stronger glow */
-    }
-
-    .stButton>button {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep); /* Dark text on bright button */
-        border-radius: 8px;
-        padding: 0.8em 1.5em; /* Larger padding */
-        font-size: 1.05em;
-        font-weight: 700;
-        transition: all 0.3s ease-in-out;
-        border: none;
-        box-shadow: 0 0 10px var(--neon-blue), 0 0 20px rgba(0, 240, 255, 0.6); /* Pronounced glow */
-        text-transform: uppercase;
-        font-family: 'Orbitron', sans-serif;
-    }
-    .stButton>button:hover {
-        background-color: var(--neon-purple); /* Change color on hover */
-        box-shadow: 0 0 15px var(--neon-purple), 0 0 25px rgba(157, 0, 255, 0.7); /* Change glow color */
-        transform: translateY(-4px) scale(1.03); /* More pronounced lift and scale */
-    }
-    .stButton>button[kind="secondary"] {
-        background-color: var(--card-bg);
-        color: var(--neon-blue);
-        border: 1px solid var(--neon-blue);
-        box-shadow: 0 0 7px rgba(0, 240, 255, 0.2);
-    }
-    .stButton>button[kind="secondary"]:hover {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        transform: none; /* No lift for secondary hover */
-        box-shadow: 0 0 10px var(--neon-blue), 0 0 20px rgba(0, 240, 255, 0.6);
-    }
-
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 15px; /* Increased gap */
-        justify-content: center;
-        border-bottom: 2px solid var(--divider-color); /* Subtle divider */
-    }
-
-    .stTabs [data-baseweb="tab"] {
-        height: 60px; /* Taller tabs */
-        background-color: var(--card-bg);
-        border-radius: 10px 10px 0 0;
-        padding: 15px 30px;
-        transition: all 0.3s ease-in-out;
-        font-weight: 700;
-        color: var(--text-secondary);
-        border: 1px solid var(--border-color);
-        border-bottom: none;
-        text-transform: uppercase;
-        font-family: 'Orbitron', sans-serif;
-        box-shadow: 0 -3px 10px rgba(0, 240, 255, 0.1); /* Subtle top glow */
-    }
-    .stTabs [data-baseweb="tab"]:hover {
-        background-color: #2A2A3A;
-        color: var(--neon-blue);
-        box-shadow: 0 -3px 12px var(--neon-blue), 0 -3px 25px rgba(0, 240, 255, 0.5);
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        border-bottom: 5px solid var(--neon-blue);
-        border-top: 2px solid var(--neon-blue);
-        box-shadow: 0 0 20px var(--neon-blue), 0 0 35px rgba(0, 240, 255, 0.8);
-        transform: translateY(-3px); /* More pronounced lift */
-    }
-
-    .stMetric {
-        background-color: var(--card-bg);
-        padding: 2rem; /* More padding */
-        border-radius: 18px; /* More rounded */
-        border: 1px solid var(--border-color);
-        box-shadow: 0 0 12px rgba(157, 0, 255, 0.2); /* Purple glow for metrics */
-        margin-bottom: 2rem;
-        transition: transform 0.4s ease-in-out, box-shadow 0.4s ease-in-out;
-        text-align: center;
-    }
-    .stMetric:hover {
-        transform: translateY(-10px); /* Greater lift */
-        box-shadow: 0 0 20px var(--neon-purple), 0 0 30px rgba(157, 0, 255, 0.6);
-    }
-    .stMetric>div>div:first-child { /* Metric label */
-        color: var(--text-secondary);
-        font-size: 1.15em;
-        font-family: 'Share Tech Mono', monospace;
-        margin-bottom: 0.5em;
-    }
-    .stMetric>div>div:nth-child(2) { /* Metric value */
-        color: var(--neon-yellow); /* Gold/Yellow for main value */
-        font-size: 3em; /* Much larger value */
-        font-family: 'Orbitron', sans-serif;
-        text-shadow: 0 0 8px var(--neon-yellow), 0 0 15px rgba(255, 215, 0, 0.6);
-        line-height: 1; /* Adjust line height */
-    }
-    .stMetric>div>div:last-child { /* Metric delta */
-        color: var(--neon-green); /* Green for positive deltas */
-        font-size: 1em;
-        font-weight: bold;
-    }
-
-
-    .stAlert {
-        border-radius: 12px;
-        font-size: 1em;
-        margin-bottom: 1.8rem;
-        background-color: var(--card-bg);
-        border: 1px solid;
-        color: var(--text-primary);
-        box-shadow: 0 0 10px rgba(0, 240, 255, 0.15);
-        padding: 1rem 1.5rem;
-    }
-    .stAlert.st-emotion-cache-1f81n9p { /* Streamlit success alert */
-        background-color: #0A251E; /* Dark emerald */
-        color: var(--neon-green);
-        border-color: var(--neon-green);
-        box-shadow: 0 0 12px rgba(57, 255, 20, 0.4);
-    }
-    .stAlert.st-emotion-cache-1f81n9p p { color: var(--neon-green); } /* Text within success alert */
-
-    .stAlert.st-emotion-cache-1j0080z { /* Streamlit error alert */
-        background-color: #330000; /* Dark red */
-        color: #FF4B4B;
-        border-color: #FF4B4B;
-        box-shadow: 0 0 12px rgba(255, 75, 75, 0.4);
-    }
-    .stAlert.st-emotion-cache-1j0080z p { color: #FF4B4B; } /* Text within error alert */
-
-    .stAlert.st-emotion-cache-1e74g6b { /* Streamlit warning alert */
-        background-color: #332000; /* Dark orange */
-        color: var(--neon-orange);
-        border-color: var(--neon-orange);
-        box-shadow: 0 0 12px rgba(255, 153, 0, 0.4);
-    }
-    .stAlert.st-emotion-cache-1e74g6b p { color: var(--neon-orange); } /* Text within warning alert */
-
-    /* Input widgets styling */
-    .stTextInput>div>div>input, .stSelectbox>div>div>div>div, .stTextArea>div>div, .stNumberInput>div>div>input {
-        background-color: #2A2A3A; /* Darker input background */
-        border: 1px solid var(--border-color);
-        border-radius: 8px;
-        color: var(--text-primary);
-        padding: 0.7em 1em;
-        font-size: 0.95em;
-        box-shadow: inset 0 0 5px rgba(0, 240, 255, 0.1); /* Inner glow */
-        transition: all 0.2s ease;
-    }
-    .stTextInput>div>div>input:focus, .stSelectbox>div>div>div>div:focus, .stTextArea>div>div:focus-within, .stNumberInput>div>div>input:focus {
-        border-color: var(--neon-blue);
-        box-shadow: inset 0 0 8px var(--neon-blue), 0 0 5px var(--neon-blue); /* Stronger focus glow */
-        outline: none;
-    }
-
-    /* Slider styling */
-    .stSlider>div>div>div:nth-child(1) { /* Track background */
-        background: var(--border-color);
-    }
-    .stSlider>div>div>div:nth-child(2) { /* Filled track */
-        background: var(--neon-blue);
-    }
-    .stSlider [data-testid="stThumbValue"] { /* Value label above thumb */
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        border-radius: 5px;
-        padding: 2px 8px;
-        font-weight: bold;
-    }
-
-    /* Dataframe styling */
-    .stDataFrame {
-        border: 1px solid var(--border-color);
-        border-radius: 12px;
-        overflow: hidden;
-        box-shadow: 0 0 15px rgba(0, 240, 255, 0.1);
-    }
-
-    .stDataFrame .ag-header-cell-label {
-        color: var(--neon-blue); /* Header text color */
-        font-family: 'Orbitron', sans-serif;
-        font-size: 0.9em;
-        text-transform: uppercase;
-    }
-    .stDataFrame .ag-theme-streamlit {
-        --ag-background-color: var(--card-bg);
-        --ag-odd-row-background-color: #20202A; /* Slightly lighter for odd rows */
-        --ag-row-hover-background-color: #303040;
-        --ag-border-color: var(--divider-color);
-        --ag-data-color: var(--text-primary);
-        --ag-font-family: 'Share Tech Mono', monospace;
-        --ag-selected-row-background-color: #003344; /* Darker blue when selected */
-    }
-
-    /* Information boxes */
-    .stAlert.st-emotion-cache-12fmw13 { /* Streamlit info alert */
-        background-color: #101525;
-        color: var(--neon-blue);
-        border-color: var(--neon-blue);
-        box-shadow: 0 0 12px rgba(0, 240, 255, 0.4);
-    }
-    .stAlert.st-emotion-cache-12fmw13 p { color: var(--neon-blue); }
-
-    /* Markdown elements */
-    p {
-        color: var(--text-primary);
-    }
-    a {
-        color: var(--neon-blue);
-        text-decoration: none;
-    }
-    a:hover {
-        text-decoration: underline;
-    }
-
-    /* Centering content within columns */
-    .st-emotion-cache-ocqkz7 {
-        display: flex;
-        flex-direction: column;
-        align-items: center;
-        text-align: center;
-    }
-    .st-emotion-cache-ocqkz7 .stMetric {
-        width: 100%; /* Ensure metric takes full width of its column */
-    }
-
-    /* General containers/blocks */
-    .st-emotion-cache-h5rg5t, .st-emotion-cache-10qadwd, .st-emotion-cache-1p1fspc { /* These are common Streamlit containers */
-        background-color: var(--card-bg);
-        padding: 2rem;
-        border-radius: 15px;
-        border: 1px solid var(--border-color);
-        box-shadow: 0 0 15px rgba(157, 0, 255, 0.15); /* Soft purple glow for general cards */
-        margin-bottom: 2rem;
-    }
+# --- Render Profiling ---
+rerun_section = begin_rerun("mock_log") # Stopped at the end of the script; see profiler.py
+start_metrics() # Prometheus exporter (see metrics.py); also marks this session as active
 
-    /* Specific adjustments for plotly charts to match theme */
-    .js-plotly-plot {
-        border-radius: 12px;
-        overflow: hidden;
-        box-shadow: 0 0 15px rgba(0, 240, 255, 0.15);
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+# --- Custom CSS for a Futuristic, Dark, and Neon Aesthetic (ONLY DARK MODE) ---
+apply_theme() # Shared, minified stylesheet with self-hosted fonts (see theme/)
 
 
 # --- Utility Functions ---
@@ -411,12 +117,12 @@ def generate_unique_id(user_id, assessment_date, domain, score):
     return hashlib.sha256(unique_string.encode()).hexdigest()
 
 # Context manager for database connection
-@st.cache_resource(ttl=3600) # Cache connection for 1 hour
+@cache_resource(ttl=3600) # Cache connection for 1 hour
 def get_db_connection_mock_tests():
     """Establishes and returns a SQLite database connection for mock tests."""
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE_MOCK_TESTS, check_same_thread=False)
+        conn = traced_connect(DB_FILE_MOCK_TESTS, check_same_thread=False)
         conn.row_factory = sqlite3.Row
         app_logger.info(f"Successfully connected to database: {DB_FILE_MOCK_TESTS}")
         return conn
@@ -426,39 +132,12 @@ def get_db_connection_mock_tests():
         return None
 
 def create_mock_test_table(conn):
-    """Creates the mock_test_results table if it doesn't already exist."""
+    """Creates the mock_test_results table if it doesn't already exist (migrating an older schema)."""
     if conn is None:
         return False
     try:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS mock_test_results (
-                id TEXT PRIMARY KEY,
-                user_id INTEGER,
-                assessment_date TEXT,
-                exam_type TEXT, -- Added exam_type column
-                test_name TEXT, -- Added test_name column
-                domain TEXT,
-                total_questions INTEGER, -- Added total_questions
-                attempted INTEGER, -- Added attempted
-                correct INTEGER, -- Added correct
-                wrong INTEGER, -- Added wrong
-                physics_score REAL, -- Added physics_score
-                chemistry_score REAL, -- Added chemistry_score
-                maths_score REAL, -- Added maths_score
-                biology_score REAL, -- Added biology_score
-                total_score INTEGER,
-                max_score_possible INTEGER, 
-                percentile REAL, -- Added percentile
-                rank INTEGER, -- Added rank
-                target_score REAL, -- Added target_score
-                difficulty TEXT,
-                time_taken_minutes INTEGER,
-                feedback TEXT,
-                neural_signature TEXT,
-                timestamp TEXT -- Added timestamp
-            )
-        """)
-        conn.commit()
+        ensure_schema(conn, DB_FILE_MOCK_TESTS)
+        ensure_legacy_import(DB_FILE_MOCK_TESTS) # Once per process: copies old cognitive_assessments rows in (see legacy_import.py)
         app_logger.info("Mock test results table ensured.")
         return True
     except sqlite3.Error as e:
@@ -486,11 +165,11 @@ def add_mock_test_result(conn, user_id, assessment_date, exam_type, test_name, d
                 difficulty, time_taken_minutes, feedback, neural_signature, timestamp
             )
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (test_id, user_id, assessment_date, exam_type, test_name, domain,
+        """, (test_id, user_id, to_epoch_day(assessment_date), exam_type, test_name, domain,
               total_questions, attempted, correct, wrong,
               physics_score, chemistry_score, maths_score, biology_score,
               total_score, max_score_possible, percentile, rank, target_score,
-              difficulty, time_taken_minutes, feedback, neural_signature, timestamp))
+              difficulty, time_taken_minutes, feedback, neural_signature, to_epoch_seconds(timestamp)))
         conn.commit()
         app_logger.info(f"Added mock test result: {test_name} ({exam_type}) on {assessment_date} with score {total_score}/{max_score_possible}")
         return True
@@ -499,48 +178,14 @@ def add_mock_test_result(conn, user_id, assessment_date, exam_type, test_name, d
         st.error(f"🚨 Error adding mock test result: {e}")
         return False
 
+@profiled("mock_log/load_mock_results")
 def load_mock_test_results(conn, user_id=None):
     """Loads mock test results from the database, optionally filtered by user_id."""
     if conn is None:
         return pd.DataFrame()
     try:
-        if user_id:
-            df = pd.read_sql_query("SELECT * FROM mock_test_results WHERE user_id = ? ORDER BY assessment_date DESC", conn, params=(user_id,))
-        else:
-            df = pd.read_sql_query("SELECT * FROM mock_test_results ORDER BY assessment_date DESC", conn)
-        
-        if not df.empty:
-            df['assessment_date'] = pd.to_datetime(df['assessment_date']).dt.date
-            df['timestamp'] = pd.to_datetime(df['timestamp']) # Ensure timestamp is datetime
-            
-            # Ensure numeric types and handle potential NaNs
-            df['total_score'] = pd.to_numeric(df['total_score'], errors='coerce').fillna(0)
-            df['max_score_possible'] = pd.to_numeric(df['max_score_possible'], errors='coerce').fillna(100) # Default to 100
-            df['time_taken_minutes'] = pd.to_numeric(df['time_taken_minutes'], errors='coerce').fillna(0)
-            df['total_questions'] = pd.to_numeric(df['total_questions'], errors='coerce').fillna(0).astype(int)
-            df['attempted'] = pd.to_numeric(df['attempted'], errors='coerce').fillna(0).astype(int)
-            df['correct'] = pd.to_numeric(df['correct'], errors='coerce').fillna(0).astype(int)
-            df['wrong'] = pd.to_numeric(df['wrong'], errors='coerce').fillna(0).astype(int)
-            df['physics_score'] = pd.to_numeric(df['physics_score'], errors='coerce').fillna(0.0)
-            df['chemistry_score'] = pd.to_numeric(df['chemistry_score'], errors='coerce').fillna(0.0)
-            df['maths_score'] = pd.to_numeric(df['maths_score'], errors='coerce').fillna(0.0)
-            df['biology_score'] = pd.to_numeric(df['biology_score'], errors='coerce').fillna(0.0)
-            df['percentile'] = pd.to_numeric(df['percentile'], errors='coerce').fillna(0.0)
-            df['rank'] = pd.to_numeric(df['rank'], errors='coerce').fillna(0).astype(int)
-            df['target_score'] = pd.to_numeric(df['target_score'], errors='coerce').fillna(0.0)
-
-            # Calculate percentage_score for consistent analysis and display
-            # Handle division by zero for max_score_possible
-            df['percentage_score'] = (df['total_score'] / df['max_score_possible'] * 100).round(2)
-            df.loc[df['max_score_possible'] == 0, 'percentage_score'] = 0.0 # Set to 0 if max_score_possible is 0
-
-            # Calculate accuracy based on correct/attempted for question analysis
-            df['accuracy_q'] = (df['correct'] / df['attempted'] * 100).round(2)
-            df.loc[df['attempted'] == 0, 'accuracy_q'] = 0.0 # Set to 0 if attempted is 0
-
-            # Calculate unattempted questions
-            df['unattempted'] = df['total_questions'] - df['attempted']
-
+        # Read from the typed Parquet snapshot, rebuilt only after the table changes (see snapshots.py)
+        df = read_mock_test_results(DB_FILE_MOCK_TESTS, user_id)
         app_logger.info(f"Loaded {len(df)} mock test results for user {user_id if user_id else 'all'}.")
         return df
     except Exception as e:
@@ -548,6 +193,18 @@ def load_mock_test_results(conn, user_id=None):
         st.error(f"🚨 Error loading mock test results: {e}")
         return pd.DataFrame()
 
+@profiled("mock_log/load_mock_history")
+@cache_data(ttl=300) # Cache data for 5 minutes
+def load_mock_test_history(user_id):
+    """Loads a user's mock test results of every year, including those moved to the archive files (see archive.py)."""
+    try:
+        return load_history(DB_FILE_MOCK_TESTS, "mock_test_results", where="user_id = ?", params=(user_id,),
+                            order_by=MOCK_TEST_RESULTS_ORDER, prepare=prepare_mock_test_results)
+    except Exception as e:
+        app_logger.error(f"Error loading archived mock test results: {e}", exc_info=True)
+        st.error(f"🚨 Error loading archived mock test results: {e}")
+        return pd.DataFrame()
+
 def delete_mock_test_result(conn, test_id):
     """Deletes a mock test result by its ID."""
     if conn is None:
@@ -581,9 +238,9 @@ def update_mock_test_result(conn, test_id, column, value):
             st.error(f"Invalid column for update: {column}")
             return False
 
-        # Convert date objects to string for DB storage
-        if column == 'assessment_date' and isinstance(value, date):
-            value = value.strftime(DATE_FORMAT)
+        # Dates (or ISO date strings from the data editor) are stored as epoch days
+        if column == 'assessment_date':
+            value = to_epoch_day(value)
 
         conn.execute(f"UPDATE mock_test_results SET {column} = ? WHERE id = ?", (value, test_id))
         conn.commit()
@@ -594,12 +251,61 @@ def update_mock_test_result(conn, test_id, column, value):
         st.error(f"🚨 Error updating mock test result: {e}")
         return False
 
+@cache_data(ttl=3600, show_spinner=False) # Re-solved only when the mock results or inputs change
+def get_study_allocation(domain_scores_df, weekly_hours, min_hours, max_hours):
+    """Returns the weekly study-hour allocation across all knowledge domains."""
+    return allocate_study_hours(domain_scores_df, UNIVERSAL_KNOWLEDGE_DOMAINS, EXAM_MAX_MARKS,
+                                weekly_hours=weekly_hours, min_hours=min_hours, max_hours=max_hours)
+
+def add_allocation_to_planner(allocation, week_end):
+    """Inserts one Study Planner task per allocated domain. Returns the number of new tasks."""
+    rows = allocation_to_tasks(allocation, week_end, date.today())
+    try:
+        conn = traced_connect(PLANNER_DB_FILE)
+        try:
+            ensure_schema(conn, PLANNER_DB_FILE) # The tasks carry epoch-day dates, so the table must be current
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO study_tasks
+                (Subject, Topic, DueDate, Priority, Status, Notes, CreatedDate)
+                VALUES (?, ?, ?, ?, ?, ?, ?);
+            """, rows)
+            conn.commit()
+            created = conn.total_changes - before
+        finally:
+            conn.close()
+        app_logger.info(f"Added {created} weekly focus task(s) to the Study Planner.")
+        if created:
+            reload_task_queue(PLANNER_DB_FILE) # The planner's shared "next up" queue
+            get_reminder_service(PLANNER_DB_FILE).load() # Schedules the new tasks' due-date reminders
+        return created
+    except sqlite3.Error as e:
+        app_logger.error(f"Error adding weekly focus tasks to the Study Planner: {e}")
+        st.error(f"🚨 Could not add tasks to the Study Planner: {e}. Ensure the Study Planner app has been run to create its table.")
+        return 0
+
 # --- AI Nexus Co-Pilot Logic (Simplified Mock) ---
+def classify_nexus_intent(user_query: str) -> str:
+    """Maps an AI Nexus query to the command it triggers."""
+    query = user_query.lower()
+    if "performance summary" in query:
+        return "performance_summary"
+    elif "predict score" in query:
+        return "predict_score"
+    elif "study plan" in query or "allocate" in query:
+        return "study_plan"
+    elif "motivate me" in query or "inspire me" in query:
+        return "motivate"
+    elif "neural signature" in query:
+        return "neural_signature"
+    return "unrecognized"
+
 def ai_nexus_response(user_query: str, user_df: pd.DataFrame, profile_directives: dict) -> str:
     """Generates a mock AI response based on query and user data."""
     app_logger.info(f"AI Nexus received query: '{user_query}' with {len(user_df)} data points.")
+    intent = classify_nexus_intent(user_query)
     
-    if "performance summary" in user_query.lower():
+    if intent == "performance_summary":
         if user_df.empty:
             return "Neural pathways indicate no assessment data. Initiate a mock test for analysis."
         
@@ -634,7 +340,7 @@ def ai_nexus_response(user_query: str, user_df: pd.DataFrame, profile_directives
         
         return summary
     
-    elif "predict score" in user_query.lower():
+    elif intent == "predict_score":
         if len(user_df) < 5: # Need enough data for a meaningful prediction
             return "Insufficient data for robust predictive modeling. Log at least 5 assessments for enhanced foresight."
         
@@ -654,6 +360,7 @@ def ai_nexus_response(user_query: str, user_df: pd.DataFrame, profile_directives
             if X.empty or len(X) < 2:
                 return "Not enough valid numerical data points for prediction."
                 
+            from sklearn.ensemble import RandomForestRegressor # Imported lazily; only needed on the prediction path
             model = RandomForestRegressor(n_estimators=50, random_state=42)
             model.fit(X[['time_taken_minutes', 'difficulty_encoded']], y)
             
@@ -680,7 +387,18 @@ def ai_nexus_response(user_query: str, user_df: pd.DataFrame, profile_directives
             app_logger.error(f"Error during predictive modeling: {e}", exc_info=True)
             return "System anomaly detected during predictive processing. Insufficient data or model calibration required."
             
-    elif "motivate me" in user_query.lower() or "inspire me" in user_query.lower():
+    elif intent == "study_plan":
+        weekly_hours = profile_directives.get('weekly_hours', 20)
+        allocation = allocate_study_hours(user_df, profile_directives.get('knowledge_domains', UNIVERSAL_KNOWLEDGE_DOMAINS),
+                                          EXAM_MAX_MARKS, weekly_hours=weekly_hours)
+        if allocation.empty:
+            return "Allocation matrix failed to converge. Recalibrate your weekly hour budget and retry."
+        plan = f"Optimal {weekly_hours}-hour weekly allocation for {profile_directives.get('user_name', 'your profile')}:\n"
+        for _, row in allocation[allocation['hours'] > 0].head(5).iterrows():
+            plan += f"- **{row['domain']}**: {row['hours']:.1f} h (gap {row['gap']:.0f}%, expected gain +{row['expected_gain']:.1f}%)\n"
+        return plan
+
+    elif intent == "motivate":
         motivations = [
             "Neural pathways are forging new connections. Every challenge is a data point for growth.",
             "Your cognitive processor is a marvel. Engage, adapt, overcome.",
@@ -690,11 +408,11 @@ def ai_nexus_response(user_query: str, user_df: pd.DataFrame, profile_directives
         ]
         return random.choice(motivations)
         
-    elif "neural signature" in user_query.lower():
+    elif intent == "neural_signature":
         return f"Your current active neural signature is: `{profile_directives.get('neural_signature', 'UNKNOWN')}`."
     
     else:
-        return "Query not recognized. Please formulate a more precise neural command, e.g., 'performance summary', 'predict score', 'motivate me', or 'neural signature'."
+        return "Query not recognized. Please formulate a more precise neural command, e.g., 'performance summary', 'predict score', 'study plan', 'motivate me', or 'neural signature'."
 
 # --- Streamlit App Layout and Logic ---
 
@@ -720,7 +438,10 @@ def cognisynth_app():
         "📝 Log New Assessment", "📊 Manage Data Matrix", "📈 Performance Analytics", "🧠 AI Nexus Co-Pilot"
     ])
 
-    with tab_log:
+    @st.fragment
+    @profiled("mock_log/tab_log")
+    def render_log_tab():
+        """Renders the Log New Assessment tab."""
         st.subheader("Log New Assessment Data Point")
         with st.form("mock_test_form"):
             col1, col2 = st.columns(2)
@@ -800,11 +521,14 @@ def cognisynth_app():
                         st.success("✅ Assessment data point recorded successfully!")
                         st.session_state.mock_test_df = load_mock_test_results(conn, USER_ID_RMJ) # Refresh DataFrame
                         st.toast("New data point integrated into cognitive matrix.", icon="✅")
-                        st.rerun() # Rerun to clear form and refresh data
+                        rerun_page() # Rerun to clear form and refresh data
                     else:
                         st.error("❌ Failed to record assessment data point.")
 
-    with tab_manage:
+    @st.fragment
+    @profiled("mock_log/tab_manage")
+    def render_manage_tab():
+        """Renders the Manage Data Matrix tab."""
         st.subheader("Manage Historical Data Matrix")
         st.info("Edit or delete existing assessment data points below. Raw scores are shown, percentage calculated.")
 
@@ -940,23 +664,26 @@ def cognisynth_app():
                         st.success(f"✅ Successfully committed {success_count} data matrix changes!")
                         st.session_state.mock_test_df = load_mock_test_results(conn, USER_ID_RMJ) # Refresh DataFrame
                         st.toast("Data matrix re-synchronized.", icon="✨")
-                        st.rerun()
+                        rerun_page()
                     else:
                         st.info("No changes were applied or committed.")
             else:
                 st.info("No uncommitted changes detected in the data matrix.")
 
 
-    with tab_analyze:
+    @st.fragment
+    @profiled("mock_log/tab_analytics")
+    def render_analyze_tab():
+        """Renders the Performance Analytics tab."""
         st.subheader("Performance Analytics & Trend Analysis")
 
         if st.session_state.mock_test_df.empty:
             st.info("No data available for analysis. Log some assessments first.")
         else:
-            df_analysis = st.session_state.mock_test_df.copy()
+            include_archive = bool(list_archives(DB_FILE_MOCK_TESTS)) and st.toggle(
+                "🗄️ Include archived years", key="mock_include_archive", help="Also analyse assessments moved to the per-year archive files.")
+            df_analysis = load_mock_test_history(USER_ID_RMJ) if include_archive else st.session_state.mock_test_df.copy()
 
-            # Ensure assessment_date is datetime for plotting
-            df_analysis['assessment_date'] = pd.to_datetime(df_analysis['assessment_date'])
             df_analysis = df_analysis.sort_values('assessment_date')
 
             st.markdown("---")
@@ -1000,9 +727,9 @@ def cognisynth_app():
                     showlegend=True,
                     title='Domain Proficiency Overview (Percentage Score)', # Updated title
                     title_x=0.5,
-                    font=dict(color='var(--text-primary)', family='Share Tech Mono'),
-                    paper_bgcolor='transparent', # Make background transparent
-                    plot_bgcolor='transparent',
+                    font=dict(color='#E0E0FF', family='Share Tech Mono'), # --text-primary
+                    paper_bgcolor='rgba(0, 0, 0, 0)', # Make background transparent
+                    plot_bgcolor='rgba(0, 0, 0, 0)',
                     hoverlabel=dict(bgcolor="rgba(0, 240, 255, 0.8)", font_size=12, font_family="Share Tech Mono")
                 )
                 st.plotly_chart(fig_radar, use_container_width=True)
@@ -1059,8 +786,39 @@ def cognisynth_app():
             else:
                 st.info("No subject-wise data to display.")
 
-
-    with tab_ai_nexus:
+            st.markdown("---")
+            st.subheader("⏱️ Weekly Study-Hour Allocation")
+            col_budget, col_min, col_max = st.columns(3)
+            with col_budget:
+                weekly_hours = st.number_input("Weekly Study Budget (hours)", min_value=1.0, max_value=100.0, value=20.0, step=1.0)
+            with col_min:
+                min_hours = st.number_input("Minimum Hours per Domain", min_value=0.0, max_value=10.0, value=0.0, step=0.5)
+            with col_max:
+                max_hours = st.number_input("Maximum Hours per Domain", min_value=0.5, max_value=20.0, value=4.0, step=0.5)
+
+            allocation = get_study_allocation(df_analysis[['domain', 'exam_type', 'percentage_score']], weekly_hours, min_hours, max_hours)
+            if allocation.empty:
+                st.warning("Could not compute an allocation for these settings. Try a larger budget or smaller minimum.")
+            else:
+                planned = allocation[allocation['hours'] > 0]
+                fig_allocation = px.bar(planned, x='hours', y='domain', orientation='h',
+                                        title='Recommended Hours per Domain This Week',
+                                        labels={'hours': 'Hours', 'domain': 'Knowledge Domain'},
+                                        color='gap', color_continuous_scale=px.colors.sequential.Plasma,
+                                        hover_data=['avg_score', 'expected_gain'])
+                fig_allocation.update_layout(title_x=0.5, yaxis={'categoryorder': 'total ascending'})
+                st.plotly_chart(fig_allocation, use_container_width=True)
+
+                week_end = date.today() + timedelta(days=6 - date.today().weekday())
+                if st.button(f"🗓️ Add Weekly Focus Tasks to Study Planner (due {week_end.strftime(DATE_FORMAT)})"):
+                    created = add_allocation_to_planner(allocation, week_end)
+                    st.success(f"✅ {created} weekly focus task(s) added to the Study Planner.")
+
+
+    @st.fragment
+    @profiled("mock_log/tab_ai_nexus")
+    def render_ai_nexus_tab():
+        """Renders the AI Nexus Co-Pilot tab."""
         st.subheader("🧠 AI Nexus Co-Pilot: Cognitive Guidance Interface")
         st.info("Engage your AI Co-Pilot for personalized insights, predictions, and motivational directives.")
 
@@ -1092,21 +850,38 @@ def cognisynth_app():
                 user_df['percentage_score'] = (user_df['total_score'] / user_df['max_score_possible'] * 100).round(2)
                 user_df.loc[user_df['max_score_possible'] == 0, 'percentage_score'] = 0.0 # Handle division by zero
                 user_df['time_taken_minutes'] = pd.to_numeric(user_df['time_taken_minutes'], errors='coerce')
-                user_df['assessment_date'] = pd.to_datetime(user_df['assessment_date'])
                 
-                with st.spinner("AI Nexus Co-Pilot is synthesizing response..."):
+                with st.spinner("AI Nexus Co-Pilot is synthesizing response..."), AI_NEXUS_SECONDS.time(intent=classify_nexus_intent(user_query)):
                     response = ai_nexus_response(user_query, user_df.sort_values(by="assessment_date"), profile_directives)
                     st.session_state.ai_nexus_chat_history.append(("ai_nexus", response))
-                st.rerun()
+                with chat_container: # Append the new exchange in place instead of rerunning the page
+                    st.chat_message("user", avatar="👤").write(user_query)
+                    st.chat_message("ai_nexus", avatar="🤖").write(response)
             else:
                 st.toast("Please transmit a neural query to your AI Nexus Co-Pilot.", icon="❓")
         
-        if st.button("🧹 Purge Chat Log", type="secondary"):
+        def purge_chat_log():
             st.session_state.ai_nexus_chat_history = []
             st.toast("Chat log purged from temporary memory banks.", icon="🧹")
-            st.rerun()
+
+        st.button("🧹 Purge Chat Log", type="secondary", on_click=purge_chat_log) # Runs before the tab redraws
+
+    # Each tab is a fragment, so interacting with one tab doesn't recompute the others.
+    with tab_log:
+        render_log_tab()
+    with tab_manage:
+        render_manage_tab()
+    with tab_analyze:
+        render_analyze_tab()
+    with tab_ai_nexus:
+        render_ai_nexus_tab()
 
 # This part ensures that if this file is run directly (for testing as a standalone app), it still works.
 # In a multi-page app, the main app would import and call `cognisynth_app()`.
 if __name__ == "__main__":
-    cognisynth_app()
\ No newline at end of file
+    cognisynth_app()
+
+render_profiler_panel()
+render_sql_trace_panel()
+render_cache_panel()
+rerun_section.stop()
@@ -1,37 +1,163 @@
-# notes.py (Modified)
 import streamlit as st
-import pandas as pd
-from utils import load_data, save_data # Crucial: utils.py must be present
+import sqlite3
+import logging
+from notes_store import (PAGE_SIZE, create_notes_table, import_notes_csv, add_note, update_note, delete_note,
+                         load_notes, count_notes, known_topics, linked_items)
+from db_schema import TASK_SUBJECTS
+from theme import apply_theme
+from profiler import begin_rerun, profiled, render_profiler_panel, rerun_page, stop_page
+from sql_trace import render_sql_trace_panel, traced_connect
+from cache_telemetry import cache_resource, render_cache_panel
+from metrics import start_metrics
 
-def main_notes_app(): # <-- Add this function definition
-    st.title("📒 Notes Manager")
+# --- Setup Logging ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+app_logger = logging.getLogger(__name__)
 
-    NOTES_FILE = "notes.csv"
-    # Ensure utils.py with load_data and save_data is in the same directory
-    # If notes.csv doesn't exist, load_data should handle it (e.g., return an empty DataFrame)
+# --- Database Configuration ---
+DB_FILE = "study_data.db" # Notes live next to the study tasks and DPP logs they link to
+SUBJECTS = list(TASK_SUBJECTS)
+NEW_TOPIC = "➕ New topic..."
+
+# --- Streamlit Page Configuration ---
+st.set_page_config(
+    page_title="📒 Quantum Notes",
+    page_icon="✨",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# --- Render Profiling ---
+rerun_section = begin_rerun("notes") # Stopped at the end of the script; see profiler.py
+start_metrics() # Prometheus exporter (see metrics.py); also marks this session as active
+
+# --- Custom CSS for a Futuristic, Dark, and Neon Aesthetic (ONLY DARK MODE) ---
+apply_theme() # Shared, minified stylesheet with self-hosted fonts (see theme/)
+
+# --- Database Functions ---
+
+@cache_resource
+def get_connection():
+    """Establishes and returns a SQLite database connection.
+    This connection is cached and reused across Streamlit reruns.
+    """
     try:
-        notes_df = load_data(NOTES_FILE)
-    except FileNotFoundError:
-        st.warning("Notes file (notes.csv) not found. A new one will be created upon saving notes.")
-        notes_df = pd.DataFrame(columns=["Subject", "Topic", "Content"]) # Start with empty if file not found
-    except Exception as e:
-        st.error(f"Error loading notes: {e}. Please ensure utils.py and notes.csv are valid.")
-        notes_df = pd.DataFrame(columns=["Subject", "Topic", "Content"]) # Fallback
-
-    with st.form("Add Note"):
-        subject = st.selectbox("Subject", ["Physics", "Chemistry", "Math", "Biology"])
-        topic = st.text_input("Topic")
-        content = st.text_area("Note")
-        if st.form_submit_button("Save Note"):
-            # Use pd.concat for appending in newer pandas versions
-            new_note_df = pd.DataFrame([{"Subject": subject, "Topic": topic, "Content": content}])
-            notes_df = pd.concat([notes_df, new_note_df], ignore_index=True)
-            save_data(notes_df, NOTES_FILE)
-            st.success("Note saved.")
-            st.rerun() # Rerun to show updated dataframe
-
-    st.markdown("### All Notes")
-    st.dataframe(notes_df)
-
-if __name__ == "__main__":
-    main_notes_app() # This allows notes.py to still be run standalone
\ No newline at end of file
+        conn = traced_connect(DB_FILE, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Access columns by name
+        app_logger.info(f"Successfully connected to database: {DB_FILE}")
+        return conn
+    except sqlite3.Error as e:
+        st.error(f"🚨 Database connection error: {e}")
+        app_logger.exception("Failed to connect to database.")
+        return None
+
+# --- Streamlit UI ---
+
+st.title("📒 Quantum Notes")
+st.markdown("Capture what you learn, linked to the topics you plan and practise.")
+
+# Get the persistent database connection
+conn = get_connection()
+
+# Ensure database table exists
+if conn is None or not create_notes_table(conn):
+    stop_page() # Stop if connection or table creation fails
+
+imported = import_notes_csv(conn) # One-time migration of the old notes.csv
+if imported:
+    st.success(f"📥 Imported {imported} notes from notes.csv.")
+
+# --- Sidebar ---
+with st.sidebar:
+    st.header("⚡ Quick Actions")
+    st.metric("Total Notes", count_notes(conn))
+    st.info("💡 Tip: Use the same topic as a study task or DPP chapter to see them alongside the note.")
+
+# --- Main Content Tabs ---
+tab1, tab2 = st.tabs(["➕ Add Note", "📚 Browse Notes"])
+
+@st.fragment
+@profiled("notes/tab_add")
+def render_add_note_tab():
+    """Renders the Add Note tab."""
+    st.header("📝 Add a Note")
+    if st.session_state.pop("note_saved", False):
+        st.success("🎉 Note saved. Find it under 'Browse Notes'.")
+    col_subj, col_topic = st.columns(2)
+    with col_subj:
+        subject = st.selectbox("📚 **Subject**", SUBJECTS, key="note_subject")
+    with col_topic:
+        topic_choice = st.selectbox("📖 **Topic**", [NEW_TOPIC] + known_topics(conn, subject), key="note_topic_choice",
+                                    help="Topics from your study tasks, DPP chapters and earlier notes.")
+
+    with st.form("note_add_form", clear_on_submit=True):
+        new_topic = st.text_input("New Topic", placeholder="e.g., Rotational Motion") if topic_choice == NEW_TOPIC else ""
+        content = st.text_area("✍️ **Note**", height=200)
+        if st.form_submit_button("💾 **Save Note**", use_container_width=True, type="primary"):
+            topic = (new_topic if topic_choice == NEW_TOPIC else topic_choice).strip()
+            if not topic or not content.strip():
+                st.error("A note needs a topic and some content.")
+            elif add_note(conn, subject, topic, content.strip()) is not None:
+                st.session_state["note_saved"] = True
+                rerun_page() # Refresh the note list and count
+            else:
+                st.error("🚨 Failed to save the note.")
+
+@st.fragment
+@profiled("notes/tab_browse")
+def render_browse_notes_tab():
+    """Renders the Browse Notes tab."""
+    st.header("🔍 Your Notes")
+    col_subj, col_search = st.columns([1, 2])
+    with col_subj:
+        subject = st.selectbox("Filter by Subject", ["All"] + SUBJECTS, key="notes_filter_subject")
+    with col_search:
+        search = st.text_input("Search Topic or Content", key="notes_search")
+    page = st.number_input("Page", min_value=1, value=1, step=1, key="notes_page")
+    notes_df = load_notes(conn, subject=None if subject == "All" else subject, search=search.strip() or None,
+                          offset=(page - 1) * PAGE_SIZE)
+    if notes_df.empty:
+        st.info("No notes match your filters.")
+        return
+
+    for note in notes_df.to_dict("records"):
+        with st.expander(f"{note['Subject']} · {note['Topic']} · {note['UpdatedDate']}"):
+            st.markdown(note["Content"])
+            tasks_df, dpps_df = linked_items(conn, note["Subject"], note["Topic"])
+            if not tasks_df.empty:
+                st.caption("🗓️ Linked study tasks")
+                st.dataframe(tasks_df, use_container_width=True, hide_index=True)
+            if not dpps_df.empty:
+                st.caption("📝 Linked DPPs")
+                st.dataframe(dpps_df, use_container_width=True, hide_index=True)
+
+            with st.form(f"note_edit_form_{note['ID']}"):
+                e_subject = st.selectbox("Subject", SUBJECTS, index=SUBJECTS.index(note["Subject"]) if note["Subject"] in SUBJECTS else len(SUBJECTS) - 1)
+                e_topic = st.text_input("Topic", value=note["Topic"])
+                e_content = st.text_area("Note", value=note["Content"], height=150)
+                col_save, col_delete = st.columns(2)
+                with col_save:
+                    save = st.form_submit_button("💾 Save Changes", use_container_width=True)
+                with col_delete:
+                    delete = st.form_submit_button("🗑️ Delete", use_container_width=True)
+            if save and e_topic.strip() and e_content.strip():
+                if update_note(conn, note["ID"], e_subject, e_topic.strip(), e_content.strip()):
+                    rerun_page()
+                st.error("🚨 Failed to update the note.")
+            elif save:
+                st.error("A note needs a topic and some content.")
+            if delete:
+                if delete_note(conn, note["ID"]):
+                    rerun_page()
+                st.error("🚨 Failed to delete the note.")
+
+# Each tab is a fragment, so interacting with one tab doesn't recompute the others.
+with tab1:
+    render_add_note_tab()
+with tab2:
+    render_browse_notes_tab()
+
+render_profiler_panel()
+render_sql_trace_panel()
+render_cache_panel()
+rerun_section.stop()
@@ -3,9 +3,23 @@ import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta, date
 import logging
-import plotly.express as px
-import plotly.graph_objects as go
 from contextlib import contextmanager
+from availability import (AvailabilityCalendar, BLOCK_KINDS, WEEKDAY_NAMES, create_availability_table,
+                          insert_availability_block, delete_availability_block, suggest_task_slots)
+from task_queue import get_task_queue
+from reminders import get_reminder_service
+from lazy_imports import lazy_import
+from theme import apply_theme, sidebar_image
+from profiler import begin_rerun, profile_section, profiled, render_profiler_panel, rerun_page, stop_page
+from sql_trace import render_sql_trace_panel, traced_connect
+from cache_telemetry import cache_data, cache_resource, clear_caches, render_cache_panel
+from metrics import start_metrics
+from loaders import STUDY_TASKS_ORDER, prepare_study_tasks, read_study_tasks
+from archive import list_archives, load_history
+from db_schema import TASK_PRIORITIES, TASK_STATUSES, TASK_SUBJECTS, ensure_schema, from_epoch_day, readable_select, to_epoch_day
+from exports import render_export_controls
+
+px = lazy_import("plotly.express") # Loaded on the first chart, not on every cold start
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,6 +28,7 @@ app_logger = logging.getLogger(__name__)
 # --- Database Configuration ---
 DB_FILE = "study_data.db" # Using the same DB file as dpp_logger for consistency
 DATE_FORMAT = "%Y-%m-%d"
+ANALYTICS_COLUMNS = ("Subject", "Topic", "DueDate", "Status", "Priority", "Notes") # Columns the analytics charts read
 
 # --- Streamlit Page Configuration ---
 st.set_page_config(
@@ -23,327 +38,22 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# --- Render Profiling ---
+rerun_section = begin_rerun("study_planner") # Stopped at the end of the script; see profiler.py
+start_metrics() # Prometheus exporter (see metrics.py); also marks this session as active
+
 # --- Custom CSS for a Futuristic, Dark, and Neon Aesthetic (ONLY DARK MODE) ---
-st.markdown(
-    """
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;700&display=swap');
-    @import url('https://fonts.googleapis.com/css2?family=Share+Tech+Mono&display=swap');
-
-    /* Ensure html and body take full height and prevent scrollbars */
-    html, body {
-        height: 100%;
-        margin: 0;
-        padding: 0;
-        overflow-x: hidden; /* Prevent horizontal scrollbar */
-    }
-
-    /* CSS Variables for a consistent Neon Dark Theme */
-    :root {
-        --neon-blue: #00F0FF;          /* Primary neon highlight */
-        --neon-purple: #9D00FF;        /* Secondary neon highlight */
-        --neon-green: #39FF14;         /* Tertiary neon for success/alerts */
-        --neon-orange: #FF9900;        /* Warning/pending status neon */
-        --neon-yellow: #FFD700;        /* Accent glow */
-
-        --dark-bg-deep: #05050A;       /* Very dark background for the page */
-        --dark-bg-gradient-start: #1A0033; /* Dark purple for gradient */
-        --dark-bg-gradient-end: #000A1A;   /* Dark blue for gradient */
-        --card-bg: #1B1B25;            /* Background for cards and components */
-        --sidebar-bg: #101015;         /* Slightly different dark for sidebar */
-
-        --text-primary: #E0E0FF;       /* Light, slightly blue-ish text */
-        --text-secondary: #A0A0B0;     /* Greyish text for descriptions */
-        --border-color: #303040;       /* Subtle dark border */
-        --divider-color: #202028;      /* Even darker for dividers */
-    }
-
-    /* Apply dark background to the entire page */
-    body {
-        background: linear-gradient(135deg, var(--dark-bg-gradient-start), var(--dark-bg-deep), var(--dark-bg-gradient-end));
-        background-attachment: fixed; /* Ensures gradient covers full background without scrolling */
-        color: var(--text-primary);
-        font-family: 'Share Tech Mono', monospace; /* Monospaced for futuristic feel */
-        line-height: 1.6;
-    }
-
-    /* Ensure Streamlit app container is transparent to show body background */
-    .stApp {
-        background-color: transparent;
-    }
-
-    /* Headers with Orbitron font and neon glow */
-    h1, h2, h3, h4, h5, h6 {
-        font-family: 'Orbitron', sans-serif;
-        color: var(--neon-blue);
-        text-shadow: 0 0 8px var(--neon-blue), 0 0 15px rgba(0, 240, 255, 0.4); /* Stronger neon glow */
-        margin-top: 1.5em;
-        margin-bottom: 0.8em;
-        letter-spacing: 0.05em; /* Add slight spacing */
-    }
-    h1 { font-size: 2.8em; }
-    h2 { font-size: 2.2em; }
-    h3 { font-size: 1.8em; }
-
-    /* Streamlit components styling */
-    .stSidebar {
-        background-color: var(--sidebar-bg);
-        border-right: 1px solid var(--border-color);
-        padding-top: 2rem;
-        box-shadow: 2px 0 15px rgba(0, 240, 255, 0.3); /* Stronger glow */
-    }
-
-    .stButton>button {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep); /* Dark text on bright button */
-        border-radius: 8px;
-        padding: 0.8em 1.5em; /* Larger padding */
-        font-size: 1.05em;
-        font-weight: 700;
-        transition: all 0.3s ease-in-out;
-        border: none;
-        box-shadow: 0 0 10px var(--neon-blue), 0 0 20px rgba(0, 240, 255, 0.6); /* Pronounced glow */
-        text-transform: uppercase;
-        font-family: 'Orbitron', sans-serif;
-    }
-    .stButton>button:hover {
-        background-color: var(--neon-purple); /* Change color on hover */
-        box_shadow: 0 0 15px var(--neon-purple), 0 0 25px rgba(157, 0, 255, 0.7); /* Change glow color */
-        transform: translateY(-4px) scale(1.03); /* More pronounced lift and scale */
-    }
-    .stButton>button[kind="secondary"] {
-        background-color: var(--card-bg);
-        color: var(--neon-blue);
-        border: 1px solid var(--neon-blue);
-        box-shadow: 0 0 7px rgba(0, 240, 255, 0.2);
-    }
-    .stButton>button[kind="secondary"]:hover {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        transform: none; /* No lift for secondary hover */
-        box_shadow: 0 0 10px var(--neon-blue), 0 0 20px rgba(0, 240, 255, 0.6);
-    }
-
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 15px; /* Increased gap */
-        justify-content: center;
-        border-bottom: 2px solid var(--divider-color); /* Subtle divider */
-    }
-
-    .stTabs [data-baseweb="tab"] {
-        height: 60px; /* Taller tabs */
-        background-color: var(--card-bg);
-        border-radius: 10px 10px 0 0;
-        padding: 15px 30px;
-        transition: all 0.3s ease-in-out;
-        font-weight: 700;
-        color: var(--text-secondary);
-        border: 1px solid var(--border-color);
-        border-bottom: none;
-        text-transform: uppercase;
-        font-family: 'Orbitron', sans-serif;
-        box-shadow: 0 -3px 10px rgba(0, 240, 255, 0.1); /* Subtle top glow */
-    }
-    .stTabs [data-baseweb="tab"]:hover {
-        background-color: #2A2A3A;
-        color: var(--neon-blue);
-        box-shadow: 0 -3px 12px var(--neon-blue), 0 -3px 25px rgba(0, 240, 255, 0.5);
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        border-bottom: 5px solid var(--neon-blue);
-        border-top: 2px solid var(--neon-blue);
-        box-shadow: 0 0 20px var(--neon-blue), 0 0 35px rgba(0, 240, 255, 0.8);
-        transform: translateY(-3px); /* More pronounced lift */
-    }
-
-    .stMetric {
-        background-color: var(--card-bg);
-        padding: 2rem; /* More padding */
-        border-radius: 18px; /* More rounded */
-        border: 1px solid var(--border-color);
-        box-shadow: 0 0 12px rgba(157, 0, 255, 0.2); /* Purple glow for metrics */
-        margin-bottom: 2rem;
-        transition: transform 0.4s ease-in-out, box-shadow 0.4s ease-in-out;
-        text-align: center;
-    }
-    .stMetric:hover {
-        transform: translateY(-10px); /* Greater lift */
-        box_shadow: 0 0 20px var(--neon-purple), 0 0 30px rgba(157, 0, 255, 0.6);
-    }
-    .stMetric>div>div:first-child { /* Metric label */
-        color: var(--text-secondary);
-        font-size: 1.15em;
-        font-family: 'Share Tech Mono', monospace;
-        margin-bottom: 0.5em;
-    }
-    .stMetric>div>div:nth-child(2) { /* Metric value */
-        color: var(--neon-yellow); /* Gold/Yellow for main value */
-        font-size: 3em; /* Much larger value */
-        font-family: 'Orbitron', sans-serif;
-        text-shadow: 0 0 8px var(--neon-yellow), 0 0 15px rgba(255, 215, 0, 0.6);
-        line-height: 1; /* Adjust line height */
-    }
-    .stMetric>div>div:last-child { /* Metric delta */
-        color: var(--neon-green); /* Green for positive deltas */
-        font-size: 1em;
-        font-weight: bold;
-    }
-
-
-    .stAlert {
-        border-radius: 12px;
-        font-size: 1em;
-        margin-bottom: 1.8rem;
-        background-color: var(--card-bg);
-        border: 1px solid;
-        color: var(--text-primary);
-        box-shadow: 0 0 10px rgba(0, 240, 255, 0.15);
-        padding: 1rem 1.5rem;
-    }
-    .stAlert.st-emotion-cache-1f81n9p { /* Streamlit success alert */
-        background-color: #0A251E; /* Dark emerald */
-        color: var(--neon-green);
-        border-color: var(--neon-green);
-        box-shadow: 0 0 12px rgba(57, 255, 20, 0.4);
-    }
-    .stAlert.st-emotion-cache-1f81n9p p { color: var(--neon-green); } /* Text within success alert */
-
-    .stAlert.st-emotion-cache-1j0080z { /* Streamlit error alert */
-        background-color: #330000; /* Dark red */
-        color: #FF4B4B;
-        border-color: #FF4B4B;
-        box-shadow: 0 0 12px rgba(255, 75, 75, 0.4);
-    }
-    .stAlert.st-emotion-cache-1j0080z p { color: #FF4B4B; } /* Text within error alert */
-
-    .stAlert.st-emotion-cache-1e74g6b { /* Streamlit warning alert */
-        background-color: #332000; /* Dark orange */
-        color: var(--neon-orange);
-        border-color: var(--neon-orange);
-        box-shadow: 0 0 12px rgba(255, 153, 0, 0.4);
-    }
-    .stAlert.st-emotion-cache-1e74g6b p { color: var(--neon-orange); } /* Text within warning alert */
-
-    /* Input widgets styling */
-    .stTextInput>div>div>input, .stSelectbox>div>div>div>div, .stTextArea>div>div, .stNumberInput>div>div>input {
-        background-color: #2A2A3A; /* Darker input background */
-        border: 1px solid var(--border-color);
-        border-radius: 8px;
-        color: var(--text-primary);
-        padding: 0.7em 1em;
-        font-size: 0.95em;
-        box-shadow: inset 0 0 5px rgba(0, 240, 255, 0.1); /* Inner glow */
-        transition: all 0.2s ease;
-    }
-    .stTextInput>div>div>input:focus, .stSelectbox>div>div>div>div:focus, .stTextArea>div>div:focus-within, .stNumberInput>div>div>input:focus {
-        border-color: var(--neon-blue);
-        box-shadow: inset 0 0 8px var(--neon-blue), 0 0 5px var(--neon-blue); /* Stronger focus glow */
-        outline: none;
-    }
-
-    /* Slider styling */
-    .stSlider>div>div>div:nth-child(1) { /* Track background */
-        background: var(--border-color);
-    }
-    .stSlider>div>div>div:nth-child(2) { /* Filled track */
-        background: var(--neon-blue);
-    }
-    .stSlider [data-testid="stThumbValue"] { /* Value label above thumb */
-        background-color: var(--neon-blue);
-        color: var(--dark-bg-deep);
-        border-radius: 5px;
-        padding: 2px 8px;
-        font-weight: bold;
-    }
-
-    /* Dataframe styling */
-    .stDataFrame {
-        border: 1px solid var(--border-color);
-        border-radius: 12px;
-        overflow: hidden;
-        box-shadow: 0 0 15px rgba(0, 240, 255, 0.1);
-    }
-
-    .stDataFrame .ag-header-cell-label {
-        color: var(--neon-blue); /* Header text color */
-        font-family: 'Orbitron', sans-serif;
-        font-size: 0.9em;
-        text-transform: uppercase;
-    }
-    .stDataFrame .ag-theme-streamlit {
-        --ag-background-color: var(--card-bg);
-        --ag-odd-row-background-color: #20202A; /* Slightly lighter for odd rows */
-        --ag-row-hover-background-color: #303040;
-        --ag-border-color: var(--divider-color);
-        --ag-data-color: var(--text-primary);
-        --ag-font-family: 'Share Tech Mono', monospace;
-        --ag-selected-row-background-color: #003344; /* Darker blue when selected */
-    }
-
-    /* Information boxes */
-    .stAlert.st-emotion-cache-12fmw13 { /* Streamlit info alert */
-        background-color: #101525;
-        color: var(--neon-blue);
-        border-color: var(--neon-blue);
-        box-shadow: 0 0 12px rgba(0, 240, 255, 0.4);
-    }
-    .stAlert.st-emotion-cache-12fmw13 p { color: var(--neon-blue); }
-
-    /* Markdown elements */
-    p {
-        color: var(--text-primary);
-    }
-    a {
-        color: var(--neon-blue);
-        text-decoration: none;
-    }
-    a:hover {
-        text-decoration: underline;
-    }
-
-    /* Centering content within columns */
-    .st-emotion-cache-ocqkz7 {
-        display: flex;
-        flex-direction: column;
-        align-items: center;
-        text-align: center;
-    }
-    .st-emotion-cache-ocqkz7 .stMetric {
-        width: 100%; /* Ensure metric takes full width of its column */
-    }
-
-    /* General containers/blocks */
-    .st-emotion-cache-h5rg5t, .st-emotion-cache-10qadwd, .st-emotion-cache-1p1fspc { /* These are common Streamlit containers */
-        background-color: var(--card-bg);
-        padding: 2rem;
-        border-radius: 15px;
-        border: 1px solid var(--border-color);
-        box-shadow: 0 0 15px rgba(157, 0, 255, 0.15); /* Soft purple glow for general cards */
-        margin-bottom: 2rem;
-    }
-
-    /* Specific adjustments for plotly charts to match theme */
-    .js-plotly-plot {
-        border-radius: 12px;
-        overflow: hidden;
-        box-shadow: 0 0 15px rgba(0, 240, 255, 0.15);
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+apply_theme() # Shared, minified stylesheet with self-hosted fonts (see theme/)
 
 # --- Database Functions ---
 
-@st.cache_resource
+@cache_resource
 def get_connection():
     """Establishes and returns a SQLite database connection.
     This connection is cached and reused across Streamlit reruns.
     """
     try:
-        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+        conn = traced_connect(DB_FILE, check_same_thread=False)
         conn.row_factory = sqlite3.Row  # Access columns by name
         app_logger.info(f"Successfully connected to database: {DB_FILE}")
         return conn
@@ -353,24 +63,11 @@ def get_connection():
         return None
 
 def create_study_tasks_table(conn):
-    """Creates the study_tasks table if it doesn't already exist."""
+    """Creates the study_tasks table if it doesn't already exist (migrating an older schema)."""
     if conn is None:
         return False
     try:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS study_tasks (
-                ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                Subject TEXT NOT NULL,
-                Topic TEXT NOT NULL,
-                DueDate TEXT NOT NULL,
-                Priority TEXT NOT NULL,
-                Status TEXT NOT NULL,
-                Notes TEXT,
-                CreatedDate TEXT NOT NULL,
-                UNIQUE(Subject, Topic, DueDate)
-            );
-        """)
-        conn.commit()
+        ensure_schema(conn, DB_FILE)
         app_logger.info("Study tasks table ensured.")
         return True
     except sqlite3.Error as e:
@@ -378,16 +75,14 @@ def create_study_tasks_table(conn):
         app_logger.exception("Failed to create study_tasks table.")
         return False
 
-@st.cache_data(ttl=300) # Cache data for 5 minutes
-def load_study_tasks(_conn):
-    """Loads all study tasks from the database into a Pandas DataFrame."""
+@profiled("study_planner/load_study_tasks")
+@cache_data(ttl=300) # Cache data for 5 minutes
+def load_study_tasks(_conn, columns=None):
+    """Loads all study tasks (optionally only some columns) from the typed Parquet snapshot of the table."""
     if _conn is None:
         return pd.DataFrame()
     try:
-        df = pd.read_sql("SELECT * FROM study_tasks ORDER BY DueDate ASC, Priority ASC, ID DESC", _conn)
-        if not df.empty:
-            df['DueDate'] = pd.to_datetime(df['DueDate'], errors='coerce')
-            df['CreatedDate'] = pd.to_datetime(df['CreatedDate'], errors='coerce')
+        df = read_study_tasks(DB_FILE, columns)
         app_logger.info("Study tasks loaded successfully.")
         return df
     except Exception as e:
@@ -395,18 +90,44 @@ def load_study_tasks(_conn):
         app_logger.exception("Failed to load study tasks.")
         return pd.DataFrame()
 
+@profiled("study_planner/load_study_history")
+@cache_data(ttl=300) # Cache data for 5 minutes
+def load_study_history(columns=None):
+    """Loads every study task, including completed ones moved to the archive files (see archive.py)."""
+    try:
+        return load_history(DB_FILE, "study_tasks", columns=columns, order_by=STUDY_TASKS_ORDER, prepare=prepare_study_tasks)
+    except Exception as e:
+        st.error(f"🚨 Error loading archived study tasks: {e}")
+        app_logger.exception("Failed to load archived study tasks.")
+        return pd.DataFrame()
+
+@cache_resource(ttl=300) # Rules are expanded lazily per week inside the cached calendar
+def get_availability_calendar(_conn):
+    """Builds the busy-time calendar from the availability table."""
+    return AvailabilityCalendar.from_db(_conn)
+
+def queued_task(task_id, task_data):
+    """The task-queue entry of a study task row (Subject, Topic, DueDate, Priority, Status, Notes[, CreatedDate])."""
+    subject, topic, due_day, priority, status, _, *created = task_data
+    created_day = created[0] if created else None
+    return {"ID": task_id, "Subject": subject, "Topic": topic, "DueDate": from_epoch_day(due_day), "Priority": priority,
+            "Status": status, "CreatedDate": from_epoch_day(created_day) if created_day is not None else None}
+
 def insert_study_task(conn, task_data):
     """Inserts a new study task entry into the database."""
     if conn is None:
         return False
     try:
-        conn.execute("""
+        cursor = conn.execute("""
             INSERT INTO study_tasks
             (Subject, Topic, DueDate, Priority, Status, Notes, CreatedDate)
             VALUES (?, ?, ?, ?, ?, ?, ?);
         """, task_data)
         conn.commit()
         app_logger.info(f"Inserted study task: {task_data}")
+        get_reminder_service(DB_FILE).upsert_task({"ID": cursor.lastrowid, "Subject": task_data[0], "Topic": task_data[1],
+                                                   "DueDate": task_data[2], "Status": task_data[4]})
+        get_task_queue(DB_FILE).upsert(queued_task(cursor.lastrowid, task_data))
         return True
     except sqlite3.IntegrityError:
         st.warning("⚠️ A task with this Subject, Topic, and Due Date already exists. Please modify details or delete the existing one.")
@@ -429,6 +150,10 @@ def update_study_task(conn, task_id, task_data):
         """, (*task_data, task_id))
         conn.commit()
         app_logger.info(f"Updated study task ID {task_id}")
+        get_reminder_service(DB_FILE).upsert_task({"ID": task_id, "Subject": task_data[0], "Topic": task_data[1],
+                                                   "DueDate": task_data[2], "Status": task_data[4]})
+        created = conn.execute("SELECT CreatedDate FROM study_tasks WHERE ID = ?", (task_id,)).fetchone()
+        get_task_queue(DB_FILE).upsert(queued_task(task_id, (*task_data, created[0] if created else None)))
         return True
     except sqlite3.IntegrityError:
         st.warning("⚠️ An entry with this Subject, Topic, and Due Date already exists. Please choose unique values.")
@@ -446,6 +171,8 @@ def delete_study_task(conn, task_id):
         conn.execute("DELETE FROM study_tasks WHERE ID = ?", (task_id,))
         conn.commit()
         app_logger.info(f"Deleted study task ID: {task_id}")
+        get_reminder_service(DB_FILE).remove_task(task_id)
+        get_task_queue(DB_FILE).remove(task_id)
         return True
     except sqlite3.Error as e:
         st.error(f"🚨 Error deleting study task: {e}")
@@ -454,6 +181,21 @@ def delete_study_task(conn, task_id):
 
 # --- Utility Functions ---
 
+DEADLINE_COLUMN_CONFIG = {
+    "Deadline": st.column_config.TextColumn("Deadline", help="🔴 Overdue: past due and not completed."),
+    "DueDate": st.column_config.DateColumn("Due Date", format="YYYY-MM-DD"),
+    "CreatedDate": st.column_config.DateColumn("Created", format="YYYY-MM-DD"),
+}
+
+def add_deadline_status(df, today=None):
+    """Adds a Deadline status column computed with vectorized masks (keeps st.dataframe on the Arrow path)."""
+    today = pd.Timestamp(today or date.today())
+    deadline = pd.Series("🟢 Upcoming", index=df.index)
+    deadline[df['DueDate'] == today] = "🟠 Due Today"
+    deadline[df['DueDate'] < today] = "🔴 Overdue"
+    deadline[df['Status'] == 'Completed'] = "✅ Done"
+    return df.assign(Deadline=deadline)[["ID", "Deadline"] + [c for c in df.columns if c != "ID"]]
+
 def validate_task_inputs(subject, topic, due_date):
     """Performs input validation for study task fields."""
     if not subject.strip():
@@ -467,11 +209,25 @@ def validate_task_inputs(subject, topic, due_date):
         return False
     return True
 
+def filtered_study_tasks_query(subject, status, search_query):
+    """Builds the SQL and parameters matching the Manage tab's filters (for exports)."""
+    clauses, params = [], []
+    if subject != "All":
+        clauses.append("Subject = ?")
+        params.append(subject)
+    if status != "All":
+        clauses.append("Status = ?")
+        params.append(status)
+    if search_query:
+        clauses.append("(instr(lower(Topic), ?) OR instr(lower(COALESCE(Notes, '')), ?))")
+        params += [search_query.lower()] * 2
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT {readable_select('study_tasks')} FROM study_tasks{where} ORDER BY DueDate ASC, Priority ASC, ID DESC", params
+
 def clear_caches_and_rerun():
     """Clears Streamlit caches and reruns the app."""
-    st.cache_data.clear()
-    st.cache_resource.clear()
-    st.rerun()
+    clear_caches()
+    rerun_page()
 
 # --- Streamlit UI ---
 
@@ -482,13 +238,15 @@ st.markdown("Organize your study tasks, track progress, and conquer your academi
 conn = get_connection()
 
 # Ensure database table exists
-if conn is None or not create_study_tasks_table(conn):
-    st.stop() # Stop if connection or table creation fails
+if conn is None or not create_study_tasks_table(conn) or not create_availability_table(conn):
+    stop_page() # Stop if connection or table creation fails
+
+get_reminder_service(DB_FILE) # Starts the due-date reminder dispatcher once per process
 
 # --- Sidebar for Navigation/Quick Actions ---
 with st.sidebar:
     st.header("⚡ Quick Actions")
-    st.image("https://images.unsplash.com/photo-1543286386-713ed02f1a6b?q=80&w=1770&auto=format&fit=crop&ixlib=rb-4.0.3&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D", use_column_width=True, caption="Plan your journey to success!")
+    sidebar_image("study_planner", caption="Plan your journey to success!")
     st.info("💡 Tip: Use the tabs to add new tasks, manage existing ones, or view your progress.")
     if st.button("🔄 Refresh All Data", help="Clear data cache and reload all study tasks."):
         clear_caches_and_rerun()
@@ -504,9 +262,12 @@ with st.sidebar:
 
 
 # --- Main Content Tabs ---
-tab1, tab2, tab3 = st.tabs(["➕ Add New Task", "📚 Manage Tasks", "📈 Study Analytics"])
+tab1, tab2, tab3, tab4 = st.tabs(["➕ Add New Task", "📚 Manage Tasks", "📈 Study Analytics", "🕒 Availability"])
 
-with tab1:
+@st.fragment
+@profiled("study_planner/tab_add")
+def render_add_task_tab():
+    """Renders the Add New Task tab."""
     st.header("📝 Add a New Study Task")
     st.markdown("Define your next study objective. Precision in planning leads to mastery!")
 
@@ -514,7 +275,7 @@ with tab1:
         st.markdown("### Task Details")
         col_subj, col_topic = st.columns(2)
         with col_subj:
-            subject = st.selectbox("📚 **Subject**", ["Physics", "Chemistry", "Maths", "Biology", "Computer Science", "General"], help="Choose the subject for this task.")
+            subject = st.selectbox("📚 **Subject**", list(TASK_SUBJECTS), help="Choose the subject for this task.")
         with col_topic:
             topic = st.text_input("📖 **Topic/Task Description**", placeholder="e.g., Kinematics - Projectile Motion, Organic Chemistry - Alkanes", help="Briefly describe the study task.")
 
@@ -522,9 +283,9 @@ with tab1:
         with col_due:
             due_date = st.date_input("🗓️ **Due Date**", date.today() + timedelta(days=7), help="Set the deadline for this task.")
         with col_prio:
-            priority = st.selectbox("⚡ **Priority**", ["High", "Medium", "Low"], index=0, help="Assign a priority level.")
+            priority = st.selectbox("⚡ **Priority**", list(TASK_PRIORITIES), index=0, help="Assign a priority level.")
         with col_status:
-            status = st.selectbox("✅ **Status**", ["Pending", "In Progress", "Completed", "Deferred"], help="Current status of the task.")
+            status = st.selectbox("✅ **Status**", list(TASK_STATUSES), help="Current status of the task.")
 
         notes = st.text_area("✍️ **Notes** (Optional)", placeholder="Breakdown steps, resources needed, potential challenges...", max_chars=500, help="Add any relevant notes or reflections on this task.")
 
@@ -533,8 +294,8 @@ with tab1:
 
         if submitted:
             if validate_task_inputs(subject, topic, due_date):
-                task_row_data = (subject.strip(), topic.strip(), str(due_date),
-                                 priority, status, notes.strip(), str(datetime.now().date()))
+                task_row_data = (subject.strip(), topic.strip(), to_epoch_day(due_date),
+                                 priority, status, notes.strip(), to_epoch_day(date.today()))
                 if insert_study_task(conn, task_row_data):
                     st.success("🎉 Study task added successfully! Check 'Manage Tasks' tab.")
                     clear_caches_and_rerun()
@@ -542,7 +303,10 @@ with tab1:
             else:
                 st.error("Please correct the input errors above.")
 
-with tab2:
+@st.fragment
+@profiled("study_planner/tab_manage")
+def render_manage_tasks_tab():
+    """Renders the Manage Tasks tab."""
     st.header("📋 Your Study Task Matrix")
     st.markdown("Review, filter, edit, or delete your study tasks. Keep your plan dynamic!")
 
@@ -560,40 +324,35 @@ with tab2:
         with col_search_text:
             search_query = st.text_input("Search (Topic, Notes)", placeholder="e.g., calculus, difficult, revise", key="search_query_task")
 
-        filtered_df = df_tasks.copy()
-        if selected_subject != "All":
-            filtered_df = filtered_df[filtered_df["Subject"] == selected_subject]
-        if selected_status != "All":
-            filtered_df = filtered_df[filtered_df["Status"] == selected_status]
-        if search_query:
-            search_query_lower = search_query.lower()
-            filtered_df = filtered_df[
-                filtered_df.apply(lambda row:
-                    search_query_lower in str(row["Topic"]).lower() or
-                    search_query_lower in str(row["Notes"]).lower(), axis=1
-                )
-            ]
+        with profile_section("study_planner/filter") as section:
+            filtered_df = df_tasks.copy()
+            if selected_subject != "All":
+                filtered_df = filtered_df[filtered_df["Subject"] == selected_subject]
+            if selected_status != "All":
+                filtered_df = filtered_df[filtered_df["Status"] == selected_status]
+            if search_query:
+                search_query_lower = search_query.lower()
+                filtered_df = filtered_df[
+                    filtered_df["Topic"].astype(str).str.lower().str.contains(search_query_lower, regex=False) |
+                    filtered_df["Notes"].astype(str).str.lower().str.contains(search_query_lower, regex=False)
+                ]
+            section.rows = len(filtered_df)
 
         if filtered_df.empty:
             st.warning("No tasks match your current filters. Try adjusting your selections.")
         else:
             st.subheader(f"📊 Displaying {len(filtered_df)} Matching Study Task(s)")
-            # Highlight overdue tasks
-            current_date = pd.Timestamp(date.today())
-            def highlight_overdue(row):
-                if row['Status'] != 'Completed' and row['DueDate'] < current_date:
-                    return ['background-color: #330000; color: #FF4B4B'] * len(row) # Dark red background for overdue
-                return [''] * len(row)
-
-            st.dataframe(filtered_df.set_index("ID").style.apply(highlight_overdue, axis=1), use_container_width=True, height=400)
-
-            st.download_button(
-                label="📥 Download Filtered Tasks as CSV",
-                data=filtered_df.to_csv(index=False).encode('utf-8'),
-                file_name=f"study_tasks_filtered_{date.today().strftime('%Y%m%d')}.csv",
-                mime="text/csv",
-                help="Download the currently filtered study tasks as a CSV file."
-            )
+            # Flag overdue tasks with a computed status column instead of per-row Styler CSS
+            display_df = add_deadline_status(filtered_df)
+            overdue_count = (display_df["Deadline"] == "🔴 Overdue").sum()
+            if overdue_count:
+                st.caption(f"🔴 {overdue_count} overdue task(s) in this view.")
+            st.dataframe(display_df.set_index("ID"), column_config=DEADLINE_COLUMN_CONFIG, use_container_width=True, height=400)
+
+            # The file is streamed from SQLite only when an export is requested, not on every rerun
+            export_sql, export_params = filtered_study_tasks_query(selected_subject, selected_status, search_query)
+            render_export_controls("task_export", DB_FILE, export_sql, export_params,
+                                   base_name=f"study_tasks_filtered_{date.today().strftime('%Y%m%d')}", table="study_tasks")
 
             st.markdown("---")
             col_edit, col_delete = st.columns(2)
@@ -609,17 +368,17 @@ with tab2:
                         entry_to_edit = df_tasks[df_tasks["ID"] == selected_edit_id].iloc[0]
                         with st.form(f"edit_form_{selected_edit_id}"):
                             st.markdown(f"**Editing Task ID: {selected_edit_id}**")
-                            e_subject = st.selectbox("Subject", ["Physics", "Chemistry", "Maths", "Biology", "Computer Science", "General"], index=["Physics", "Chemistry", "Maths", "Biology", "Computer Science", "General"].index(entry_to_edit["Subject"]))
+                            e_subject = st.selectbox("Subject", list(TASK_SUBJECTS), index=TASK_SUBJECTS.index(entry_to_edit["Subject"]))
                             e_topic = st.text_input("Topic/Task Description", value=entry_to_edit["Topic"])
                             e_due_date = st.date_input("Due Date", value=entry_to_edit["DueDate"].date())
-                            e_priority = st.selectbox("Priority", ["High", "Medium", "Low"], index=["High", "Medium", "Low"].index(entry_to_edit["Priority"]))
-                            e_status = st.selectbox("Status", ["Pending", "In Progress", "Completed", "Deferred"], index=["Pending", "In Progress", "Completed", "Deferred"].index(entry_to_edit["Status"]))
+                            e_priority = st.selectbox("Priority", list(TASK_PRIORITIES), index=TASK_PRIORITIES.index(entry_to_edit["Priority"]))
+                            e_status = st.selectbox("Status", list(TASK_STATUSES), index=TASK_STATUSES.index(entry_to_edit["Status"]))
                             e_notes = st.text_area("Notes (opt)", value=entry_to_edit["Notes"], max_chars=500)
 
                             update_button = st.form_submit_button("🔄 Update Task", type="primary", use_container_width=True)
                             if update_button:
                                 if validate_task_inputs(e_subject, e_topic, e_due_date):
-                                    updated_data = (e_subject.strip(), e_topic.strip(), str(e_due_date),
+                                    updated_data = (e_subject.strip(), e_topic.strip(), to_epoch_day(e_due_date),
                                                     e_priority, e_status, e_notes.strip())
                                     if update_study_task(conn, selected_edit_id, updated_data):
                                         st.success(f"🎉 Task ID {selected_edit_id} updated successfully!")
@@ -641,18 +400,21 @@ with tab2:
                                     st.success(f"🗑️ Task ID {selected_delete_id} deleted.")
                                     clear_caches_and_rerun()
 
-with tab3:
+@st.fragment
+@profiled("study_planner/tab_analytics")
+def render_analytics_tab():
+    """Renders the Study Analytics tab."""
     st.header("📈 Your Study Analytics")
     st.markdown("Visualize your task completion, workload distribution, and upcoming deadlines.")
 
-    df_analytics = load_study_tasks(_conn=conn)
+    include_archive = bool(list_archives(DB_FILE)) and st.toggle("🗄️ Include archived years", key="tasks_include_archive",
+                                                                  help="Also count completed tasks moved to the per-year archive files.")
+    df_analytics = (load_study_history(columns=ANALYTICS_COLUMNS) if include_archive
+                    else load_study_tasks(_conn=conn, columns=ANALYTICS_COLUMNS))
 
     if df_analytics.empty:
         st.info("No data available for analytics. Please add some study tasks first in the 'Add New Task' tab!")
     else:
-        # Ensure DueDate is datetime for plotting
-        df_analytics['DueDate'] = pd.to_datetime(df_analytics['DueDate'])
-
         st.subheader("📊 Overall Task Summary")
         col_total, col_pending, col_completed = st.columns(3)
         with col_total:
@@ -716,4 +478,105 @@ with tab3:
                                    labels={'Count': 'Number of Tasks'},
                                    color='Count', color_continuous_scale=px.colors.sequential.Plasma)
         fig_subject_tasks.update_layout(title_x=0.5)
-        st.plotly_chart(fig_subject_tasks, use_container_width=True)
\ No newline at end of file
+        st.plotly_chart(fig_subject_tasks, use_container_width=True)
+
+@st.fragment
+@profiled("study_planner/tab_availability")
+def render_availability_tab():
+    """Renders the Availability tab."""
+    st.header("🕒 Availability & Study Slots")
+    st.markdown("Block out classes and coaching sessions, then let the planner find free slots for your next tasks.")
+
+    calendar = get_availability_calendar(conn)
+
+    with st.form("availability_add_form", clear_on_submit=True):
+        st.markdown("### Add a Busy Block")
+        col_label, col_kind = st.columns(2)
+        with col_label:
+            block_label = st.text_input("🏷️ **Label**", placeholder="e.g., School, Physics Coaching", help="What keeps you busy during this block.")
+        with col_kind:
+            block_kind = st.selectbox("📌 **Type**", BLOCK_KINDS)
+
+        col_from, col_until, col_start, col_end = st.columns(4)
+        with col_from:
+            block_start_date = st.date_input("🗓️ **From**", date.today())
+        with col_until:
+            block_end_date = st.date_input("🔁 **Repeat Until**", date.today() + timedelta(days=120), help="Ignored for one-off blocks.")
+        with col_start:
+            block_start_time = st.time_input("⏰ **Start Time**", datetime.strptime("08:00", "%H:%M").time())
+        with col_end:
+            block_end_time = st.time_input("⏰ **End Time**", datetime.strptime("14:00", "%H:%M").time())
+
+        block_weekdays = st.multiselect("📅 **Repeat On**", list(range(7)), format_func=lambda d: WEEKDAY_NAMES[d],
+                                        help="Leave empty for a one-off block on the 'From' date.")
+
+        if st.form_submit_button("➕ **Add Block**", use_container_width=True, type="primary"):
+            if not block_label.strip():
+                st.error("Label cannot be empty.")
+            elif block_end_time <= block_start_time:
+                st.error("End Time must be after Start Time.")
+            elif block_weekdays and block_end_date < block_start_date:
+                st.error("'Repeat Until' cannot be before 'From'.")
+            elif insert_availability_block(conn, block_label.strip(), block_kind, block_start_date, block_end_date,
+                                           block_start_time, block_end_time, block_weekdays):
+                st.success("🎉 Busy block added!")
+                clear_caches_and_rerun()
+            else:
+                st.error("🚨 Error adding busy block.")
+
+    rules = calendar.rules
+    if rules:
+        st.markdown("---")
+        st.subheader("📋 Your Busy Blocks")
+        rules_df = pd.DataFrame([{
+            "ID": r["ID"], "Label": r["Label"], "Type": r["Kind"],
+            "Days": ", ".join(WEEKDAY_NAMES[d] for d in sorted(r["Weekdays"])) if r["Weekdays"] else "One-off",
+            "From": r["StartDate"], "Until": r["EndDate"],
+            "Time": f"{r['StartTime'].strftime('%H:%M')}-{r['EndTime'].strftime('%H:%M')}",
+        } for r in rules])
+        st.dataframe(rules_df.set_index("ID"), use_container_width=True)
+        selected_block_id = st.selectbox("Select Block ID to Delete", rules_df["ID"].tolist(), key="delete_block_id")
+        if st.button(f"🗑️ Delete Block ID {selected_block_id}", type="secondary"):
+            if delete_availability_block(conn, selected_block_id):
+                st.success(f"🗑️ Block ID {selected_block_id} deleted.")
+                clear_caches_and_rerun()
+
+    st.markdown("---")
+    st.subheader("🟢 Free Slots")
+    slot_day = st.date_input("Show free slots on", date.today(), key="free_slot_day")
+    free_slots = calendar.free_slots(slot_day)
+    if free_slots:
+        st.dataframe(pd.DataFrame([{"From": s.strftime("%H:%M"), "To": e.strftime("%H:%M"),
+                                    "Minutes": int((e - s).total_seconds() // 60)} for s, e in free_slots]),
+                     use_container_width=True, hide_index=True)
+    else:
+        st.info("No free time on this day between 06:00 and 22:00.")
+
+    st.markdown("---")
+    st.subheader("🎯 Suggested Slots for Your Next Tasks")
+    task_minutes = st.slider("Minutes per task", 30, 180, 60, step=15, key="slot_task_minutes")
+    next_tasks = get_task_queue(DB_FILE).peek(10) # Kept current by the add/update/delete functions above
+    suggestions = suggest_task_slots(calendar, next_tasks, date.today(), days=7, task_minutes=task_minutes,
+                                     earliest=datetime.now().replace(second=0, microsecond=0))
+    if suggestions:
+        st.dataframe(pd.DataFrame([{
+            "ID": s["ID"], "Subject": s["Subject"], "Topic": s["Topic"], "Priority": s["Priority"],
+            "Slot": f"{s['SlotStart'].strftime('%a %d %b %H:%M')}-{s['SlotEnd'].strftime('%H:%M')}",
+        } for s in suggestions]), use_container_width=True, hide_index=True)
+    else:
+        st.info("No open tasks to schedule, or no free slots in the next 7 days.")
+
+# Each tab is a fragment, so interacting with one tab doesn't recompute the others.
+with tab1:
+    render_add_task_tab()
+with tab2:
+    render_manage_tasks_tab()
+with tab3:
+    render_analytics_tab()
+with tab4:
+    render_availability_tab()
+
+render_profiler_panel()
+render_sql_trace_panel()
+render_cache_panel()
+rerun_section.stop()
@@ -0,0 +1,213 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+# --- Setup Logging ---
+profiler_logger = logging.getLogger(__name__)
+
+# --- Profiler Configuration ---
+RING_SIZE = 5000 # Section records kept in memory (oldest dropped first)
+DEV_MODE_ENV = "AISCHEDULER_DEV" # Set to 1 (or open a page with ?dev=1) to show the profiler panel
+
+_records = deque(maxlen=RING_SIZE)
+_records_lock = threading.Lock()
+_local = threading.local()
+_run_counter = 0
+_listeners = []
+
+
+def payload_size(value):
+    """Estimates (rows, bytes) of a section's output without deep-scanning it."""
+    if isinstance(value, pd.DataFrame):
+        return len(value), int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, (bytes, bytearray, str)):
+        return None, len(value)
+    if isinstance(value, (list, tuple, dict, set)):
+        return len(value), None
+    return None, None
+
+
+class Section:
+    """One timed section: usable as a context manager or via start()/stop()."""
+
+    def __init__(self, name, rows=None, payload_bytes=None):
+        self.name = name
+        self.rows = rows
+        self.payload_bytes = payload_bytes
+        self._wall = self._cpu = None
+
+    def start(self):
+        self._wall, self._cpu = time.perf_counter(), time.thread_time()
+        return self
+
+    def stop(self, result=None):
+        """Records the section; rows and bytes are taken from `result` when not set explicitly."""
+        if self._wall is None:
+            return None
+        if result is not None:
+            rows, payload_bytes = payload_size(result)
+            self.rows = self.rows if self.rows is not None else rows
+            self.payload_bytes = self.payload_bytes if self.payload_bytes is not None else payload_bytes
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "run": getattr(_local, "run_id", None),
+            "page": getattr(_local, "page", None),
+            "section": self.name,
+            "wall_ms": round((time.perf_counter() - self._wall) * 1000, 3),
+            "cpu_ms": round((time.thread_time() - self._cpu) * 1000, 3),
+            "rows": self.rows,
+            "payload_bytes": self.payload_bytes,
+        }
+        self._wall = None
+        with _records_lock:
+            _records.append(record)
+        for listener in _listeners:
+            try:
+                listener(record)
+            except Exception:
+                profiler_logger.exception(f"Profiler listener failed for {self.name}.")
+        return record
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def profile_section(name, rows=None, payload_bytes=None):
+    """Times a block: `with profile_section("dpp_logger/filter") as section: ...; section.rows = len(df)`."""
+    return Section(name, rows, payload_bytes)
+
+
+def profiled(name):
+    """Decorator that times every call of a function as one section, sizing its return value."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            section = Section(name).start()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                section.stop(result)
+        return wrapper
+    return decorator
+
+
+def begin_rerun(page):
+    """Marks the start of a full script run of a page; returns its section (stop it at the end of the script).
+
+    A script that ends early should leave through rerun_page()/stop_page(), which record the section
+    first; one left open by an exception is dropped here rather than timed across the pause.
+    """
+    global _run_counter
+    left_open = getattr(_local, "rerun_section", None)
+    if left_open is not None and left_open._wall is not None:
+        profiler_logger.debug(f"Dropping the unfinished {left_open.name} section of run {getattr(_local, 'run_id', None)}.")
+    with _records_lock:
+        _run_counter += 1
+        _local.run_id = _run_counter
+    _local.page = page
+    _local.rerun_section = Section(f"{page}/rerun").start()
+    return _local.rerun_section
+
+
+def _stop_rerun_section():
+    section = getattr(_local, "rerun_section", None)
+    if section is not None:
+        section.stop()
+
+
+def rerun_page():
+    """st.rerun() that first records the current run's rerun section (st.rerun() ends the script before its last line)."""
+    _stop_rerun_section()
+    st.rerun()
+
+
+def stop_page():
+    """st.stop() that first records the current run's rerun section."""
+    _stop_rerun_section()
+    st.stop()
+
+
+def add_listener(listener):
+    """Registers a callable that receives every finished section record (e.g. the metrics exporter)."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def records():
+    """Returns a snapshot of the ring buffer, oldest first."""
+    with _records_lock:
+        return list(_records)
+
+
+def section_stats():
+    """Returns per-section call counts and p50/p95 wall and CPU times."""
+    df = pd.DataFrame(records())
+    if df.empty:
+        return df
+    grouped = df.groupby("section")
+    stats = pd.DataFrame({
+        "calls": grouped.size(),
+        "wall_p50_ms": grouped["wall_ms"].median(),
+        "wall_p95_ms": grouped["wall_ms"].quantile(0.95),
+        "cpu_p50_ms": grouped["cpu_ms"].median(),
+        "cpu_p95_ms": grouped["cpu_ms"].quantile(0.95),
+        "rows_p50": grouped["rows"].median(),
+        "bytes_p50": grouped["payload_bytes"].median(),
+    })
+    return stats.sort_values("wall_p95_ms", ascending=False).round(2)
+
+
+def export_jsonl(path=None):
+    """Returns the ring buffer as JSON lines, optionally also writing it to a file."""
+    text = "".join(json.dumps(record) + "\n" for record in records())
+    if path:
+        with open(path, "w") as f:
+            f.write(text)
+    return text
+
+
+def clear():
+    """Empties the ring buffer."""
+    with _records_lock:
+        _records.clear()
+
+
+def dev_mode_enabled():
+    """True when the developer panels should be shown."""
+    return os.environ.get(DEV_MODE_ENV) == "1" or st.query_params.get("dev") == "1"
+
+
+def render_profiler_panel():
+    """Shows p50/p95 section timings in the sidebar (developer mode only)."""
+    if not dev_mode_enabled():
+        return
+    with st.sidebar.expander("🛠️ Render Profiler", expanded=False):
+        stats = section_stats()
+        if stats.empty:
+            st.caption("No sections recorded yet.")
+            return
+        st.caption(f"Last {len(records())} section timings in this server process.")
+        st.dataframe(stats, use_container_width=True)
+        # The export is only built when asked for, not on every rerun of a page in developer mode
+        if st.button("📦 Prepare JSONL Export", key="prepare_render_profile"):
+            st.session_state.render_profile_export = (export_jsonl(), f"render_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        prepared = st.session_state.get("render_profile_export")
+        if prepared:
+            st.download_button("📥 Export JSONL", data=prepared[0], file_name=prepared[1], mime="application/jsonl")
+        if st.button("🧹 Clear Profile", key="clear_render_profile"):
+            clear()
+            st.session_state.pop("render_profile_export", None)
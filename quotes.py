@@ -0,0 +1,178 @@
+import csv
+import logging
+import os
+import random
+import re
+import threading
+from array import array
+from datetime import date
+
+# --- Setup Logging ---
+quotes_logger = logging.getLogger(__name__)
+
+# --- Quote Configuration ---
+QUOTE_FILES = ("quotes.csv", "quotes.txt") # CSV has Author, Quote and an optional Tags column; TXT is one quote per line
+DEFAULT_QUOTE = ("Discipline is the bridge between goals and accomplishment.", None)
+# Tags for quotes whose file has no Tags column: a quote gets a tag when it mentions one of its words.
+TAG_KEYWORDS = {
+    "discipline": ("discipline", "habit", "practice", "effort", "work"),
+    "success": ("success", "succeed", "achieve", "accomplish", "goal", "win"),
+    "failure": ("fail", "failure", "mistake", "defeat", "error"),
+    "courage": ("courage", "brave", "fear", "dare", "bold"),
+    "perseverance": ("persever", "persist", "patience", "keep going", "never give up", "endure", "continue"),
+    "learning": ("learn", "knowledge", "study", "wisdom", "teach", "understand", "mind"),
+    "time": ("time", "today", "tomorrow", "moment", "clock"),
+}
+_TAG_OF_WORD = {word: tag for tag, words in TAG_KEYWORDS.items() for word in words}
+_TAG_PATTERN = re.compile(r"\b(" + "|".join(sorted(map(re.escape, _TAG_OF_WORD), key=len, reverse=True)) + ")") # One pass per quote
+
+
+def _derive_tags(text):
+    return sorted({_TAG_OF_WORD[word] for word in _TAG_PATTERN.findall(text.lower())})
+
+
+class ShuffledCursor:
+    """Walks a pool of quote indices in a shuffled order, reshuffling after each full pass (no repeats within a pass)."""
+
+    def __init__(self, pool, rng):
+        self._order = array("I", pool)
+        self._rng = rng
+        self._position = len(self._order) # Shuffle lazily on the first call
+
+    def next(self):
+        if self._position >= len(self._order):
+            last = self._order[-1] if self._position else None
+            self._rng.shuffle(self._order)
+            if last is not None and len(self._order) > 1 and self._order[0] == last:
+                self._order[0], self._order[-1] = self._order[-1], self._order[0] # No repeat across the pass boundary
+            self._position = 0
+        index = self._order[self._position]
+        self._position += 1
+        return index
+
+
+class QuoteStore:
+    """In-memory quote corpus with per-author and per-tag index arrays.
+
+    Every pick is O(1): a pool (all quotes, or one author's / one tag's index array) is
+    looked up in a dict and indexed directly. Daily picks walk a fixed, seeded permutation
+    of the pool by day number, so the quote of the day is the same in every session and
+    process and doesn't repeat until the whole pool has been shown.
+    """
+
+    def __init__(self, quotes):
+        self._texts = []
+        self._author_ids = array("I") # Index into self._authors (0 = unknown)
+        self._authors = [None]
+        author_ids = {}
+        by_author, by_tag = {}, {}
+        for text, author, tags in quotes:
+            index = len(self._texts)
+            self._texts.append(text)
+            if author:
+                author_id = author_ids.get(author)
+                if author_id is None:
+                    author_id = author_ids[author] = len(self._authors)
+                    self._authors.append(author)
+                self._author_ids.append(author_id)
+                by_author.setdefault(author.lower(), array("I")).append(index)
+            else:
+                self._author_ids.append(0)
+            for tag in tags:
+                by_tag.setdefault(tag, array("I")).append(index)
+        self._all = array("I", range(len(self._texts)))
+        self._by_author = by_author
+        self._by_tag = by_tag
+        self._combined = {} # (author, tag) -> intersection of the two pools
+        self._daily_orders = {} # pool key -> seeded permutation, built on first use
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._texts)
+
+    @classmethod
+    def from_files(cls, paths=QUOTE_FILES):
+        """Loads every quote file that exists, skipping blank and duplicate quotes."""
+        quotes, seen = [], set()
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, newline="", encoding="utf-8") as f:
+                if path.endswith(".csv"):
+                    rows = ((row.get("Quote") or "", row.get("Author") or "", row.get("Tags")) for row in csv.DictReader(f))
+                else:
+                    rows = ((line, "", None) for line in f)
+                for text, author, tags in rows:
+                    text = text.strip()
+                    if not text or text in seen:
+                        continue
+                    seen.add(text)
+                    tags = [t.strip().lower() for t in tags.split(";") if t.strip()] if tags else _derive_tags(text)
+                    quotes.append((text, author.strip() or None, tags))
+        store = cls(quotes)
+        quotes_logger.info(f"Loaded {len(store)} quotes from {', '.join(p for p in paths if os.path.exists(p)) or 'no files'}.")
+        return store
+
+    @property
+    def authors(self):
+        return sorted(self._authors[1:])
+
+    @property
+    def tags(self):
+        return sorted(self._by_tag)
+
+    def tag_counts(self):
+        return {tag: len(pool) for tag, pool in sorted(self._by_tag.items())}
+
+    def _pool(self, author=None, tag=None):
+        """Index array for a filter; with both filters the smaller pool is intersected with the other (once)."""
+        author_pool = self._by_author.get(author.lower(), array("I")) if author else None
+        tag_pool = self._by_tag.get(tag.lower(), array("I")) if tag else None
+        if author_pool is None or tag_pool is None:
+            return author_pool if author_pool is not None else tag_pool if tag_pool is not None else self._all
+        key = (author.lower(), tag.lower())
+        pool = self._combined.get(key)
+        if pool is None:
+            small, large = sorted((author_pool, tag_pool), key=len)
+            large = set(large)
+            pool = self._combined[key] = array("I", (i for i in small if i in large))
+        return pool
+
+    def _quote(self, index):
+        return self._texts[index], self._authors[self._author_ids[index]]
+
+    def random_quote(self, author=None, tag=None):
+        """Returns a uniformly random (text, author) from the filtered pool (the default quote if it's empty)."""
+        pool = self._pool(author, tag)
+        return self._quote(pool[random.randrange(len(pool))]) if pool else DEFAULT_QUOTE
+
+    def daily_quote(self, day=None, author=None, tag=None):
+        """Returns the (text, author) of the day; stable for a given day and filter."""
+        key = ((author or "").lower(), (tag or "").lower())
+        with self._lock:
+            order = self._daily_orders.get(key)
+            if order is None:
+                order = array("I", self._pool(author, tag))
+                random.Random(f"daily|{key[0]}|{key[1]}").shuffle(order) # String seeds are hashed deterministically
+                self._daily_orders[key] = order
+        if not order:
+            return DEFAULT_QUOTE
+        return self._quote(order[(day or date.today()).toordinal() % len(order)])
+
+    def next_quote(self, author=None, tag=None):
+        """Returns the next quote from a shuffled rotation of the filtered pool (no repeats until it's exhausted)."""
+        key = ((author or "").lower(), (tag or "").lower())
+        with self._lock:
+            cursor = self._cursors.get(key)
+            if cursor is None:
+                pool = self._pool(author, tag)
+                if not pool:
+                    return DEFAULT_QUOTE
+                cursor = self._cursors[key] = ShuffledCursor(pool, random.Random())
+            return self._quote(cursor.next())
+
+
+def quote_files_version(paths=QUOTE_FILES):
+    """Modification times of the quote files; pass to a cached loader so edits are picked up."""
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in paths)
@@ -0,0 +1,392 @@
+import sqlite3
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+
+from availability import to_minutes, from_minutes
+from db_schema import from_epoch_day
+from sql_trace import traced_connect
+
+# --- Setup Logging ---
+reminder_logger = logging.getLogger(__name__)
+
+# --- Reminder Configuration ---
+DUE_TOMORROW_AT = time(18, 0) # Evening heads-up the day before a task is due
+DUE_TODAY_AT = time(8, 0) # Morning reminder on the due date (tasks and reviews)
+MISSED_GRACE = timedelta(hours=12) # Reminders older than this at load time are dropped, not fired late
+NOTIFICATION_TIMEOUT = 10 # Seconds a desktop notification stays visible
+MAX_DELIVERY_ATTEMPTS = 5 # A reminder the sink keeps failing on is retried once a minute, this many times in all
+
+
+# --- Hierarchical Timer Wheel ---
+
+class TimerWheel:
+    """Three-level hashed timer wheel with one-minute resolution.
+
+    Level 0 has 60 one-minute slots, level 1 has 24 one-hour slots and level 2 has
+    512 one-day slots; anything further out waits in an overflow list. Inserting
+    and cancelling are O(1); advancing costs O(1) per elapsed minute plus the
+    timers that cascade down or expire.
+    """
+
+    LEVELS = ((1, 60), (60, 24), (1440, 512)) # (minutes per slot, number of slots)
+
+    def __init__(self, now_minute):
+        self.current = now_minute
+        self._slots = [[[] for _ in range(size)] for _, size in self.LEVELS]
+        self._overflow = []
+        self._due = []
+        self._timers = {} # key -> [expiry, key, payload, cancelled]
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    def _place(self, timer):
+        expiry = timer[0]
+        if expiry <= self.current:
+            self._due.append(timer)
+            return
+        for level, (span, size) in enumerate(self.LEVELS):
+            if expiry // span - self.current // span < size:
+                self._slots[level][(expiry // span) % size].append(timer)
+                return
+        self._overflow.append(timer)
+
+    def schedule(self, key, expiry_minute, payload):
+        """Schedules (or reschedules) a timer under a unique key."""
+        self.cancel(key)
+        timer = [expiry_minute, key, payload, False]
+        self._timers[key] = timer
+        self._place(timer)
+
+    def cancel(self, key):
+        """Cancels a pending timer; the slot entry is dropped lazily when reached."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer[3] = True
+
+    def _cascade(self, level):
+        span, size = self.LEVELS[level]
+        slot = self._slots[level][(self.current // span) % size]
+        self._slots[level][(self.current // span) % size] = []
+        for timer in slot:
+            if not timer[3]:
+                self._place(timer)
+
+    def advance(self, now_minute):
+        """Moves the wheel forward to now_minute and returns the expired (key, payload) pairs."""
+        expired = []
+        while True:
+            for timer in self._due:
+                if not timer[3]:
+                    expired.append(timer)
+            self._due = []
+            if self.current >= now_minute:
+                break
+            self.current += 1
+            if self.current % 1440 == 0:
+                overflow, self._overflow = self._overflow, []
+                for timer in overflow:
+                    if not timer[3]:
+                        self._place(timer)
+                self._cascade(2)
+            if self.current % 60 == 0:
+                self._cascade(1)
+            slot_index = self.current % 60
+            slot, self._slots[0][slot_index] = self._slots[0][slot_index], []
+            self._due.extend(slot)
+        for timer in expired:
+            self._timers.pop(timer[1], None)
+        return [(timer[1], timer[2]) for timer in expired]
+
+    def next_expiry(self):
+        """Returns the earliest pending expiry (O(n); only used for display)."""
+        return min((timer[0] for timer in self._timers.values()), default=None)
+
+
+# --- Notification Sinks ---
+
+class LogSink:
+    """Writes reminders to the application log."""
+
+    def __call__(self, reminder):
+        reminder_logger.info(f"REMINDER: {reminder['title']} - {reminder['message']}")
+
+
+class DesktopSink:
+    """Shows reminders as desktop notifications through plyer, falling back to the log."""
+
+    def __init__(self, app_name="Quantum Study Dashboard"):
+        self.app_name = app_name
+        self._fallback = LogSink()
+
+    def __call__(self, reminder):
+        try:
+            from plyer import notification # Imported lazily; optional on headless servers
+            notification.notify(title=reminder['title'], message=reminder['message'],
+                                app_name=self.app_name, timeout=NOTIFICATION_TIMEOUT)
+        except Exception as e:
+            reminder_logger.warning(f"Desktop notification unavailable ({e}); logging reminder instead.")
+            self._fallback(reminder)
+
+
+class MemorySink:
+    """Collects reminders in a list, for tests and previews."""
+
+    def __init__(self):
+        self.delivered = []
+
+    def __call__(self, reminder):
+        self.delivered.append(reminder)
+
+
+# --- Reminder Builders ---
+
+def task_reminders(task):
+    """Returns the (key, fire_at, reminder) entries for one study_tasks row."""
+    if task.get("Status") == "Completed" or task.get("DueDate") is None:
+        return []
+    due = task["DueDate"]
+    if isinstance(due, int): # study_tasks stores epoch days
+        due = from_epoch_day(due)
+    due = date.fromisoformat(str(due)[:10]) if not isinstance(due, date) else due
+    due = due.date() if isinstance(due, datetime) else due
+    label = f"{task.get('Subject', '')}: {task.get('Topic', '')}"
+    return [
+        (f"task:{task['ID']}:{due}:eve", datetime.combine(due - timedelta(days=1), DUE_TOMORROW_AT),
+         {"title": "📚 Task due tomorrow", "message": label, "task_id": task['ID']}),
+        (f"task:{task['ID']}:{due}:day", datetime.combine(due, DUE_TODAY_AT),
+         {"title": "⏰ Task due today", "message": label, "task_id": task['ID']}),
+    ]
+
+
+def review_reminder(subject, chapter, due_day):
+    """Returns the (key, fire_at, reminder) entry for one review_state row."""
+    return (f"review:{subject}:{chapter}:{due_day}", datetime.combine(due_day, DUE_TODAY_AT),
+            {"title": "🧠 Review due", "message": f"{subject}: {chapter}"})
+
+
+# --- Reminder Service ---
+
+class ReminderService:
+    """Delivers task and review reminders from an in-memory timer wheel.
+
+    The database is read once at start; afterwards pages report edits through
+    upsert_task/remove_task. Delivered reminder keys are recorded in the
+    reminder_log table, so a reminder is never shown twice, even across restarts.
+    """
+
+    def __init__(self, db_file, sink=None):
+        self.db_file = db_file
+        self.sink = sink or LogSink()
+        self._wheel = TimerWheel(to_minutes(datetime.now()))
+        self._task_keys = {} # task_id -> reminder keys, for O(1) cancellation on edits
+        self._review_keys = set()
+        self._delivered = set()
+        self._attempts = {} # key -> failed deliveries so far
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _connect(self):
+        return traced_connect(self.db_file, check_same_thread=False)
+
+    def _schedule(self, key, fire_at, reminder, now):
+        if key in self._delivered or fire_at < now - MISSED_GRACE:
+            return False
+        self._wheel.schedule(key, to_minutes(fire_at), reminder)
+        return True
+
+    @staticmethod
+    def _table_exists(conn, table):
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+    def load(self):
+        """Schedules every pending reminder from study_tasks and review_state."""
+        now = datetime.now()
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reminder_log (
+                    ReminderKey TEXT PRIMARY KEY,
+                    DeliveredAt TEXT NOT NULL
+                );
+            """)
+            conn.commit()
+            self._delivered = {row[0] for row in conn.execute("SELECT ReminderKey FROM reminder_log")}
+            tasks = []
+            if self._table_exists(conn, "study_tasks"):
+                cursor = conn.execute("SELECT ID, Subject, Topic, DueDate, Status FROM study_tasks WHERE Status != 'Completed'")
+                columns = [c[0] for c in cursor.description]
+                tasks = [dict(zip(columns, row)) for row in cursor]
+        except sqlite3.Error:
+            reminder_logger.exception("Failed to load reminders.")
+            return 0
+        finally:
+            conn.close()
+
+        scheduled = 0
+        with self._lock:
+            for task in tasks:
+                scheduled += self._upsert_task_locked(task, now)
+        scheduled += self.reload_reviews()
+        reminder_logger.info(f"Reminder service loaded {scheduled} pending reminder(s).")
+        return scheduled
+
+    def reload_reviews(self):
+        """Replaces the review reminders with the current review_state due days."""
+        conn = self._connect()
+        try:
+            reviews = []
+            if self._table_exists(conn, "review_state"):
+                reviews = conn.execute("SELECT Subject, Chapter, DueDay FROM review_state").fetchall()
+        except sqlite3.Error:
+            reminder_logger.exception("Failed to load review reminders.")
+            return 0
+        finally:
+            conn.close()
+
+        now = datetime.now()
+        with self._lock:
+            for key in self._review_keys:
+                self._wheel.cancel(key)
+            self._review_keys = set()
+            for subject, chapter, due_day in reviews:
+                key, fire_at, reminder = review_reminder(subject, chapter, date(1970, 1, 1) + timedelta(days=int(due_day)))
+                if self._schedule(key, fire_at, reminder, now):
+                    self._review_keys.add(key)
+        return len(self._review_keys)
+
+    def _upsert_task_locked(self, task, now):
+        for key in self._task_keys.pop(task['ID'], []):
+            self._wheel.cancel(key)
+        keys = []
+        entries = task_reminders(task)
+        for index, (key, fire_at, reminder) in enumerate(entries):
+            if index + 1 < len(entries) and entries[index + 1][1] <= now:
+                continue # A later reminder for this task is already due; don't send the stale one too
+            if self._schedule(key, fire_at, reminder, now):
+                keys.append(key)
+        if keys:
+            self._task_keys[task['ID']] = keys
+        return len(keys)
+
+    def upsert_task(self, task):
+        """Reschedules the reminders of a task after it is added or edited."""
+        with self._lock:
+            self._upsert_task_locked(task, datetime.now())
+
+    def remove_task(self, task_id):
+        """Cancels the reminders of a deleted task."""
+        with self._lock:
+            for key in self._task_keys.pop(task_id, []):
+                self._wheel.cancel(key)
+
+    def clear_tasks(self):
+        """Cancels every task reminder (used when the planner is wiped)."""
+        with self._lock:
+            for keys in self._task_keys.values():
+                for key in keys:
+                    self._wheel.cancel(key)
+            self._task_keys = {}
+
+    def _retry(self, key, reminder, now):
+        """Reschedules a reminder the sink failed on for the next minute, unless it was cancelled or has failed too often."""
+        attempts = self._attempts.pop(key, 0) + 1
+        with self._lock:
+            wanted = key in self._review_keys or key in self._task_keys.get(reminder.get("task_id"), ())
+            if wanted and attempts < MAX_DELIVERY_ATTEMPTS:
+                self._attempts[key] = attempts
+                self._wheel.schedule(key, to_minutes(now) + 1, reminder)
+                return
+        if wanted:
+            reminder_logger.error(f"Giving up on reminder {key} after {attempts} failed attempt(s).")
+
+    def tick(self, now=None):
+        """Advances the wheel to now and delivers each expired reminder once.
+
+        A reminder is recorded in reminder_log only after the sink has accepted it, so one
+        the sink fails on is retried (see _retry) rather than marked delivered.
+        """
+        now = now or datetime.now()
+        with self._lock:
+            expired = self._wheel.advance(to_minutes(now))
+        if not expired:
+            return 0
+        conn = self._connect()
+        delivered = 0
+        try:
+            for key, reminder in expired:
+                if conn.execute("SELECT 1 FROM reminder_log WHERE ReminderKey = ?", (key,)).fetchone():
+                    self._delivered.add(key)
+                    continue # Already delivered by a previous run
+                try:
+                    self.sink(reminder)
+                except Exception:
+                    reminder_logger.exception(f"Reminder sink failed for {key}.")
+                    self._retry(key, reminder, now)
+                    continue
+                conn.execute("INSERT OR IGNORE INTO reminder_log (ReminderKey, DeliveredAt) VALUES (?, ?)",
+                             (key, datetime.now().isoformat()))
+                conn.commit()
+                self._delivered.add(key)
+                self._attempts.pop(key, None)
+                delivered += 1
+        finally:
+            conn.close()
+        return delivered
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                reminder_logger.exception("Reminder dispatcher tick failed.")
+            now = datetime.now()
+            self._stop.wait(60 - now.second - now.microsecond / 1e6) # Wake at the next minute boundary
+
+    def start(self):
+        """Loads pending reminders and starts the background dispatcher thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self.load()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reminder-dispatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the dispatcher thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    @property
+    def pending(self):
+        return len(self._wheel)
+
+    @property
+    def next_due(self):
+        with self._lock:
+            expiry = self._wheel.next_expiry()
+        return from_minutes(expiry) if expiry is not None else None
+
+
+# --- Process-wide Service ---
+# Kept outside st.cache_resource so clear_caches_and_rerun() doesn't spawn extra dispatcher threads.
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_reminder_service(db_file, sink=None):
+    """Returns the running reminder service for a database, starting it on first use."""
+    with _services_lock:
+        service = _services.get(db_file)
+        if service is None:
+            service = _services[db_file] = ReminderService(db_file, sink or DesktopSink())
+            service.start()
+        return service
@@ -0,0 +1,219 @@
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import time
+
+import streamlit as st
+
+from backups import create_backup, list_backups
+from cache_telemetry import clear_caches
+from db_pool import drain_pools
+from db_schema import DATABASES, SCHEMA_VERSION, database_tables, migrate, table_columns
+from profiler import rerun_page
+from reminders import get_reminder_service
+from sql_trace import traced_connect
+from review_scheduler import create_review_state_table, rebuild_review_state
+from task_queue import reload_task_queue
+
+# --- Setup Logging ---
+restore_logger = logging.getLogger(__name__)
+
+# --- Restore Configuration ---
+COPY_CHUNK_BYTES = 1024 * 1024 # Uploads and backups are copied to the staging file 1 MiB at a time
+LOCK_TIMEOUT = 30 # Seconds to wait for in-flight writers before giving up on a swap
+SQLITE_HEADER = b"SQLite format 3\x00"
+DERIVED_TABLES = {"review_state"} # Recomputed from the merged rows rather than copied
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class RestoreError(Exception):
+    """Raised when a restore source fails validation; the live database is left untouched."""
+
+
+def _staging_path(db_file):
+    return f"{db_file}.restore-staging" # Same directory as the database, so os.replace() is atomic
+
+
+def stage_file(source, db_file):
+    """Copies an uploaded file object (or a path) to the staging file in chunks, gunzipping .gz sources."""
+    staging_path = _staging_path(db_file)
+    f_in = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        magic = f_in.read(2)
+        f_in.seek(0)
+        reader = gzip.GzipFile(fileobj=f_in) if magic == GZIP_MAGIC else f_in
+        with open(staging_path, "wb") as f_out:
+            shutil.copyfileobj(reader, f_out, length=COPY_CHUNK_BYTES)
+    finally:
+        if f_in is not source:
+            f_in.close()
+    return staging_path
+
+
+def validate_and_migrate(staging_path, db_file):
+    """Checks the staged file is an intact SQLite database for `db_file` and migrates it to the current schema."""
+    with open(staging_path, "rb") as f:
+        if f.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+            raise RestoreError("The file is not a SQLite database.")
+    tables = database_tables(db_file)
+    conn = sqlite3.connect(staging_path)
+    try:
+        try:
+            problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        except sqlite3.DatabaseError as e: # Raised instead of a report when the header or schema is unreadable
+            raise RestoreError(f"Integrity check failed: {e}") from e
+        if problems != ["ok"]:
+            raise RestoreError(f"Integrity check failed: {'; '.join(problems[:5])}")
+        present = [table for table in tables if table_columns(conn, table)]
+        if tables and not present:
+            raise RestoreError(f"None of the expected tables ({', '.join(tables)}) are in the file; is it a backup of {os.path.basename(db_file)}?")
+        try:
+            from_version, steps = migrate(conn, tables)
+        except sqlite3.DatabaseError as e:
+            raise RestoreError(str(e)) from e
+        row_counts = {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+    finally:
+        conn.close()
+    return {"from_version": from_version, "migration_steps": steps, "rows": row_counts}
+
+
+def _refresh_after_restore(db_file):
+    """Drops every cached connection and frame of the old file so the app reconnects to the new one."""
+    drain_pools()
+    clear_caches()
+    if "study_tasks" in database_tables(db_file):
+        reminders = get_reminder_service(db_file)
+        reminders.clear_tasks()
+        reminders.load()
+        reload_task_queue(db_file)
+
+
+def replace_database(staging_path, db_file):
+    """Atomically swaps the staged file in for the live database once in-flight writers have finished."""
+    lock_conn = None
+    if os.path.exists(db_file):
+        lock_conn = sqlite3.connect(db_file, timeout=LOCK_TIMEOUT, isolation_level=None)
+        if lock_conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            lock_conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        lock_conn.execute("BEGIN EXCLUSIVE") # Waits for current writers, then holds off new ones until the swap is done
+    try:
+        drain_pools()
+        os.replace(staging_path, db_file)
+        for suffix in ("-wal", "-shm", "-journal"): # Left over from the old file; they would corrupt the new one
+            if os.path.exists(db_file + suffix):
+                os.remove(db_file + suffix)
+    finally:
+        if lock_conn is not None:
+            lock_conn.close()
+
+
+def merge_database(staging_path, db_file):
+    """Inserts the staged file's rows into the live database, skipping rows that already exist.
+
+    Every table in the file is merged (notes, availability, reminder_log, ... as well as the core
+    tables), creating it when the live database lacks it; DERIVED_TABLES are rebuilt instead.
+    Auto-increment IDs are left to the live table so they can't collide; duplicates are detected
+    by each table's UNIQUE/primary key constraints, or, for a table with none, by comparing whole
+    rows. Returns rows added per table.
+    """
+    tables = database_tables(db_file)
+    conn = traced_connect(db_file, timeout=LOCK_TIMEOUT)
+    try:
+        conn.execute("ATTACH DATABASE ? AS incoming", (staging_path,))
+        added = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            others = {name: sql for name, sql in conn.execute(
+                "SELECT name, sql FROM incoming.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite%' ORDER BY name")
+                if name not in tables and name not in DERIVED_TABLES}
+            for table in list(tables) + list(others):
+                if table in tables:
+                    conn.execute(tables[table])
+                elif not table_columns(conn, table):
+                    conn.execute(others[table]) # Same definition as in the file (its indexes are recreated by the page that owns it)
+                live = table_columns(conn, table)
+                rowid_alias = {name for name, declared_type, _, _, pk in live if pk == 1 and declared_type.upper() == "INTEGER"
+                               and sum(1 for column in live if column[4]) == 1}
+                incoming = {column[0] for column in table_columns(conn, table, schema="incoming")}
+                columns = ", ".join(f'"{name}"' for name, *_ in live if name in incoming and name not in rowid_alias)
+                if not columns:
+                    continue
+                keyed = any(index[2] for index in conn.execute(f'PRAGMA main.index_list("{table}")')) # Any UNIQUE index or non-rowid key
+                before = conn.total_changes
+                if keyed:
+                    conn.execute(f'INSERT OR IGNORE INTO main."{table}" ({columns}) SELECT {columns} FROM incoming."{table}"')
+                else:
+                    conn.execute(f'INSERT INTO main."{table}" ({columns}) SELECT {columns} FROM incoming."{table}" '
+                                 f'EXCEPT SELECT {columns} FROM main."{table}"')
+                added[table] = conn.total_changes - before
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        conn.execute("DETACH DATABASE incoming")
+        # Merged DPPs change their chapters' review history; the reminders pick the new due days up on reload
+        if added.get("dpp_log") and not (create_review_state_table(conn) and rebuild_review_state(conn)):
+            restore_logger.warning(f"Merged {added['dpp_log']} DPP(s) into {db_file} but could not rebuild review_state.")
+    finally:
+        conn.close()
+    return added
+
+
+def restore_database(source, db_file, mode="replace"):
+    """Stages, validates and migrates a database file, then replaces or merges into `db_file`.
+
+    A backup of the live database is taken first (see backups.py), so a restore can itself be undone.
+    Returns a report dict; raises RestoreError when the source is rejected.
+    """
+    started = time.perf_counter()
+    staging_path = stage_file(source, db_file)
+    try:
+        report = validate_and_migrate(staging_path, db_file)
+        report["safety_backup"] = create_backup(db_file)["file_name"] if os.path.exists(db_file) else None
+        if mode == "merge":
+            report["rows_added"] = merge_database(staging_path, db_file)
+        else:
+            replace_database(staging_path, db_file)
+    finally:
+        if os.path.exists(staging_path):
+            os.remove(staging_path)
+    _refresh_after_restore(db_file)
+    report["seconds"] = time.perf_counter() - started
+    restore_logger.info(f"Restored {db_file} ({mode}) in {report['seconds'] * 1000:.0f} ms: {report}")
+    return report
+
+
+def render_restore_controls():
+    """Restore (replace or merge) a database from an uploaded file or one of its backups."""
+    report = st.session_state.pop("restore_report", None)
+    if report:
+        st.success(f"✅ Restored {report['db_file']} in {report['seconds'] * 1000:.0f} ms "
+                   f"(schema v{report['from_version']} → v{SCHEMA_VERSION}{', ' + str(len(report['migration_steps'])) + ' migration step(s)' if report['migration_steps'] else ''}).")
+        st.caption(" · ".join(f"{table}: {count} rows" for table, count in (report.get("rows_added") or report["rows"]).items())
+                   + (" added" if "rows_added" in report else "") + (f" · previous data saved as {report['safety_backup']}" if report["safety_backup"] else ""))
+    db_file = st.selectbox("Database to Restore", list(DATABASES), key="restore_target")
+    source_kind = st.radio("Source", ["Upload a file", "Existing backup"], horizontal=True, key="restore_source")
+    source = None
+    if source_kind == "Upload a file":
+        source = st.file_uploader("SQLite database (.db) or compressed backup (.db.gz)", type=["db", "sqlite", "gz"], key="restore_upload")
+    else:
+        backups = list_backups(db_file)
+        if backups:
+            source = st.selectbox("Backup", [b["path"] for b in backups], key="restore_backup",
+                                  format_func=lambda p: os.path.basename(p))
+        else:
+            st.caption("No backups of this database yet.")
+    mode = st.radio("Mode", ["Replace", "Merge rows"], horizontal=True, key="restore_mode",
+                    help="Replace swaps in the whole file; Merge adds its rows that aren't already in the live database.")
+    confirmed = mode == "Merge rows" or st.checkbox("I understand the current data will be replaced (a backup is taken first).", key="restore_confirm")
+    if st.button("🛠️ Validate & Restore", key="restore_button", disabled=source is None or not confirmed, use_container_width=True):
+        try:
+            with st.spinner("Validating and restoring..."):
+                report = restore_database(source, db_file, mode="merge" if mode == "Merge rows" else "replace")
+            st.session_state["restore_report"] = {**report, "db_file": db_file}
+            rerun_page() # Every page must reload from the restored data
+        except (RestoreError, sqlite3.Error, OSError, EOFError, gzip.BadGzipFile) as e:
+            restore_logger.error(f"Restore of {db_file} failed: {e}")
+            st.error(f"🚨 Restore failed; the current database was not changed. {e}")
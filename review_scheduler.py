@@ -0,0 +1,258 @@
+import sqlite3
+import logging
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from archive import history_table
+from db_schema import TASK_SUBJECTS, to_epoch_day
+
+# --- Setup Logging ---
+review_logger = logging.getLogger(__name__)
+
+# --- SM-2 Configuration ---
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+PASSING_QUALITY = 3 # SM-2 quality (0-5) at or above which a review counts as recalled
+SLOW_TIME_FACTOR = 1.5 # Taking this much longer than the chapter's usual time costs one quality point
+TIME_SMOOTHING = 0.3 # Weight of the newest Time_Taken in the chapter's running average
+
+# study_tasks only accepts the planner's subject list; DPP-only subjects are mapped onto it.
+PLANNER_SUBJECT_MAP = {"Others": "General"}
+REVIEW_TOPIC_PREFIX = "Revise: "
+
+
+def create_review_state_table(conn):
+    """Creates the review_state table (one row per Subject/Chapter) if it doesn't already exist."""
+    if conn is None:
+        return False
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS review_state (
+                Subject TEXT NOT NULL,
+                Chapter TEXT NOT NULL,
+                Repetitions INTEGER NOT NULL DEFAULT 0,
+                Ease REAL NOT NULL DEFAULT 2.5,
+                IntervalDays INTEGER NOT NULL DEFAULT 0,
+                Lapses INTEGER NOT NULL DEFAULT 0,
+                AvgTime REAL,
+                LastReviewDay INTEGER NOT NULL,
+                DueDay INTEGER NOT NULL,
+                PRIMARY KEY (Subject, Chapter)
+            );
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_review_state_due ON review_state (DueDay);")
+        conn.commit()
+        review_logger.info("Review state table ensured.")
+    except sqlite3.Error:
+        review_logger.exception("Failed to create review_state table.")
+        return False
+    try:
+        # Backfill once from existing DPP history.
+        if conn.execute("SELECT 1 FROM review_state LIMIT 1").fetchone() is None and \
+                conn.execute("SELECT 1 FROM dpp_log LIMIT 1").fetchone() is not None:
+            rebuild_review_state(conn)
+        return True
+    except sqlite3.Error:
+        review_logger.exception("Failed to create review_state table.")
+        return False
+
+# --- Vectorized SM-2 Core ---
+
+def review_quality(accuracy, time_taken, avg_time):
+    """Maps DPP accuracy (0-100) and time taken to an SM-2 quality grade (0-5), element-wise."""
+    accuracy = np.asarray(accuracy, dtype=float)
+    time_taken = np.asarray(time_taken, dtype=float)
+    avg_time = np.asarray(avg_time, dtype=float)
+    quality = np.rint(np.clip(accuracy, 0, 100) / 20.0)
+    slow = np.nan_to_num(time_taken > SLOW_TIME_FACTOR * avg_time, nan=False)
+    return np.clip(quality - slow, 0, 5)
+
+
+def sm2_step(repetitions, ease, interval, lapses, quality):
+    """Applies one SM-2 review to arrays of chapter states and returns the updated arrays."""
+    passed = quality >= PASSING_QUALITY
+    next_interval = np.where(repetitions == 0, 1, np.where(repetitions == 1, 6, np.rint(interval * ease)))
+    interval = np.where(passed, next_interval, 1).astype(np.int64)
+    repetitions = np.where(passed, repetitions + 1, 0)
+    lapses = np.where(passed, lapses, lapses + 1)
+    penalty = 5 - quality
+    ease = np.maximum(MIN_EASE, ease + 0.1 - penalty * (0.08 + penalty * 0.02))
+    return repetitions, ease, interval, lapses
+
+# --- Incremental and Bulk Updates ---
+
+def rebuild_review_state(conn):
+    """Recomputes review_state for every chapter from the full dpp_log history.
+
+    Reviews are replayed in date order, one vectorized step per review *rank*
+    (1st review of every chapter, then 2nd, ...) rather than one Python step per row.
+    Rows are sorted by rank once, so each step slices its rows instead of scanning them all.
+    """
+    if conn is None:
+        return False
+    try:
+        # Archived years are part of each chapter's history (see archive.py)
+        logs = pd.read_sql(f"SELECT Date, Subject, Chapter, Accuracy, Time_Taken FROM {history_table(conn, 'dpp_log')} ORDER BY Date ASC, ID ASC", conn)
+        conn.execute("DELETE FROM review_state")
+        if logs.empty:
+            conn.commit()
+            return True
+        logs['Chapter'] = logs['Chapter'].str.strip()
+        # Group numbers follow first appearance, matching drop_duplicates order below.
+        keys = logs.groupby(['Subject', 'Chapter'], sort=False).ngroup().to_numpy()
+        ranks = logs.groupby(['Subject', 'Chapter'], sort=False).cumcount().to_numpy()
+        n_chapters = keys.max() + 1
+
+        repetitions = np.zeros(n_chapters, dtype=np.int64)
+        ease = np.full(n_chapters, INITIAL_EASE)
+        interval = np.zeros(n_chapters, dtype=np.int64)
+        lapses = np.zeros(n_chapters, dtype=np.int64)
+        avg_time = np.full(n_chapters, np.nan)
+        last_day = np.zeros(n_chapters, dtype=np.int64)
+
+        accuracy = logs['Accuracy'].to_numpy(dtype=float)
+        time_taken = logs['Time_Taken'].to_numpy(dtype=float)
+        days = logs['Date'].to_numpy(dtype=np.int64) # Already epoch days
+        by_rank = np.argsort(ranks, kind='stable')
+        bounds = np.searchsorted(ranks[by_rank], np.arange(ranks.max() + 2))
+        for rank in range(ranks.max() + 1):
+            rows = by_rank[bounds[rank]:bounds[rank + 1]]
+            idx = keys[rows]
+            quality = review_quality(accuracy[rows], time_taken[rows], avg_time[idx])
+            repetitions[idx], ease[idx], interval[idx], lapses[idx] = sm2_step(
+                repetitions[idx], ease[idx], interval[idx], lapses[idx], quality)
+            avg_time[idx] = np.where(np.isnan(avg_time[idx]), time_taken[rows],
+                                     (1 - TIME_SMOOTHING) * avg_time[idx] + TIME_SMOOTHING * time_taken[rows])
+            last_day[idx] = days[rows]
+
+        chapters = logs.drop_duplicates(subset=['Subject', 'Chapter'])
+        state = pd.DataFrame({
+            'Subject': chapters['Subject'].to_numpy(),
+            'Chapter': chapters['Chapter'].to_numpy(),
+            'Repetitions': repetitions,
+            'Ease': ease,
+            'IntervalDays': interval,
+            'Lapses': lapses,
+            'AvgTime': avg_time,
+            'LastReviewDay': last_day,
+            'DueDay': last_day + interval,
+        })
+        conn.executemany("""
+            INSERT INTO review_state
+            (Subject, Chapter, Repetitions, Ease, IntervalDays, Lapses, AvgTime, LastReviewDay, DueDay)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+        """, state.astype(object).itertuples(index=False, name=None))
+        conn.commit()
+        review_logger.info(f"Rebuilt review state for {len(state)} chapters from {len(logs)} DPP logs.")
+        return True
+    except (sqlite3.Error, ValueError):
+        review_logger.exception("Failed to rebuild review state.")
+        return False
+
+
+def record_dpp_review(conn, review_date, subject, chapter, accuracy, time_taken):
+    """Updates the memory state of one chapter after a DPP is logged.
+
+    Out-of-order entries (a DPP dated before the chapter's last review) fall back to a full rebuild.
+    """
+    if conn is None:
+        return False
+    chapter = chapter.strip()
+    day = to_epoch_day(review_date)
+    try:
+        row = conn.execute("""
+            SELECT Repetitions, Ease, IntervalDays, Lapses, AvgTime, LastReviewDay
+            FROM review_state WHERE Subject = ? AND Chapter = ?;
+        """, (subject, chapter)).fetchone()
+        if row is not None and day < row[5]:
+            return rebuild_review_state(conn)
+        repetitions, ease, interval, lapses, avg_time = (row[:5] if row is not None else (0, INITIAL_EASE, 0, 0, None))
+        avg_time = np.nan if avg_time is None else avg_time
+        quality = review_quality(accuracy, time_taken, avg_time)
+        repetitions, ease, interval, lapses = sm2_step(
+            np.int64(repetitions), np.float64(ease), np.int64(interval), np.int64(lapses), quality)
+        avg_time = time_taken if np.isnan(avg_time) else (1 - TIME_SMOOTHING) * avg_time + TIME_SMOOTHING * time_taken
+        conn.execute("""
+            INSERT OR REPLACE INTO review_state
+            (Subject, Chapter, Repetitions, Ease, IntervalDays, Lapses, AvgTime, LastReviewDay, DueDay)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+        """, (subject, chapter, int(repetitions), float(ease), int(interval), int(lapses),
+              float(avg_time), day, day + int(interval)))
+        conn.commit()
+        review_logger.info(f"Review state updated for {subject} / {chapter}: next review in {int(interval)} day(s).")
+        return True
+    except sqlite3.Error:
+        review_logger.exception("Failed to update review state.")
+        return False
+
+# --- Due Reviews ---
+
+def load_due_reviews(conn, as_of=None, horizon_days=0):
+    """Returns chapters due for review on or before as_of + horizon_days, most overdue first."""
+    if conn is None:
+        return pd.DataFrame()
+    as_of_day = to_epoch_day(as_of or date.today())
+    try:
+        state = pd.read_sql("SELECT * FROM review_state", conn)
+    except Exception:
+        review_logger.exception("Failed to load review state.")
+        return pd.DataFrame()
+    if state.empty:
+        return state
+    # One vectorized pass over all chapters.
+    due_day = state['DueDay'].to_numpy(dtype=np.int64)
+    overdue = as_of_day - due_day
+    mask = overdue >= -horizon_days
+    due = state.loc[mask].copy()
+    due['OverdueDays'] = overdue[mask]
+    due['DueDate'] = (due['DueDay'].to_numpy(dtype=np.int64).astype('datetime64[D]'))
+    return due.sort_values(['OverdueDays', 'Ease'], ascending=[False, True]).reset_index(drop=True)
+
+
+def generate_review_tasks(conn, as_of=None, horizon_days=0):
+    """Inserts a study_tasks row for every due review. Returns the number of new tasks.
+
+    A task is dated on its review's DueDay, so UNIQUE(Subject, Topic, DueDate) matches it on every
+    later run; chapters that already have an open review task (e.g. one moved to another day) are skipped.
+    """
+    due = load_due_reviews(conn, as_of, horizon_days)
+    if due.empty:
+        return 0
+    today_day = to_epoch_day(as_of or date.today())
+    struggling = (due['Ease'].to_numpy() < 2.0) | (due['OverdueDays'].to_numpy() > 7)
+    tasks = pd.DataFrame({
+        'Subject': due['Subject'].replace(PLANNER_SUBJECT_MAP),
+        'Topic': REVIEW_TOPIC_PREFIX + due['Chapter'],
+        'DueDate': due['DueDay'].astype(np.int64), # An overdue review shows up as an overdue task
+        'Priority': np.where(struggling, 'High', np.where(due['Lapses'].to_numpy() > 0, 'Medium', 'Low')),
+        'Status': 'Pending',
+        'Notes': ("Spaced-repetition review (interval " + due['IntervalDays'].astype(str)
+                  + " d, ease " + due['Ease'].round(2).astype(str) + ")"),
+        'CreatedDate': today_day,
+    })
+    # Checked up front, so the one bulk insert can't be aborted by the Subject CHECK
+    valid = tasks['Subject'].isin(TASK_SUBJECTS).to_numpy()
+    rejected = int((~valid).sum())
+    if rejected:
+        review_logger.warning(f"{rejected} review task(s) skipped: subject not in study_tasks ({', '.join(tasks.loc[~valid, 'Subject'].unique())}).")
+    before = conn.total_changes
+    try:
+        # Only the UNIQUE key is ignored (the task already exists)
+        conn.executemany("""
+            INSERT INTO study_tasks
+            (Subject, Topic, DueDate, Priority, Status, Notes, CreatedDate)
+            SELECT ?1, ?2, ?3, ?4, ?5, ?6, ?7
+            WHERE NOT EXISTS (SELECT 1 FROM study_tasks WHERE Subject = ?1 AND Topic = ?2 AND Status != 'Completed')
+            ON CONFLICT (Subject, Topic, DueDate) DO NOTHING;
+        """, tasks.loc[valid].astype(object).itertuples(index=False, name=None))
+        created = conn.total_changes - before
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        review_logger.exception("Failed to generate review tasks.")
+        return 0
+    review_logger.info(f"Generated {created} review task(s) from {len(due)} due chapter(s)"
+                       + (f"; {rejected} rejected" if rejected else "") + ".")
+    return created
@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import types
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from db_schema import SCHEMA_VERSION
+from metrics import ROWS_LOADED
+from sql_trace import traced_connect
+
+# --- Setup Logging ---
+snapshot_logger = logging.getLogger(__name__)
+
+# --- Snapshot Configuration ---
+SNAPSHOT_DIR = os.environ.get("AISCHEDULER_SNAPSHOT_DIR", ".snapshots") # Columnar copies of the SQLite tables, safe to delete
+VERSION_KEY = b"aischeduler.data_version"
+SNAPSHOT_FORMAT = 2 # Bump when the snapshot layout changes in a way the code fingerprint can't see
+
+_versions = {} # snapshot path -> (data version, row count, column names) of the file on disk
+_validated = {} # snapshot path -> commit counter under which it was last built or found current in this process
+_watchers = {} # db_file -> (inode, long-lived read-only connection) used for PRAGMA data_version
+_watchers_lock = threading.Lock()
+_fingerprints = {} # prepare function -> fingerprint
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def _code_fingerprint(code):
+    """Hashes a function's bytecode, constants and names, recursing into nested code objects (lambdas, comprehensions)."""
+    digest = hashlib.sha1(code.co_code)
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            const = _code_fingerprint(const)
+        elif isinstance(const, frozenset): # `x in {...}` constants; their repr order changes with the hash seed
+            const = sorted(const, key=repr)
+        digest.update(repr(const).encode())
+    digest.update(repr(code.co_names).encode())
+    return digest.hexdigest()[:12]
+
+
+def _referenced_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            names |= _referenced_names(const)
+    return names
+
+
+def _function_fingerprint(func, seen=None):
+    """Fingerprints a function and the module-level functions it calls (e.g. prepare -> decode_dates -> _to_datetime64)."""
+    top_level = seen is None
+    if top_level and func in _fingerprints:
+        return _fingerprints[func]
+    seen = set() if top_level else seen
+    seen.add(func)
+    parts = [_code_fingerprint(func.__code__)]
+    for name in sorted(_referenced_names(func.__code__)):
+        helper = func.__globals__.get(name)
+        if isinstance(helper, types.FunctionType) and helper not in seen:
+            parts.append(_function_fingerprint(helper, seen))
+    fingerprint = hashlib.sha1(":".join(parts).encode()).hexdigest()[:12]
+    if top_level:
+        _fingerprints[func] = fingerprint
+    return fingerprint
+
+
+def data_version(db_file, prepare=None):
+    """Identifies the current contents of a database file (and the code that types them).
+
+    The file's inode, size and mtime identify contents written before this process started; commits
+    made while it runs are caught by commit_counter(), which read_snapshot checks as well. The
+    prepare function and the helpers it calls are fingerprinted, so a changed conversion (including
+    a changed literal such as a fillna default) rebuilds too.
+    """
+    parts = [f"v{SNAPSHOT_FORMAT}.{SCHEMA_VERSION}"]
+    for path in (db_file, f"{db_file}-wal"):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            parts.append(f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}")
+    if prepare is not None:
+        parts.append(_function_fingerprint(prepare))
+    return ":".join(parts)
+
+
+def commit_counter(db_file):
+    """PRAGMA data_version of a long-lived read connection: it changes after every commit by any other connection.
+
+    Unlike the file's mtime and size, it can't miss an in-place UPDATE within one mtime tick.
+    The connection is reopened when the file is replaced (e.g. by a restore).
+    """
+    db_file = os.path.abspath(db_file)
+    inode = os.stat(db_file).st_ino
+    with _watchers_lock:
+        watched_inode, conn = _watchers.get(db_file, (None, None))
+        if conn is None or watched_inode != inode:
+            if conn is not None:
+                conn.close()
+            # Not traced: this runs on every snapshot read and would bury the real queries in the trace panel
+            conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, check_same_thread=False)
+            _watchers[db_file] = (inode, conn)
+        return f"{inode}-{conn.execute('PRAGMA data_version').fetchone()[0]}"
+
+
+def snapshot_path(db_file, name):
+    db_name = os.path.splitext(os.path.basename(db_file))[0]
+    return os.path.join(SNAPSHOT_DIR, db_name, f"{name}.parquet")
+
+
+def _lock_for(path):
+    with _locks_lock:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def _on_disk_version(path):
+    if path not in _versions and os.path.exists(path):
+        metadata = pq.read_metadata(path)
+        version = (metadata.metadata or {}).get(VERSION_KEY, b"").decode()
+        _versions[path] = (version, metadata.num_rows, metadata.schema.names)
+    return _versions.get(path, (None, 0, []))
+
+
+def _read_table(db_file, table, order_by):
+    conn = traced_connect(f"file:{os.path.abspath(db_file)}?mode=ro", uri=True)
+    try:
+        df = pd.read_sql_query(f"SELECT * FROM {table}" + (f" ORDER BY {order_by}" if order_by else ""), conn)
+    finally:
+        conn.close()
+    ROWS_LOADED.inc(len(df), table=table)
+    return df
+
+
+def _project(df, columns, filters):
+    """Applies read_snapshot's columns/filters in pandas (used when no snapshot could be written)."""
+    for column, op, value in filters or []:
+        df = df[df[column] == value] if op in ("=", "==") else df.query(f"`{column}` {op} @value")
+    return df[[c for c in columns if c in df.columns]] if columns else df
+
+
+def read_snapshot(db_file, table, prepare=None, columns=None, filters=None, order_by=None, name=None):
+    """Returns a table as a DataFrame, read from its typed Parquet snapshot.
+
+    The snapshot is rebuilt from SQLite (SELECT * ... ORDER BY `order_by`, then `prepare(df)`
+    for dates and numerics) only when the database has changed since it was written (see
+    data_version and commit_counter); otherwise
+    only the requested `columns` and row `filters` (pyarrow DNF, e.g. [("user_id", "=", 1)])
+    are read from the memory-mapped file. Writes keep going straight to SQLite.
+    """
+    path = snapshot_path(db_file, name or table)
+    with _lock_for(path):
+        counter = commit_counter(db_file) # Read first, so a commit during the rebuild triggers another one
+        version = data_version(db_file, prepare)
+        on_disk_version, num_rows, names = _on_disk_version(path)
+        if on_disk_version != version or _validated.setdefault(path, counter) != counter:
+            df = _read_table(db_file, table, order_by)
+            if prepare is not None:
+                df = prepare(df)
+            try:
+                arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+                arrow_table = arrow_table.replace_schema_metadata({**(arrow_table.schema.metadata or {}), VERSION_KEY: version.encode()})
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                pq.write_table(arrow_table, tmp_path)
+                os.replace(tmp_path, path) # Readers never see a half-written snapshot
+            except (OSError, pa.ArrowException) as e:
+                snapshot_logger.warning(f"Could not write the {table} snapshot ({e}); serving it straight from SQLite.")
+                _versions.pop(path, None)
+                _validated.pop(path, None)
+                return _project(df, columns, filters)
+            num_rows, names = arrow_table.num_rows, arrow_table.column_names
+            _versions[path] = (version, num_rows, names)
+            _validated[path] = counter
+            snapshot_logger.info(f"Wrote {table} snapshot ({num_rows} rows) to {path}.")
+    columns = [c for c in columns if c in names] if columns else None
+    # An empty snapshot has untyped (null) columns that filters can't compare against.
+    arrow_table = pq.read_table(path, columns=columns, filters=filters if num_rows else None, memory_map=True)
+    return arrow_table.to_pandas()
@@ -0,0 +1,360 @@
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+# --- Setup Logging ---
+trace_logger = logging.getLogger(__name__)
+
+# --- Tracing Configuration ---
+SLOW_QUERY_MS = float(os.environ.get("AISCHEDULER_SLOW_QUERY_MS", 200)) # Statements slower than this go to the slow-query log
+SLOW_LOG_FILE = "slow_queries.jsonl"
+PROGRESS_STEPS = 1000 # SQLite VM instructions between progress callbacks (the resolution of statement end times)
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000) # Upper bounds; anything slower lands in "+Inf"
+MAX_SHAPES = 500 # Distinct statement shapes tracked before new ones are folded into "<other>"
+SLOW_LOG_SIZE = 200 # Slow statements kept in memory for the dev panel
+
+_shapes = {}
+_shapes_lock = threading.Lock()
+_slow = deque(maxlen=SLOW_LOG_SIZE)
+_tracers = weakref.WeakSet()
+_listeners = []
+_explain_queue = queue.Queue()
+_explain_thread = None
+_plans = {} # shape -> EXPLAIN QUERY PLAN lines, fetched once per shape
+
+# Literal patterns, most specific first: blobs, strings, then numbers that aren't part of an identifier.
+_LITERALS = [
+    (re.compile(r"[xX]'[0-9a-fA-F]*'"), "?"),
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"), "?"),
+]
+_COMMENTS = re.compile(r"--[^\n]*")
+_WHITESPACE = re.compile(r"\s+")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)") # IN (?, ?, ?) and VALUES (?, ?) collapse to one shape
+_VALUE_ROWS = re.compile(r"(\(\?, \.\.\.\))(?:\s*,\s*\(\?, \.\.\.\))+")
+
+
+def normalize_sql(sql):
+    """Reduces a statement to its shape: literals become ?, lists collapse, whitespace is squeezed."""
+    shape = _COMMENTS.sub(" ", sql)
+    for pattern, replacement in _LITERALS:
+        shape = pattern.sub(replacement, shape)
+    shape = _WHITESPACE.sub(" ", shape).strip().rstrip(";").strip()
+    shape = _LISTS.sub("(?, ...)", shape)
+    return _VALUE_ROWS.sub(r"\1, ...", shape)
+
+
+def statement_verb(shape):
+    """Returns the leading keyword of a statement (SELECT, INSERT, UPDATE, ...)."""
+    return shape.split(" ", 1)[0].upper() if shape else ""
+
+
+class _ConnectionTracer:
+    """Trace and progress callbacks for one connection.
+
+    SQLite reports when a statement starts but not when it ends. On connections opened by
+    traced_connect, the cursor reports the end (see TracedCursor); otherwise a statement is
+    closed when the next one starts (or on flush), using the last progress callback as its end time.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._current = None # [sql, started, last_activity]
+
+    @property
+    def current(self):
+        return self._current
+
+    def on_statement(self, sql):
+        if sql.startswith("--"): # Trigger bodies are reported as comments; they belong to the outer statement
+            return
+        now = time.perf_counter()
+        with self._lock:
+            finished, self._current = self._current, [sql, now, now]
+        if finished:
+            _record(self.db_file, *finished)
+
+    def on_progress(self):
+        current = self._current
+        if current is not None:
+            current[2] = time.perf_counter()
+        return 0 # Never interrupt the query
+
+    def touch(self, statement, finished):
+        """Marks `statement` (if still the current one) as active now, and records it if it has finished."""
+        if statement is None or self._current is not statement:
+            return # A later statement has started (and closed this one) already
+        statement[2] = time.perf_counter()
+        if finished:
+            with self._lock:
+                if self._current is not statement:
+                    return
+                self._current = None
+            _record(self.db_file, *statement)
+
+    def flush(self):
+        with self._lock:
+            finished, self._current = self._current, None
+        if finished:
+            _record(self.db_file, *finished)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that reports when its statement ends: after a write, once its rows run out, or on close."""
+
+    _statement = None
+
+    def _touch(self, finished):
+        tracer = getattr(self.connection, "tracer", None)
+        if tracer is not None:
+            tracer.touch(self._statement, finished)
+
+    def _started(self):
+        tracer = getattr(self.connection, "tracer", None)
+        self._statement = tracer.current if tracer is not None else None
+        self._touch(self.description is None) # No rows to fetch: the statement is done
+
+    def execute(self, sql, parameters=(), /):
+        super().execute(sql, parameters)
+        self._started()
+        return self
+
+    def executemany(self, sql, seq_of_parameters, /):
+        super().executemany(sql, seq_of_parameters)
+        self._started()
+        return self
+
+    def executescript(self, sql_script, /):
+        super().executescript(sql_script)
+        self._started()
+        return self
+
+    def fetchone(self):
+        row = super().fetchone()
+        self._touch(row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = super().fetchmany(size)
+        self._touch(len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._touch(True)
+        return rows
+
+    def __next__(self):
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._touch(True)
+            raise
+        self._touch(False)
+        return row
+
+    def close(self):
+        self._touch(True)
+        super().close()
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose statements run on TracedCursors, and whose last statement is recorded on close."""
+
+    tracer = None
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection's shortcuts create plain cursors internally; route them through cursor()
+    def execute(self, sql, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script, /):
+        return self.cursor().executescript(sql_script)
+
+    def _finish(self, verb):
+        statement = self.tracer.current if self.tracer is not None else None
+        if statement is not None and statement[0].upper().startswith(verb): # Nothing to end if there was no transaction
+            self.tracer.touch(statement, True)
+
+    def commit(self):
+        super().commit()
+        self._finish("COMMIT")
+
+    def rollback(self):
+        super().rollback()
+        self._finish("ROLLBACK")
+
+    def close(self):
+        if self.tracer is not None:
+            self.tracer.flush()
+        super().close()
+
+
+def install_tracing(conn, db_file=None):
+    """Installs statement tracing on a connection and returns it."""
+    if conn is None:
+        return conn
+    tracer = _ConnectionTracer(os.path.abspath(db_file) if db_file and db_file != ":memory:" else None)
+    conn.set_trace_callback(tracer.on_statement)
+    conn.set_progress_handler(tracer.on_progress, PROGRESS_STEPS)
+    if isinstance(conn, TracedConnection):
+        conn.tracer = tracer
+    _tracers.add(tracer)
+    return conn
+
+
+def traced_connect(db_file, **kwargs):
+    """sqlite3.connect() with tracing installed; URI filenames are traced under their path."""
+    conn = sqlite3.connect(db_file, factory=kwargs.pop("factory", TracedConnection), **kwargs)
+    path = db_file[len("file:"):].split("?", 1)[0] if kwargs.get("uri") else db_file
+    return install_tracing(conn, path)
+
+
+def _record(db_file, sql, started, ended):
+    elapsed_ms = (ended - started) * 1000
+    shape = normalize_sql(sql)
+    with _shapes_lock:
+        stats = _shapes.get(shape)
+        if stats is None:
+            if len(_shapes) >= MAX_SHAPES:
+                shape = "<other>"
+                stats = _shapes.get(shape)
+            if stats is None:
+                stats = _shapes[shape] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                          "buckets": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)}
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["buckets"][_bucket_index(elapsed_ms)] += 1
+    event = {"db": db_file, "shape": shape, "verb": statement_verb(shape), "ms": elapsed_ms}
+    for listener in _listeners:
+        try:
+            listener(event)
+        except Exception:
+            trace_logger.exception("SQL trace listener failed.")
+    if elapsed_ms >= SLOW_QUERY_MS:
+        _log_slow(db_file, sql, shape, elapsed_ms)
+
+
+def _bucket_index(elapsed_ms):
+    for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+        if elapsed_ms <= bound:
+            return i
+    return len(HISTOGRAM_BUCKETS_MS)
+
+
+def _log_slow(db_file, sql, shape, elapsed_ms):
+    """Queues a slow statement; its query plan is fetched off the caller's connection."""
+    global _explain_thread
+    trace_logger.warning(f"Slow query ({elapsed_ms:.0f} ms) on {db_file}: {shape[:200]}")
+    _explain_queue.put({"ts": datetime.now().isoformat(timespec="milliseconds"), "db": db_file,
+                        "ms": round(elapsed_ms, 2), "shape": shape, "sql": sql[:2000]})
+    with _shapes_lock:
+        if _explain_thread is None:
+            _explain_thread = threading.Thread(target=_explain_worker, name="sql-explain", daemon=True)
+            _explain_thread.start()
+
+
+def _explain_worker():
+    while True:
+        entry = _explain_queue.get()
+        try:
+            entry["plan"] = _explain(entry)
+            _slow.append(entry)
+            with open(SLOW_LOG_FILE, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception:
+            trace_logger.exception("Failed to write the slow-query log.")
+        finally:
+            _explain_queue.task_done()
+
+
+def _explain(entry):
+    """Runs EXPLAIN QUERY PLAN once per shape on a separate read-only connection."""
+    if entry["db"] is None or statement_verb(entry["shape"]) not in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT", "REPLACE"):
+        return None
+    if entry["shape"] not in _plans:
+        try:
+            conn = sqlite3.connect(f"file:{entry['db']}?mode=ro", uri=True)
+            try:
+                _plans[entry["shape"]] = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + entry["sql"])]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            return [f"unavailable: {e}"]
+    return _plans[entry["shape"]]
+
+
+def add_listener(listener):
+    """Registers a callable that receives every finished statement ({db, shape, verb, ms})."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def flush():
+    """Closes the in-flight statement on every traced connection so it is counted."""
+    for tracer in list(_tracers):
+        tracer.flush()
+
+
+def statement_stats():
+    """Returns per-shape call counts, latency and histogram buckets, slowest total first."""
+    flush()
+    with _shapes_lock:
+        rows = [{"shape": shape, "calls": s["calls"], "total_ms": s["total_ms"], "mean_ms": s["total_ms"] / s["calls"],
+                 "max_ms": s["max_ms"], **{f"le_{b}ms": n for b, n in zip(HISTOGRAM_BUCKETS_MS, s["buckets"])},
+                 "le_inf": s["buckets"][-1]}
+                for shape, s in _shapes.items()]
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).sort_values("total_ms", ascending=False).round(2).reset_index(drop=True)
+
+
+def slow_queries():
+    """Returns the most recent slow statements with their query plans, newest first."""
+    return list(reversed(_slow))
+
+
+def reset():
+    """Clears the aggregated statistics and the in-memory slow log."""
+    with _shapes_lock:
+        _shapes.clear()
+    _slow.clear()
+    _plans.clear()
+
+
+def render_sql_trace_panel():
+    """Shows per-statement timings and slow queries in the sidebar (developer mode only)."""
+    from profiler import dev_mode_enabled # Imported lazily; only needed on this path
+    if not dev_mode_enabled():
+        return
+    with st.sidebar.expander("🗄️ SQL Trace", expanded=False):
+        stats = statement_stats()
+        if stats.empty:
+            st.caption("No statements traced yet.")
+            return
+        st.dataframe(stats[["shape", "calls", "mean_ms", "max_ms", "total_ms"]], use_container_width=True, hide_index=True)
+        for entry in slow_queries()[:5]:
+            st.caption(f"🐢 {entry['ms']:.0f} ms · {entry['shape'][:120]}")
+            if entry.get("plan"):
+                st.code("\n".join(entry["plan"]), language="text")
+        if st.button("🧹 Reset SQL Trace", key="reset_sql_trace"):
+            reset()
@@ -0,0 +1,117 @@
+"""Cold-start benchmark for the Streamlit pages.
+
+Each page is measured in a fresh interpreter against a scratch copy of the app,
+so the real databases are never touched:
+
+  * import time - executing the page's top-level imports, with Streamlit already
+    loaded (as it is inside a running server);
+  * first paint - the first full script run under Streamlit's AppTest harness.
+
+    python startup_benchmark.py                         # all pages, default budgets
+    python startup_benchmark.py app.py pages/mock_log.py --import-budget 0.5
+
+Exits with status 1 when a page fails to load or exceeds the import-time budget
+(or the first-paint budget, when one is given).
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# --- Startup Budget Configuration ---
+DEFAULT_IMPORT_BUDGET = 1.0 # Seconds allowed for a page's own imports on a cold start
+DEFAULT_PAGES = ["app.py", "pages/dpp_logger.py", "pages/study_planner.py", "pages/mock_log.py", "pages/notes.py"]
+COPY_IGNORE = shutil.ignore_patterns(".git", "__pycache__", "*.pyc")
+
+_IMPORT_PROBE = """
+import ast, json, sys, time
+import streamlit
+sys.path.insert(0, '.')
+tree = ast.parse(open(sys.argv[1], encoding='utf-8').read())
+imports = ast.Module(body=[node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))], type_ignores=[])
+before = set(sys.modules)
+started = time.perf_counter()
+exec(compile(imports, sys.argv[1], 'exec'), {'__name__': '__startup_probe__'})
+elapsed = time.perf_counter() - started
+print(json.dumps({'seconds': elapsed, 'modules': len(set(sys.modules) - before)}))
+"""
+
+_PAINT_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+elapsed = time.perf_counter() - started
+print(json.dumps({'seconds': elapsed, 'errors': [str(e.value)[:200] for e in at.exception]}))
+"""
+
+
+def _probe(code, page, workdir):
+    """Runs a probe in a fresh interpreter and returns its JSON result (or an error)."""
+    completed = subprocess.run([sys.executable, "-c", code, page], cwd=workdir, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"error": (completed.stderr.strip().splitlines() or ["unknown error"])[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure_page(page, workdir):
+    """Returns the cold import time and first-paint time of one page."""
+    result = {"page": page}
+    imports = _probe(_IMPORT_PROBE, page, workdir)
+    result["import_seconds"] = imports.get("seconds")
+    result["imported_modules"] = imports.get("modules")
+    result["error"] = imports.get("error")
+    if result["error"] is None:
+        paint = _probe(_PAINT_PROBE, page, workdir)
+        result["first_paint_seconds"] = paint.get("seconds")
+        errors = paint.get("errors") or ([paint["error"]] if paint.get("error") else [])
+        result["error"] = "; ".join(errors) or None
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time and time-to-first-paint per Streamlit page.")
+    parser.add_argument("pages", nargs="*", default=DEFAULT_PAGES, help="Page scripts, relative to the app folder.")
+    parser.add_argument("--import-budget", type=float, default=DEFAULT_IMPORT_BUDGET, help="Max seconds for a page's imports.")
+    parser.add_argument("--paint-budget", type=float, help="Optional max seconds for the first script run.")
+    parser.add_argument("--output", help="Also write the measurements to a JSON file.")
+    args = parser.parse_args(argv)
+
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix="aischeduler-startup-")
+    try:
+        app_copy = os.path.join(workdir, "app")
+        shutil.copytree(app_dir, app_copy, ignore=COPY_IGNORE)
+        results = [measure_page(page, app_copy) for page in args.pages]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    failures = 0
+    print(f"{'page':<26} {'imports':>10} {'modules':>8} {'first paint':>12}")
+    for result in results:
+        problems = []
+        if result["error"]:
+            problems.append(f"error: {result['error']}")
+        if result["import_seconds"] is not None and result["import_seconds"] > args.import_budget:
+            problems.append(f"imports over {args.import_budget:.2f}s budget")
+        paint = result.get("first_paint_seconds")
+        if args.paint_budget is not None and paint is not None and paint > args.paint_budget:
+            problems.append(f"first paint over {args.paint_budget:.2f}s budget")
+        failures += bool(problems)
+        imports = f"{result['import_seconds'] * 1000:.0f} ms" if result["import_seconds"] is not None else "-"
+        paint_text = f"{paint * 1000:.0f} ms" if paint is not None else "-"
+        print(f"{result['page']:<26} {imports:>10} {result['imported_modules'] or '-':>8} {paint_text:>12}"
+              + (f"  <- {'; '.join(problems)}" if problems else ""))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"import_budget": args.import_budget, "paint_budget": args.paint_budget, "pages": results}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
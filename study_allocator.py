@@ -0,0 +1,109 @@
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from db_schema import to_epoch_day
+
+# --- Setup Logging ---
+allocator_logger = logging.getLogger(__name__)
+
+# --- Allocation Model Configuration ---
+UNSEEN_DOMAIN_SCORE = 50.0 # Assumed average percentage for domains with no mock results yet
+FIRST_HOUR_GAIN = 0.10 # Fraction of a domain's performance gap recovered by its first hour of study
+GAIN_DECAY = 0.6 # Each further block of hours is worth this fraction of the previous block
+GAIN_SEGMENTS = 4 # Piecewise-linear segments used to model diminishing returns
+
+# Maps the subject prefix of a knowledge domain to the Study Planner's subject list.
+PLANNER_SUBJECTS = {"Physics": "Physics", "Chemistry": "Chemistry", "Mathematics": "Maths", "Biology": "Biology"}
+
+
+def domain_priorities(df, domains, exam_max_marks):
+    """Computes the performance gap and exam weight of every knowledge domain."""
+    top_marks = max(exam_max_marks.values())
+    priorities = pd.DataFrame(index=pd.Index(domains, name="domain"))
+    if df is not None and not df.empty:
+        weights = df['exam_type'].map(exam_max_marks).fillna(exam_max_marks.get("Other", top_marks)) / top_marks
+        stats = pd.DataFrame({'domain': df['domain'], 'percentage_score': df['percentage_score'], 'exam_weight': weights}) \
+            .groupby('domain').mean()
+        priorities = priorities.join(stats.rename(columns={'percentage_score': 'avg_score'}))
+        default_weight = weights.mean()
+    else:
+        priorities['avg_score'] = np.nan
+        priorities['exam_weight'] = np.nan
+        default_weight = exam_max_marks.get("Other", top_marks) / top_marks
+    priorities['avg_score'] = priorities['avg_score'].fillna(UNSEEN_DOMAIN_SCORE)
+    priorities['exam_weight'] = priorities['exam_weight'].fillna(default_weight)
+    priorities['gap'] = (100.0 - priorities['avg_score']).clip(lower=0.0)
+    return priorities
+
+
+def _bounds(value, domains):
+    """Expands a scalar or {domain: hours} mapping into one array entry per domain."""
+    if isinstance(value, dict):
+        return np.array([float(value.get(d, 0.0)) for d in domains])
+    return np.full(len(domains), float(value))
+
+
+def allocate_study_hours(df, domains, exam_max_marks, weekly_hours=20.0, min_hours=0.0, max_hours=4.0, whole_hours=False):
+    """Distributes a weekly study-hour budget across knowledge domains.
+
+    Solved as an LP (a MIP when whole_hours is set) that maximizes the expected
+    exam-weighted score gain. Each domain's gain is concave in hours, modelled
+    with GAIN_SEGMENTS linear pieces of decaying slope, subject to per-domain
+    min/max hours and the total budget.
+    """
+    from scipy.optimize import Bounds, LinearConstraint, milp # Imported lazily; only needed on this path
+
+    started = time.perf_counter()
+    priorities = domain_priorities(df, domains, exam_max_marks)
+    n = len(domains)
+    lower = _bounds(min_hours, domains)
+    upper = _bounds(max_hours, domains)
+    if whole_hours:
+        lower, upper = np.ceil(lower), np.floor(upper)
+    if lower.sum() > weekly_hours:
+        allocator_logger.warning(f"Minimum hours ({lower.sum():.1f}) exceed the weekly budget ({weekly_hours}); scaling minimums down.")
+        lower = lower * (weekly_hours / lower.sum())
+        if whole_hours:
+            lower = np.floor(lower)
+    upper = np.maximum(upper, lower)
+
+    # Variables: GAIN_SEGMENTS hour blocks per domain (x), then the total hours per domain (y).
+    segment_size = np.repeat(upper / GAIN_SEGMENTS, GAIN_SEGMENTS)
+    slopes = np.repeat(priorities['gap'].to_numpy() * FIRST_HOUR_GAIN, GAIN_SEGMENTS) * \
+        np.tile(GAIN_DECAY ** np.arange(GAIN_SEGMENTS), n)
+    weighted_slopes = slopes * np.repeat(priorities['exam_weight'].to_numpy(), GAIN_SEGMENTS)
+    cost = np.concatenate([-weighted_slopes, np.zeros(n)])
+
+    link = np.hstack([np.kron(np.eye(n), np.ones(GAIN_SEGMENTS)), -np.eye(n)]) # sum_k x_dk - y_d = 0
+    budget = np.concatenate([np.zeros(n * GAIN_SEGMENTS), np.ones(n)])
+    constraints = [LinearConstraint(link, 0, 0), LinearConstraint(budget, 0, weekly_hours)]
+    bounds = Bounds(np.concatenate([np.zeros(n * GAIN_SEGMENTS), lower]),
+                    np.concatenate([segment_size, upper]))
+    integrality = np.concatenate([np.zeros(n * GAIN_SEGMENTS), np.full(n, 1 if whole_hours else 0)])
+
+    result = milp(cost, constraints=constraints, bounds=bounds, integrality=integrality, options={"time_limit": 1.0})
+    if result.x is None:
+        allocator_logger.error(f"Study-hour allocation failed: {result.message}")
+        return pd.DataFrame()
+
+    hours = result.x[n * GAIN_SEGMENTS:]
+    gains = (slopes * result.x[:n * GAIN_SEGMENTS]).reshape(n, GAIN_SEGMENTS).sum(axis=1)
+    allocation = priorities.assign(hours=hours.round(2), expected_gain=gains.round(2)).reset_index()
+    allocation = allocation.sort_values(['hours', 'gap'], ascending=False).reset_index(drop=True)
+    allocator_logger.info(f"Allocated {hours.sum():.1f}/{weekly_hours} study hours across {n} domains in {(time.perf_counter() - started) * 1000:.1f} ms.")
+    return allocation
+
+
+def allocation_to_tasks(allocation, week_end, created_date):
+    """Turns an allocation into study_tasks rows (Subject, Topic, DueDate, Priority, Status, Notes, CreatedDate)."""
+    planned = allocation[allocation['hours'] > 0]
+    rows = []
+    for domain, hours, gap in zip(planned['domain'], planned['hours'], planned['gap']):
+        subject = PLANNER_SUBJECTS.get(domain.split(":")[0].strip(), "General")
+        priority = "High" if gap >= 50 else "Medium" if gap >= 25 else "Low"
+        rows.append((subject, f"Weekly focus: {domain}", to_epoch_day(week_end), priority, "Pending",
+                     f"Allocated {hours:.1f} h this week (performance gap {gap:.0f}%).", to_epoch_day(created_date)))
+    return rows
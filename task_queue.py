@@ -0,0 +1,227 @@
+import heapq
+import itertools
+import logging
+import sqlite3
+import threading
+from datetime import date, datetime
+
+from db_schema import EPOCH_ORDINAL, from_epoch_day
+from sql_trace import traced_connect
+
+# --- Setup Logging ---
+queue_logger = logging.getLogger(__name__)
+
+# --- Ranking Configuration ---
+# Urgency is expressed in "days": a task's key is its due date (as an ordinal) shifted
+# by its priority and status. Lower keys come out of the queue first.
+PRIORITY_OFFSET_DAYS = {"High": 0, "Medium": 3, "Low": 7}
+STATUS_OFFSET_DAYS = {"In Progress": -2, "Pending": 0, "Deferred": 14}
+DEFERRED_AGING_PER_DAY = 0.5 # A deferred task gains half a day of urgency for every day it waits
+EXCLUDED_STATUSES = {"Completed"}
+
+TASK_COLUMNS = ("ID", "Subject", "Topic", "DueDate", "Priority", "Status", "CreatedDate")
+
+_REMOVED = object() # Placeholder for entries invalidated by an update or removal
+
+
+def _to_ordinal(value):
+    """Converts a date, datetime, Timestamp, ISO string or epoch day to a proleptic ordinal (None if invalid)."""
+    try:
+        if isinstance(value, int):
+            return value + EPOCH_ORDINAL
+        if isinstance(value, datetime):
+            return value.date().toordinal()
+        if isinstance(value, date):
+            return value.toordinal()
+        if isinstance(value, str) and value.strip():
+            return date.fromisoformat(value.strip()[:10]).toordinal()
+    except (ValueError, TypeError, AttributeError):
+        pass
+    return None
+
+
+class TaskQueue:
+    """Priority queue over study_tasks with O(log n) edits and deferred-task aging.
+
+    Active tasks and deferred tasks live in two heaps. Deferred keys are stored
+    relative to the day the task was deferred, so aging never requires a re-heapify:
+    the effective key is the stored key minus DEFERRED_AGING_PER_DAY * today.
+    Every public method holds a lock, so one queue can be shared by concurrent sessions.
+    """
+
+    def __init__(self):
+        self._active = []
+        self._deferred = []
+        self._entries = {} # task_id -> heap entry [key, seq, task_id]
+        self._tasks = {} # task_id -> task dict
+        self._counter = itertools.count()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, task_id):
+        return task_id in self._entries
+
+    @classmethod
+    def from_frame(cls, df):
+        """Builds a queue from a study_tasks DataFrame in O(n) using heapify."""
+        queue = cls()
+        if df is None or df.empty:
+            return queue
+        columns = [c for c in TASK_COLUMNS if c in df.columns]
+        queue.reset(dict(zip(columns, row)) for row in df[columns].itertuples(index=False))
+        return queue
+
+    def reset(self, tasks):
+        """Replaces every queued task with `tasks` (dicts) in O(n) using heapify."""
+        with self._lock:
+            self._active, self._deferred, self._entries, self._tasks = [], [], {}, {}
+            for task in tasks:
+                entry = self._make_entry(task)
+                if entry is None:
+                    continue
+                heap = self._deferred if task.get("Status") == "Deferred" else self._active
+                heap.append(entry)
+            heapq.heapify(self._active)
+            heapq.heapify(self._deferred)
+        queue_logger.info(f"Task queue built with {len(self)} open tasks.")
+
+    # --- Internal Helpers ---
+
+    def _make_entry(self, task, deferred_since=None):
+        """Computes the heap entry for a task and registers it (None if the task is not queueable)."""
+        status = task.get("Status")
+        if status in EXCLUDED_STATUSES:
+            return None
+        due_ordinal = _to_ordinal(task.get("DueDate"))
+        if due_ordinal is None:
+            queue_logger.warning(f"Skipping task {task.get('ID')} with invalid DueDate: {task.get('DueDate')}")
+            return None
+        key = due_ordinal + PRIORITY_OFFSET_DAYS.get(task.get("Priority"), 7) + STATUS_OFFSET_DAYS.get(status, 0)
+        if status == "Deferred":
+            # Without a dedicated column, deferral is assumed to start on the creation date.
+            since = _to_ordinal(deferred_since) or _to_ordinal(task.get("CreatedDate")) or date.today().toordinal()
+            key += DEFERRED_AGING_PER_DAY * since
+        task_id = task["ID"]
+        entry = [key, next(self._counter), task_id]
+        self._entries[task_id] = entry
+        self._tasks[task_id] = task
+        return entry
+
+    def _effective_key(self, entry, heap, today_ordinal):
+        """Returns the key used for ordering, applying aging to deferred entries."""
+        if heap is self._deferred:
+            return entry[0] - DEFERRED_AGING_PER_DAY * today_ordinal
+        return entry[0]
+
+    @staticmethod
+    def _prune(heap):
+        """Drops invalidated entries from the top of a heap."""
+        while heap and heap[0][2] is _REMOVED:
+            heapq.heappop(heap)
+
+    # --- Public API ---
+
+    def upsert(self, task, deferred_since=None):
+        """Adds a task or replaces an existing one with the same ID in O(log n)."""
+        with self._lock:
+            self.remove(task["ID"])
+            entry = self._make_entry(task, deferred_since)
+            if entry is not None:
+                heapq.heappush(self._deferred if task.get("Status") == "Deferred" else self._active, entry)
+
+    def remove(self, task_id):
+        """Removes a task by ID if it is queued. Returns True when something was removed."""
+        with self._lock:
+            entry = self._entries.pop(task_id, None)
+            self._tasks.pop(task_id, None)
+            if entry is None:
+                return False
+            entry[2] = _REMOVED
+            return True
+
+    def peek(self, k=1, today=None):
+        """Returns up to k next tasks without removing them, in O(k log k)."""
+        today_ordinal = _to_ordinal(today) if today is not None else date.today().toordinal()
+        with self._lock:
+            return self._peek_locked(k, today_ordinal)
+
+    def _peek_locked(self, k, today_ordinal):
+        self._prune(self._active)
+        self._prune(self._deferred)
+        # Walk both heap trees best-first; only the frontier of visited nodes is kept.
+        frontier = []
+        for heap in (self._active, self._deferred):
+            if heap:
+                frontier.append((self._effective_key(heap[0], heap, today_ordinal), heap[0][1], id(heap), 0, heap))
+        heapq.heapify(frontier)
+        result = []
+        while frontier and len(result) < k:
+            _, _, _, index, heap = heapq.heappop(frontier)
+            entry = heap[index]
+            if entry[2] is not _REMOVED:
+                result.append(self._tasks[entry[2]])
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    child_entry = heap[child]
+                    heapq.heappush(frontier, (self._effective_key(child_entry, heap, today_ordinal), child_entry[1], id(heap), child, heap))
+        return result
+
+    def pop(self, today=None):
+        """Removes and returns the most urgent task, or None if the queue is empty."""
+        today_ordinal = _to_ordinal(today) if today is not None else date.today().toordinal()
+        with self._lock:
+            self._prune(self._active)
+            self._prune(self._deferred)
+            candidates = [heap for heap in (self._active, self._deferred) if heap]
+            if not candidates:
+                return None
+            heap = min(candidates, key=lambda h: (self._effective_key(h[0], h, today_ordinal), h[0][1]))
+            _, _, task_id = heapq.heappop(heap)
+            del self._entries[task_id]
+            return self._tasks.pop(task_id)
+
+
+# --- Process-wide Queue ---
+# One queue per database, shared by every session. It is read from the database once; afterwards
+# the planner applies each edit with upsert/remove, and bulk changes (restores, generated tasks,
+# wiping the planner) call reload_task_queue().
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def load_open_tasks(db_file):
+    """Reads the tasks that belong in the queue (everything not completed) as dicts with date values."""
+    conn = traced_connect(db_file, check_same_thread=False)
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(TASK_COLUMNS)} FROM study_tasks WHERE Status != 'Completed'")
+        tasks = [dict(zip(TASK_COLUMNS, row)) for row in cursor]
+    except sqlite3.Error:
+        queue_logger.exception("Failed to load open study tasks.")
+        return []
+    finally:
+        conn.close()
+    for task in tasks:
+        for column in ("DueDate", "CreatedDate"):
+            task[column] = from_epoch_day(task[column]) if task[column] is not None else None
+    return tasks
+
+
+def get_task_queue(db_file):
+    """Returns the shared task queue of a database, loading it on first use."""
+    with _queues_lock:
+        queue = _queues.get(db_file)
+        if queue is None:
+            queue = _queues[db_file] = TaskQueue()
+            queue.reset(load_open_tasks(db_file))
+        return queue
+
+
+def reload_task_queue(db_file):
+    """Rebuilds the shared queue from the database after a bulk change; a queue not loaded yet stays unloaded."""
+    with _queues_lock:
+        queue = _queues.get(db_file)
+    if queue is not None:
+        queue.reset(load_open_tasks(db_file))
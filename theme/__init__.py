@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import os
+import re
+import urllib.request
+from functools import lru_cache
+
+import streamlit as st
+
+# --- Setup Logging ---
+theme_logger = logging.getLogger(__name__)
+
+# --- Theme Configuration ---
+THEME_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(os.path.dirname(THEME_DIR), "static") # Served by Streamlit (server.enableStaticServing)
+STATIC_URL = "app/static"
+CSS_FILE = os.path.join(THEME_DIR, "neon.css")
+
+# Self-hosted fonts: (family, weight range, file under static/, download source).
+FONTS = [
+    ("Orbitron", "400 900", "fonts/Orbitron.ttf",
+     "https://github.com/google/fonts/raw/main/ofl/orbitron/Orbitron%5Bwght%5D.ttf"),
+    ("Share Tech Mono", "400", "fonts/ShareTechMono-Regular.ttf",
+     "https://github.com/google/fonts/raw/main/ofl/sharetechmono/ShareTechMono-Regular.ttf"),
+]
+
+# Sidebar artwork: name -> (file under static/, download source, also the fallback when the file is missing).
+SIDEBAR_IMAGES = {
+    "dpp_logger": ("images/dpp_logger.jpg",
+                   "https://images.unsplash.com/photo-1510531704581-5b97826359de?q=80&w=800&auto=format&fit=crop"),
+    "study_planner": ("images/study_planner.jpg",
+                      "https://images.unsplash.com/photo-1543286386-713ed02f1a6b?q=80&w=800&auto=format&fit=crop"),
+}
+
+
+def minify_css(css):
+    """Strips comments and redundant whitespace from a stylesheet."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+@lru_cache(maxsize=None)
+def asset_url(relative_path):
+    """Returns the static URL of a local asset, versioned by content hash (cached for 10 years by the browser)."""
+    path = os.path.join(STATIC_DIR, relative_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        version = hashlib.sha1(f.read()).hexdigest()[:12]
+    return f"{STATIC_URL}/{relative_path}?v={version}"
+
+
+@lru_cache(maxsize=None)
+def theme_css():
+    """Builds the minified <style> block once per process: local @font-face rules plus the neon stylesheet."""
+    font_faces = []
+    for family, weight, relative_path, _ in FONTS:
+        url = asset_url(relative_path)
+        if url is None:
+            theme_logger.warning(f"Font file static/{relative_path} not found; '{family}' falls back to system fonts. Run `python -m theme` to fetch it.")
+            continue
+        font_faces.append(f"@font-face {{ font-family: '{family}'; font-weight: {weight}; font-display: swap; "
+                          f"src: local('{family}'), url('{url}') format('truetype'); }}")
+    with open(CSS_FILE, encoding="utf-8") as f:
+        stylesheet = f.read()
+    css = minify_css("\n".join(font_faces) + "\n" + stylesheet)
+    theme_logger.info(f"Theme stylesheet built ({len(css)} bytes, {len(font_faces)} local fonts).")
+    return f"<style>{css}</style>"
+
+
+def apply_theme():
+    """Injects the shared neon theme into the current page."""
+    st.markdown(theme_css(), unsafe_allow_html=True)
+
+
+def sidebar_image(name, caption=None):
+    """Shows a sidebar image from static/, or from its original source when it hasn't been downloaded."""
+    relative_path, source = SIDEBAR_IMAGES[name]
+    url = asset_url(relative_path)
+    if url is None:
+        st.image(source, use_container_width=True, caption=caption)
+        return
+    st.markdown(f'<img src="{url}" alt="{caption or name}" style="width: 100%; border-radius: 8px;">', unsafe_allow_html=True)
+    if caption:
+        st.caption(caption)
+
+
+def download_assets(force=False):
+    """Downloads the fonts and sidebar images into static/ so the app runs fully offline."""
+    assets = [(path, url) for _, _, path, url in FONTS] + list(SIDEBAR_IMAGES.values())
+    for relative_path, url in assets:
+        path = os.path.join(STATIC_DIR, relative_path)
+        if os.path.exists(path) and not force:
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response, open(path, "wb") as f:
+                f.write(response.read())
+            theme_logger.info(f"Downloaded static/{relative_path}")
+        except OSError as e:
+            theme_logger.error(f"Failed to download {url}: {e}")
+    asset_url.cache_clear()
+    theme_css.cache_clear()
@@ -0,0 +1,7 @@
+import logging
+
+from theme import download_assets
+
+# Fetches the self-hosted fonts and sidebar images once, e.g. `python -m theme` before deploying to offline machines.
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+download_assets()
@@ -0,0 +1,90 @@
+import logging
+
+# --- Setup Logging ---
+unified_logger = logging.getLogger(__name__)
+
+# --- Cross-Database Configuration ---
+# The dashboard reads study_data.db with the mock test database ATTACHed under this schema name
+# (see db_pool.ReadPool), so DPP and mock test data are joined inside SQLite.
+MOCK_DB_FILE = "cognisynth_data_rmj.db"
+MOCK_SCHEMA = "mocks"
+
+_MOCK_TESTS = f"""
+    CREATE TEMP VIEW IF NOT EXISTS mock_tests AS
+    SELECT id AS test_id, assessment_date, exam_type, max_score_possible, physics_score, chemistry_score, maths_score, biology_score,
+           ROUND(total_score * 100.0 / NULLIF(max_score_possible, 0), 2) AS ScorePct
+    FROM {MOCK_SCHEMA}.mock_test_results
+"""
+# Stand-in while the mock test database doesn't exist yet, so the views below still resolve.
+_EMPTY_MOCK_TESTS = """
+    CREATE TEMP VIEW IF NOT EXISTS mock_tests AS
+    SELECT NULL AS test_id, NULL AS assessment_date, NULL AS exam_type, NULL AS max_score_possible, NULL AS physics_score,
+           NULL AS chemistry_score, NULL AS maths_score, NULL AS biology_score, NULL AS ScorePct
+    WHERE 0
+"""
+# One row per (mock test, subject) with a non-zero subject score. A subject's share of the paper
+# is the maximum score split evenly over the subjects the test scored (3 for JEE, 4 for IAT/NEST).
+_MOCK_SUBJECT_SCORES = """
+    CREATE TEMP VIEW IF NOT EXISTS mock_subject_scores AS
+    WITH scored AS (
+        SELECT *, (physics_score <> 0) + (chemistry_score <> 0) + (maths_score <> 0) + (biology_score <> 0) AS subjects
+        FROM mock_tests
+    )
+    SELECT test_id, assessment_date, exam_type, Subject, Score,
+           ROUND(Score * 100.0 * subjects / NULLIF(max_score_possible, 0), 2) AS ScorePct
+    FROM (
+        SELECT test_id, assessment_date, exam_type, max_score_possible, subjects, 'Physics' AS Subject, physics_score AS Score FROM scored
+        UNION ALL SELECT test_id, assessment_date, exam_type, max_score_possible, subjects, 'Chemistry', chemistry_score FROM scored
+        UNION ALL SELECT test_id, assessment_date, exam_type, max_score_possible, subjects, 'Maths', maths_score FROM scored
+        UNION ALL SELECT test_id, assessment_date, exam_type, max_score_possible, subjects, 'Biology', biology_score FROM scored
+    )
+    WHERE Score <> 0
+"""
+# FULL OUTER JOIN needs SQLite 3.39+, so subjects with only mock tests are appended separately.
+_SUBJECT_PERFORMANCE = """
+    CREATE TEMP VIEW IF NOT EXISTS subject_performance AS
+    WITH dpp AS (
+        SELECT Subject, COUNT(*) AS DPPs, ROUND(AVG(Accuracy), 2) AS DPP_Accuracy, ROUND(AVG(Score), 2) AS DPP_Score
+        FROM main.dpp_log GROUP BY Subject
+    ), mock AS (
+        SELECT Subject, COUNT(*) AS Mock_Tests, ROUND(AVG(ScorePct), 2) AS Mock_Score_Pct
+        FROM mock_subject_scores GROUP BY Subject
+    )
+    SELECT dpp.Subject, DPPs, DPP_Accuracy, DPP_Score, COALESCE(Mock_Tests, 0) AS Mock_Tests, Mock_Score_Pct
+    FROM dpp LEFT JOIN mock ON mock.Subject = dpp.Subject
+    UNION ALL
+    SELECT Subject, 0, NULL, NULL, Mock_Tests, Mock_Score_Pct FROM mock WHERE Subject NOT IN (SELECT Subject FROM dpp)
+"""
+# Epoch day 0 was a Thursday, so Day - (Day + 3) % 7 is the Monday starting that day's week.
+_WEEKLY_ACTIVITY = """
+    CREATE TEMP VIEW IF NOT EXISTS weekly_activity AS
+    WITH dpp AS (
+        SELECT Date - (Date + 3) % 7 AS Week, COUNT(*) AS DPPs, ROUND(AVG(Accuracy), 2) AS DPP_Accuracy
+        FROM main.dpp_log GROUP BY Week
+    ), mock AS (
+        SELECT assessment_date - (assessment_date + 3) % 7 AS Week, COUNT(*) AS Mock_Tests, ROUND(AVG(ScorePct), 2) AS Mock_Score_Pct
+        FROM mock_tests WHERE assessment_date IS NOT NULL GROUP BY Week
+    )
+    SELECT dpp.Week, DPPs, DPP_Accuracy, COALESCE(Mock_Tests, 0) AS Mock_Tests, Mock_Score_Pct
+    FROM dpp LEFT JOIN mock ON mock.Week = dpp.Week
+    UNION ALL
+    SELECT Week, 0, NULL, Mock_Tests, Mock_Score_Pct FROM mock WHERE Week NOT IN (SELECT Week FROM dpp)
+"""
+
+
+def unified_attachments(mock_db_file=MOCK_DB_FILE):
+    """The `attachments` argument for a read pool on study_data.db that can see the mock tests."""
+    return {MOCK_SCHEMA: mock_db_file}
+
+
+def create_unified_views(conn):
+    """Creates the cross-database TEMP views on a connection (once; later calls are no-ops)."""
+    if conn.execute("SELECT 1 FROM temp.sqlite_master WHERE type = 'view' AND name = 'subject_performance'").fetchone():
+        return
+    attached = {name for _, name, _ in conn.execute("PRAGMA database_list")}
+    if MOCK_SCHEMA not in attached:
+        unified_logger.warning("Mock test database is not attached; cross-source views show DPPs only.")
+    conn.execute(_MOCK_TESTS if MOCK_SCHEMA in attached else _EMPTY_MOCK_TESTS)
+    conn.execute(_MOCK_SUBJECT_SCORES)
+    conn.execute(_SUBJECT_PERFORMANCE)
+    conn.execute(_WEEKLY_ACTIVITY)